@@ -1,21 +1,30 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import os
 import sys
+import threading
 import time
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import Any
 
-from src.credentials import get_credential
-from src.diff import diff_snapshots
+from src.cluster import Cluster
+from src.concurrency import ordered_map
+from src.credentials import CachedCredential, get_credential
+from src.diff import canonicalize_items, diff_snapshots
+from src.http_client import get_http_client
+from src.incremental import ActivityLogReader, IncrementalPlanner, collect_partial
 from src.logger import AuditLogger
+from src.metrics import CHANGES, CYCLE_SECONDS, FAILURES, ITEMS, LAST_SUCCESS, PHASE_SECONDS, MetricsServer
+from src.page_cache import PageCache
+from src.rate_limiter import get_rate_limiter
+from src.scheduler import Job, Scheduler, shard_subscriptions
 from src.state_manager import StateManager
-from src.monitors.activity_export_monitor import ActivityExportMonitor
-from src.monitors.sentinel_monitor import SentinelMonitor
-from src.monitors.defender_monitor import DefenderMonitor
-from src.monitors.entraid_monitor import EntraIdMonitor
-from src.monitors.rbac_monitor import RBACMonitor
-
-import yaml
+from src.streaming import SortedRecords, diff_streams
+from src.tracing import FileExporter, SamplingProfiler, configure_tracing, span
+from src.monitors.registry import enabled_monitors
 
 
 def load_config(path: str | None) -> dict:
@@ -25,6 +34,8 @@ def load_config(path: str | None) -> dict:
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {path}")
     if config_path.suffix in {".yaml", ".yml"}:
+        import yaml
+
         return yaml.safe_load(config_path.read_text()) or {}
     return json.loads(config_path.read_text())
 
@@ -37,10 +48,18 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--sentinel-workspaces")
     parser.add_argument("--enabled-monitors")
     parser.add_argument("--interval-seconds", type=int)
+    parser.add_argument("--max-workers", type=int, help="Parallel monitors and per-scope requests")
     parser.add_argument("--state-dir")
+    parser.add_argument("--state-backend", choices=["json", "sqlite"])
     parser.add_argument("--log-file")
     parser.add_argument("--verbose", action="store_true")
     parser.add_argument("--once", action="store_true", help="Run once and exit")
+    parser.add_argument("--streaming", action="store_true", help="Bounded-memory streaming diff")
+    parser.add_argument("--incremental", action="store_true", help="Re-fetch only what the Activity Log shows changed")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+    parser.add_argument("--trace-file", help="Write tracing spans (OTLP JSON lines) to this file")
+    parser.add_argument("--profile", help="Profile one cycle and write folded stacks to this file (implies --once)")
+    parser.add_argument("--profile-interval-ms", type=float, default=5, help="Profiler sampling interval")
     parser.add_argument("--fluency-enabled", action="store_true")
     parser.add_argument("--fluency-url")
     parser.add_argument("--fluency-api-key")
@@ -70,7 +89,9 @@ def build_config(args: argparse.Namespace, loaded: dict) -> dict:
         "sentinel_workspaces": parse_list(args.sentinel_workspaces),
         "enabled_monitors": parse_list(args.enabled_monitors),
         "interval_seconds": args.interval_seconds,
+        "max_workers": args.max_workers,
         "state_dir": args.state_dir,
+        "state_backend": args.state_backend,
         "log_file": args.log_file,
     }
     config = merge_config(loaded, overrides)
@@ -88,51 +109,512 @@ def build_config(args: argparse.Namespace, loaded: dict) -> dict:
         fluency["timeout_seconds"] = args.fluency_timeout_seconds
     config["fluency"] = fluency
 
+    streaming = loaded.get("streaming", {}).copy() if loaded else {}
+    if args.streaming:
+        streaming["enabled"] = True
+    config["streaming"] = streaming
+
+    incremental = loaded.get("incremental", {}).copy() if loaded else {}
+    if args.incremental:
+        incremental["enabled"] = True
+    config["incremental"] = incremental
+
+    metrics = loaded.get("metrics", {}).copy() if loaded else {}
+    if args.metrics_port is not None:
+        metrics["enabled"] = True
+        metrics["port"] = args.metrics_port
+    config["metrics"] = metrics
+
+    tracing = loaded.get("tracing", {}).copy() if loaded else {}
+    if args.trace_file:
+        tracing["enabled"] = True
+        tracing["file"] = args.trace_file
+    config["tracing"] = tracing
+
     config.setdefault("interval_seconds", 300)
+    config.setdefault("max_workers", 1)
     config.setdefault("state_dir", ".state")
+    config.setdefault("state_backend", "json")
     config.setdefault("log_file", "audit.log")
     config.setdefault("subscriptions", [])
     config.setdefault("sentinel_workspaces", [])
     config.setdefault("enabled_monitors", [])
     config.setdefault("tenant_id", None)
     config.setdefault("rbac_scopes", [])
+    config.setdefault("entraid_collections", [])
+    config["fluency"].setdefault("spool_dir", str(Path(config["state_dir"]) / "fluency-spool"))
     return config
 
 
+# Scopes and state location a tenant does not inherit from the global config.
+TENANT_DEFAULTS = {"tenant_id": None, "subscriptions": [], "sentinel_workspaces": [], "rbac_scopes": [], "state_db": None}
+
+
+@dataclass
+class Tenant:
+    """One tenant served by this process; ``name`` is None without ``tenants``."""
+
+    name: str | None
+    config: dict
+    credential: Any
+    state: Any
+    page_caches: dict[str, PageCache] = field(default_factory=dict)
+
+
+def tenant_configs(config: dict) -> dict[str | None, dict]:
+    """One config per entry of ``tenants``, or ``{None: config}`` without any.
+
+    A tenant inherits every global setting except its scopes and state, which
+    default to ``<state_dir>/tenants/<name>``; its ``credential`` is not kept.
+    """
+    tenants = config.get("tenants") or {}
+    if not tenants:
+        return {None: config}
+    shared = {key: value for key, value in config.items() if key != "tenants"}
+    configs = {}
+    for name, settings in tenants.items():
+        settings = {key: value for key, value in (settings or {}).items() if key != "credential"}
+        tenant_config = {**shared, **TENANT_DEFAULTS, **settings, "tenant": name}
+        tenant_config["state_dir"] = settings.get("state_dir") or str(Path(config["state_dir"]) / "tenants" / name)
+        configs[name] = tenant_config
+    return configs
+
+
+def build_tenants(config: dict) -> dict[str | None, Tenant]:
+    tenants = {}
+    # The replay server does not check tokens, so replays run without Azure sign-in.
+    replaying = (config.get("http") or {}).get("transport") == "replay"
+    for name, tenant_config in tenant_configs(config).items():
+        if replaying:
+            from src.replay import ReplayCredential
+
+            credential = CachedCredential(ReplayCredential())
+        elif name is None:
+            credential = CachedCredential(get_credential())
+        else:
+            settings = (config["tenants"][name] or {}).get("credential") or {}
+            tenant_id = tenant_config["tenant_id"]
+            credential = CachedCredential(get_credential({"tenant_id": tenant_id, **settings}), tenant_id=tenant_id)
+        tenants[name] = Tenant(name, tenant_config, credential, build_state(tenant_config))
+    return tenants
+
+
+def build_state(config: dict):
+    if config.get("state_backend") == "sqlite":
+        from src.sqlite_state import SqliteStateManager
+
+        return SqliteStateManager(config.get("state_db") or str(Path(config["state_dir"]) / "state.db"))
+    return StateManager(config["state_dir"])
+
+
 def get_enabled_monitors(config: dict) -> dict:
-    available = {
-        "activity_export_monitor": ActivityExportMonitor,
-        "sentinel_monitor": SentinelMonitor,
-        "defender_monitor": DefenderMonitor,
-        "entraid_monitor": EntraIdMonitor,
-        "rbac_monitor": RBACMonitor,
+    """Enabled monitor classes; only their modules are imported (see ``src.monitors.registry``)."""
+    return enabled_monitors(config)
+
+
+def build_monitors(config: dict, credential, logger: AuditLogger, state, verbose: bool) -> dict:
+    http_client = get_http_client(config)
+    return {
+        name: monitor_cls(
+            config=config,
+            credential=credential,
+            logger=logger,
+            verbose=verbose,
+            http_client=http_client,
+            state=state,
+        )
+        for name, monitor_cls in get_enabled_monitors(config).items()
     }
-    enabled = config.get("enabled_monitors") or list(available.keys())
-    return {name: available[name] for name in enabled if name in available}
 
 
-def run_once(config: dict, credential, logger: AuditLogger, state: StateManager, verbose: bool) -> None:
-    enabled = get_enabled_monitors(config)
-    for name, monitor_cls in enabled.items():
-        monitor = monitor_cls(config=config, credential=credential, logger=logger, verbose=verbose)
-        try:
-            current_items = monitor.collect()
-            snapshot = state.load_snapshot(name)
-            if snapshot is None:
-                state.save_snapshot(name, current_items)
-                if verbose:
-                    logger.info(f"Baseline snapshot saved for {name}: {len(current_items)} items")
-                continue
+def metric_name(config: dict, name: str) -> str:
+    """The ``monitor`` label for ``name``: prefixed with the tenant when there are several."""
+    tenant = config.get("tenant")
+    return f"{tenant}.{name}" if tenant else name
+
+
+def worker_split(config: dict, monitors: int) -> tuple[int, int]:
+    """Monitors collected at once, and threads each gets for its scopes.
+
+    Both levels share ``max_workers``, so their product never exceeds it
+    (nor the HTTP pool sized from it). ``monitor_workers`` caps the first.
+    """
+    max_workers = int(config.get("max_workers", 1) or 1)
+    monitor_workers = int(config.get("monitor_workers") or max_workers)
+    monitor_workers = max(1, min(monitor_workers, monitors, max_workers))
+    return monitor_workers, max(1, max_workers // monitor_workers)
+
+
+def _collect(
+    name: str,
+    monitor,
+    streaming: dict,
+    state,
+    label: str | None = None,
+) -> tuple[list[dict] | SortedRecords | None, Exception | None]:
+    with PHASE_SECONDS.time(monitor=label or name, phase="collect"), span("collect", monitor=name) as collect_span:
+        items, error = _collect_items(name, monitor, streaming, state)
+        if error is not None:
+            collect_span.set(error=str(error))
+        elif isinstance(items, SortedRecords):
+            collect_span.set(items=items.count)
+        else:
+            collect_span.set(items=len(items))
+        return items, error
+
+
+def _collect_items(
+    name: str,
+    monitor,
+    streaming: dict,
+    state,
+) -> tuple[list[dict] | SortedRecords | None, Exception | None]:
+    try:
+        if monitor.page_cache is not None:
+            monitor.page_cache.begin()
+        if monitor.subscription_filter is not None:
+            items = collect_partial(monitor, state, name)
+        elif streaming.get("enabled"):
+            records = SortedRecords(
+                monitor.iter_items(),
+                chunk_size=int(streaming.get("chunk_size", 50_000)),
+                tmp_dir=streaming.get("tmp_dir"),
+            )
+            return records, None
+        else:
+            items = monitor.collect()
+        if monitor.page_cache is not None:
+            # Read after collecting: without a stored snapshot, collect_partial
+            # clears the filter and collects everything. Otherwise pages of the
+            # subscriptions it skipped stay cached.
+            monitor.page_cache.commit(complete=monitor.subscription_filter is None)
+        return items, None
+    except Exception as exc:  # noqa: BLE001
+        return None, exc
+
+
+def process_snapshot(
+    name: str,
+    monitor,
+    current_items: list[dict],
+    logger: AuditLogger,
+    state,
+    verbose: bool,
+    label: str | None = None,
+) -> None:
+    label = label or name
+    ITEMS.set(len(current_items), monitor=label)
+    started = time.perf_counter()
+    # Normalize, serialize and hash every item once; diffing, events and
+    # persistence below all reuse these forms.
+    known = monitor.page_cache.canonical if monitor.page_cache is not None else None
+    with span("normalize", monitor=name, items=len(current_items)):
+        canonical = canonicalize_items(current_items, known=known)
+        current_hashes = {item_id: form.digest for item_id, form in canonical.items()}
+    with span("load_index", monitor=name):
+        stored_hashes = state.load_index(name)
+    if stored_hashes is not None and stored_hashes == current_hashes:
+        # Nothing changed: skip loading, diffing and rewriting the snapshot.
+        PHASE_SECONDS.observe(time.perf_counter() - started, monitor=label, phase="diff")
+        if verbose:
+            logger.info(f"{name}: 0 changes detected")
+        return
+
+    with span("load_snapshot", monitor=name):
+        snapshot = state.load_snapshot(name)
+    if snapshot is None:
+        PHASE_SECONDS.observe(time.perf_counter() - started, monitor=label, phase="diff")
+        with PHASE_SECONDS.time(monitor=label, phase="persist"), span("save", monitor=name, items=len(current_items)):
+            state.save_snapshot(name, current_items, canonical=canonical)
+        if verbose:
+            logger.info(f"Baseline snapshot saved for {name}: {len(current_items)} items")
+        return
 
-            changes = diff_snapshots(snapshot, current_items)
-            for change in changes:
-                event = monitor.build_event(change)
-                logger.log_event(event)
-            state.save_snapshot(name, current_items)
+    with span("diff", monitor=name) as diff_span:
+        changes = diff_snapshots(
+            snapshot,
+            current_items,
+            old_hashes=stored_hashes,
+            new_canonical=canonical,
+        )
+        diff_span.set(changes=len(changes))
+    with span("log_events", monitor=name, events=len(changes)):
+        for change in changes:
+            event = monitor.build_event(change)
+            logger.log_event(event)
+            CHANGES.inc(monitor=label, change_type=change["changeType"])
+    PHASE_SECONDS.observe(time.perf_counter() - started, monitor=label, phase="diff")
+    if changes or stored_hashes is None:
+        with PHASE_SECONDS.time(monitor=label, phase="persist"), span("save", monitor=name, items=len(current_items)):
+            state.save_snapshot(name, current_items, canonical=canonical)
+    if verbose:
+        logger.info(f"{name}: {len(changes)} changes detected")
+
+
+def process_stream(
+    name: str,
+    monitor,
+    records: SortedRecords,
+    logger: AuditLogger,
+    state,
+    verbose: bool,
+    label: str | None = None,
+) -> None:
+    label = label or name
+    ITEMS.set(records.count, monitor=label)
+    started = time.perf_counter()
+    try:
+        old_records = state.iter_snapshot(name)
+        if old_records is None:
+            with PHASE_SECONDS.time(monitor=label, phase="persist"), span("save", monitor=name, items=records.count):
+                state.save_snapshot_stream(name, records)
             if verbose:
-                logger.info(f"{name}: {len(changes)} changes detected")
+                logger.info(f"Baseline snapshot saved for {name}: {records.count} items")
+            return
+
+        change_count = 0
+        with span("diff", monitor=name, items=records.count) as diff_span:
+            for change in diff_streams(old_records, records):
+                logger.log_event(monitor.build_event(change))
+                CHANGES.inc(monitor=label, change_type=change["changeType"])
+                change_count += 1
+            diff_span.set(changes=change_count)
+        PHASE_SECONDS.observe(time.perf_counter() - started, monitor=label, phase="diff")
+        if change_count:
+            with PHASE_SECONDS.time(monitor=label, phase="persist"), span("save", monitor=name, items=records.count):
+                state.save_snapshot_stream(name, records)
+        if verbose:
+            logger.info(f"{name}: {change_count} changes detected")
+    finally:
+        records.close()
+
+
+def run_once(
+    config: dict,
+    credential,
+    logger: AuditLogger,
+    state,
+    verbose: bool,
+    page_caches: dict[str, PageCache] | None = None,
+    monitors: dict | None = None,
+) -> None:
+    """Run one cycle for ``monitors`` (keyed by snapshot name), or for every enabled monitor."""
+    with span("cycle", tenant=config.get("tenant"), monitors=",".join(monitors or get_enabled_monitors(config))):
+        _run_cycle(config, credential, logger, state, verbose, page_caches, monitors)
+
+
+def _run_cycle(
+    config: dict,
+    credential,
+    logger: AuditLogger,
+    state,
+    verbose: bool,
+    page_caches: dict[str, PageCache] | None,
+    monitors: dict | None,
+) -> None:
+    http_client = get_http_client(config)
+    streaming = config.get("streaming") or {}
+    if monitors is None:
+        monitors = build_monitors(config, credential, logger, state, verbose)
+    max_workers = int(config.get("max_workers", 1) or 1)
+
+    if (config.get("page_cache") or {}).get("enabled") and not streaming.get("enabled"):
+        # Kept across cycles by main(), so unchanged pages are not even re-read from state.
+        page_caches = page_caches if page_caches is not None else {}
+        for name, monitor in monitors.items():
+            if name not in page_caches:
+                page_caches[name] = PageCache(state, name)
+            monitor.page_cache = page_caches[name]
+
+    planner = None
+    incremental = config.get("incremental") or {}
+    if incremental.get("enabled") and not streaming.get("enabled"):
+        reader = ActivityLogReader(config, credential, logger, verbose=verbose, http_client=http_client)
+        planner = IncrementalPlanner(incremental, state, reader, max_workers)
+        with span("plan"):
+            plan = planner.plan(monitors)
+        for name, subscriptions in plan.items():
+            monitors[name].subscription_filter = subscriptions
+            if verbose and subscriptions is not None:
+                logger.info(f"{name}: incremental, re-fetching {len(subscriptions)} subscriptions")
+
+    # Nothing relevant in the Activity Log: the stored snapshot is still current.
+    idle = [name for name, monitor in monitors.items() if monitor.subscription_filter == set()]
+    active = {name: monitor for name, monitor in monitors.items() if name not in idle}
+
+    # Collection is the slow, network-bound part and runs concurrently; diffing,
+    # logging and persistence stay serial and in monitor order.
+    monitor_workers, scope_workers = worker_split(config, len(active))
+    for monitor in active.values():
+        monitor.max_workers = scope_workers
+    started = time.perf_counter()
+    results = ordered_map(
+        lambda entry: _collect(*entry, streaming, state, metric_name(config, entry[0])),
+        list(active.items()),
+        monitor_workers,
+    )
+    for (name, monitor), (current_items, error) in zip(active.items(), results):
+        label = metric_name(config, name)
+        if error is not None:
+            FAILURES.inc(monitor=label)
+            logger.error(f"Monitor {name} failed: {error}")
+            continue
+        try:
+            with span("process", monitor=name):
+                if isinstance(current_items, SortedRecords):
+                    process_stream(name, monitor, current_items, logger, state, verbose, label)
+                else:
+                    process_snapshot(name, monitor, current_items, logger, state, verbose, label)
         except Exception as exc:  # noqa: BLE001
+            FAILURES.inc(monitor=label)
             logger.error(f"Monitor {name} failed: {exc}")
+            continue
+        CYCLE_SECONDS.observe(time.perf_counter() - started, monitor=label)
+        LAST_SUCCESS.set(time.time(), monitor=label)
+        if planner is not None:
+            planner.commit(name, monitor)
+    for name in idle:
+        planner.commit(name, monitors[name])
+        LAST_SUCCESS.set(time.time(), monitor=metric_name(config, name))
+        if verbose:
+            logger.info(f"{name}: no relevant Activity Log events, 0 changes detected")
+
+    if verbose:
+        for name, monitor in active.items():
+            if monitor.page_cache is not None:
+                logger.info(f"{name}: page cache {monitor.page_cache.hits} hits, {monitor.page_cache.misses} misses")
+        for host, stats in http_client.stats().items():
+            logger.info(f"HTTP pool {host}: {json.dumps(stats, sort_keys=True)}")
+        logger.info(f"Rate limiter: {json.dumps(get_rate_limiter(config).stats(), sort_keys=True)}")
+
+
+def run_job(
+    config: dict,
+    credential,
+    logger: AuditLogger,
+    state,
+    verbose: bool,
+    page_caches,
+    name: str,
+    job_name: str,
+    shard: set[str] | None,
+) -> None:
+    """One scheduled run of a monitor, or of one shard of its subscriptions.
+
+    Shards keep their own snapshot, named after the job.
+    """
+    monitor = build_monitors({**config, "enabled_monitors": [name]}, credential, logger, state, verbose)[name]
+    monitor.shard = shard
+    run_once(config, credential, logger, state, verbose, page_caches, monitors={job_name: monitor})
+
+
+def run_partitions(
+    config: dict,
+    credential,
+    logger: AuditLogger,
+    state,
+    verbose: bool,
+    page_caches,
+    cluster: Cluster,
+    name: str,
+) -> None:
+    """Run the partitions of a monitor that this cluster worker owns and can lock.
+
+    A partition still locked by another worker (one that just lost it in a
+    rebalance) is left for the next run.
+    """
+    tenant = config.get("tenant")
+    single = {**config, "enabled_monitors": [name]}
+    keys = build_monitors(single, credential, logger, state, verbose)[name].partition_keys()
+    monitors = {}
+    locks = {}
+    for partition, shard in cluster.owned_partitions(name, keys, namespace=tenant).items():
+        lock = partition if tenant is None else f"{tenant}.{partition}"
+        if not cluster.acquire(lock):
+            if verbose:
+                logger.info(f"{lock}: locked by another worker, skipped")
+            continue
+        locks[partition] = lock
+        monitors[partition] = build_monitors(single, credential, logger, state, verbose)[name]
+        monitors[partition].shard = shard
+    try:
+        run_once(config, credential, logger, state, verbose, page_caches, monitors=monitors)
+    finally:
+        for lock in locks.values():
+            cluster.release(lock)
+
+
+def build_scheduler(
+    config: dict,
+    tenants: dict[str | None, Tenant],
+    logger: AuditLogger,
+    verbose: bool,
+    cluster: Cluster | None = None,
+) -> Scheduler:
+    """One job per tenant and enabled monitor (or per shard), timed by ``schedules.<monitor>``.
+
+    With a ``cluster``, each monitor's job runs the partitions this worker owns.
+    Jobs are grouped by tenant so that the scheduler shares workers fairly.
+    """
+    settings = config.get("scheduler") or {}
+    # Kept out of state_dir itself, where every *.json is a snapshot.
+    status_file = settings.get("status_file") or str(Path(config["state_dir"]) / "scheduler" / "status.json")
+    Path(status_file).parent.mkdir(parents=True, exist_ok=True)
+    workers = int(settings.get("max_workers") or config.get("max_workers", 1) or 1)
+    per_tenant = settings.get("max_jobs_per_tenant")
+    scheduler = Scheduler(max_workers=workers, max_per_group=int(per_tenant) if per_tenant else None)
+
+    status_lock = threading.Lock()
+
+    def write_status(job: Job) -> None:
+        if verbose:
+            logger.info(f"Job {job.name} finished in {job.last_duration:.1f}s; next run {job.status()['next_run']}")
+        # Jobs finish on several worker threads; they share the temporary file.
+        with status_lock:
+            tmp_path = f"{status_file}.tmp"
+            Path(tmp_path).write_text(json.dumps(scheduler.status(), indent=2), encoding="utf-8")
+            os.replace(tmp_path, status_file)
+
+    scheduler.on_complete = write_status
+    for tenant in tenants.values():
+        tenant_config = tenant.config
+        context = (tenant_config, tenant.credential, logger, tenant.state, verbose, tenant.page_caches)
+        prefix = "" if tenant.name is None else f"{tenant.name}."
+        labels = {} if tenant.name is None else {"tenant": tenant.name}
+        schedules = tenant_config.get("schedules") or {}
+        monitors = build_monitors(tenant_config, tenant.credential, logger, tenant.state, verbose)
+        for name, monitor in monitors.items():
+            schedule = schedules.get(name) or {}
+            timing = {
+                "interval": schedule.get("interval_seconds", tenant_config["interval_seconds"]),
+                "jitter": schedule.get("jitter_seconds", 0),
+                "priority": schedule.get("priority", 0),
+                "group": tenant.name,
+            }
+            if cluster is not None:
+                scheduler.add(
+                    f"{prefix}{name}",
+                    partial(run_partitions, *context, cluster, name),
+                    **timing,
+                    **labels,
+                    monitor=name,
+                    worker=cluster.worker_id,
+                )
+                continue
+            shards = int(schedule.get("shards", 1) or 1)
+            keys = monitor.partition_keys()
+            groups = shard_subscriptions(sorted(keys), shards) if shards > 1 and keys else [None]
+            for index, shard in enumerate(groups):
+                job_name = name if shard is None else f"{name}.shard{index}"
+                scheduler.add(
+                    f"{prefix}{job_name}",
+                    partial(run_job, *context, name, job_name, shard),
+                    **timing,
+                    **labels,
+                    monitor=name,
+                    shard=None if shard is None else index,
+                )
+    return scheduler
 
 
 def main() -> int:
@@ -144,20 +626,67 @@ def main() -> int:
         return 1
 
     config = build_config(args, loaded)
-    credential = get_credential()
     logger = AuditLogger(
         log_file=config["log_file"],
         fluency=config.get("fluency", {}),
         verbose=args.verbose,
+        http_client=get_http_client(config),
+        audit_log=config.get("audit_log", {}),
     )
-    state = StateManager(config["state_dir"])
-
-    interval = config.get("interval_seconds", 300)
-    while True:
-        run_once(config, credential, logger, state, args.verbose)
-        if args.once:
-            break
-        time.sleep(interval)
+    tenants = build_tenants(config)
+
+    profiler = None
+    if args.profile:
+        # Spans name the stacks' outer frames; their attributes (items, pages, ...) go next to the profile.
+        configure_tracing(config, get_http_client(config), [FileExporter(f"{args.profile}.spans.json")])
+        profiler = SamplingProfiler(args.profile, args.profile_interval_ms / 1000)
+    else:
+        configure_tracing(config, get_http_client(config))
+
+    stop = threading.Event()
+    metrics = None
+    if (config.get("metrics") or {}).get("enabled"):
+        metrics = MetricsServer.from_config(config).start()
+    cluster = None
+    if (config.get("cluster") or {}).get("enabled"):
+        cluster = Cluster.from_config(config)
+        cluster.start(stop)
+
+    if args.once or profiler is not None:
+        if profiler is not None:
+            profiler.start()
+        try:
+            for tenant in tenants.values():
+                context = (tenant.config, tenant.credential, logger, tenant.state, args.verbose, tenant.page_caches)
+                if cluster is None:
+                    run_once(*context)
+                    continue
+                for name in get_enabled_monitors(tenant.config):
+                    run_partitions(*context, cluster, name)
+        finally:
+            stop.set()
+            if profiler is not None:
+                profiler.stop()
+            if cluster is not None:
+                cluster.close()
+            if metrics is not None:
+                metrics.stop()
+            logger.close()
+        return 0
+
+    scheduler = build_scheduler(config, tenants, logger, args.verbose, cluster)
+    try:
+        scheduler.run_forever(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        scheduler.shutdown()
+        if cluster is not None:
+            cluster.close()
+        if metrics is not None:
+            metrics.stop()
+        logger.close()
     return 0
 
 
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Compare the single-pass canonicalization in src/diff.py with the previous
+normalize-then-hash pipeline on deeply nested conditional access policies.
+
+    python benchmarks/bench_canonicalize.py --policies 2000 --depth 6
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.diff import VOLATILE_FIELDS, canonicalize, stable_hash  # noqa: E402
+
+
+def legacy_normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: legacy_normalize(value[key]) for key in sorted(value) if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return sorted(
+            [legacy_normalize(item) for item in value],
+            key=lambda item: json.dumps(item, sort_keys=True, separators=(",", ":")),
+        )
+    return value
+
+
+def nested_conditions(rng: random.Random, depth: int) -> Any:
+    if depth == 0:
+        return [f"{rng.getrandbits(64):016x}" for _ in range(rng.randint(2, 6))]
+    return [
+        {
+            "operator": rng.choice(["and", "or"]),
+            "includeGroups": [f"group-{rng.randint(0, 500)}" for _ in range(3)],
+            "rules": nested_conditions(rng, depth - 1),
+            "modifiedDateTime": "2024-01-01T00:00:00Z",
+        }
+        for _ in range(rng.randint(1, 3))
+    ]
+
+
+def ca_policy(rng: random.Random, index: int, depth: int) -> dict[str, Any]:
+    return {
+        "state": rng.choice(["enabled", "disabled", "enabledForReportingButNotEnforced"]),
+        "conditions": {
+            "users": {
+                "includeUsers": [f"user-{rng.randint(0, 10_000)}" for _ in range(20)],
+                "excludeGroups": [f"group-{rng.randint(0, 500)}" for _ in range(10)],
+            },
+            "applications": {"includeApplications": ["All"], "excludeApplications": [f"app-{index}"]},
+            "locations": {"includeLocations": ["All"], "excludeLocations": [f"loc-{rng.randint(0, 50)}"]},
+            "nested": nested_conditions(rng, depth),
+        },
+        "grantControls": {"operator": "OR", "builtInControls": ["mfa", "compliantDevice"]},
+        "sessionControls": None,
+    }
+
+
+def legacy_cycle(policies: list[Any]) -> list[str]:
+    # diff normalizes and hashes, build_event normalizes again.
+    digests = []
+    for policy in policies:
+        normalized = legacy_normalize(policy)
+        digests.append(stable_hash(normalized))
+        legacy_normalize(policy)
+    return digests
+
+
+def canonical_cycle(policies: list[Any]) -> list[str]:
+    return [canonicalize(policy).digest for policy in policies]
+
+
+def best_of(func, policies: list[Any], repeat: int) -> tuple[float, list[str]]:
+    best = float("inf")
+    result: list[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(policies)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--policies", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policies = [ca_policy(rng, index, args.depth) for index in range(args.policies)]
+    legacy_seconds, legacy_digests = best_of(legacy_cycle, policies, args.repeat)
+    canonical_seconds, canonical_digests = best_of(canonical_cycle, policies, args.repeat)
+    if legacy_digests != canonical_digests:
+        print("hash mismatch between legacy and canonical pipelines", file=sys.stderr)
+        return 1
+    print(f"policies={args.policies} depth={args.depth}")
+    print(f"legacy     {legacy_seconds * 1000:9.1f} ms  {args.policies / legacy_seconds:10.0f} items/s")
+    print(f"canonical  {canonical_seconds * 1000:9.1f} ms  {args.policies / canonical_seconds:10.0f} items/s")
+    print(f"speedup    {legacy_seconds / canonical_seconds:9.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
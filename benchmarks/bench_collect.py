@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Benchmark end-to-end collection against the replay server.
+
+Without ``--cassette-dir``, a synthetic cassette is generated: role assignment
+pages (with nextLink) and custom role definitions for ``--subscriptions``
+subscriptions. With one (recorded with ``http.transport: record``), the
+given monitors and subscriptions are replayed as recorded.
+
+    python benchmarks/bench_collect.py --workers 1,4,16 --latency-ms 80 --throttle-rate 0.02
+    python benchmarks/bench_collect.py --cassette-dir cassettes/prod --monitors rbac_monitor,defender_monitor \\
+        --subscription-ids sub-1,sub-2 --workers 8
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.credentials import CachedCredential  # noqa: E402
+from src.rate_limiter import RateLimiter  # noqa: E402
+from src.replay import Cassette, ReplayCredential, ReplayHttpClient, ReplayServer  # noqa: E402
+from src.monitors.registry import enabled_monitors  # noqa: E402
+
+ARM = "https://management.azure.com"
+
+
+class QuietLogger:
+    def info(self, message: str) -> None:
+        return None
+
+    def error(self, message: str) -> None:
+        print(message, file=sys.stderr)
+
+
+def synthetic_cassette(directory: str, subscriptions: list[str], assignments: int, page_size: int, seed: int) -> None:
+    """Role assignment pages and custom role definitions for each subscription."""
+    rng = random.Random(seed)
+    cassette = Cassette(directory)
+    for subscription_id in subscriptions:
+        url = f"{ARM}/subscriptions/{subscription_id}/providers/Microsoft.Authorization/roleAssignments"
+        pages = max(1, -(-assignments // page_size))
+        for page in range(pages):
+            value = []
+            for _ in range(min(page_size, assignments - page * page_size)):
+                name = f"{rng.getrandbits(128):032x}"
+                value.append(
+                    {
+                        "id": f"/subscriptions/{subscription_id}/providers/Microsoft.Authorization/roleAssignments/{name}",
+                        "name": name,
+                        "type": "Microsoft.Authorization/roleAssignments",
+                        "properties": {
+                            "principalId": f"{rng.getrandbits(128):032x}",
+                            "principalType": rng.choice(["User", "Group", "ServicePrincipal"]),
+                            "roleDefinitionId": f"/providers/Microsoft.Authorization/roleDefinitions/{rng.randint(0, 40)}",
+                            "scope": f"/subscriptions/{subscription_id}",
+                        },
+                    }
+                )
+            body: dict[str, Any] = {"value": value}
+            if page + 1 < pages:
+                body["nextLink"] = f"{url}?api-version=2022-04-01&$skipToken={page + 1}"
+            query = "api-version=2022-04-01" + (f"&$skipToken={page}" if page else "")
+            cassette.add("GET", f"{url}?{query}", body)
+        definitions = {
+            "value": [
+                {
+                    "id": f"/subscriptions/{subscription_id}/providers/Microsoft.Authorization/roleDefinitions/custom-{index}",
+                    "name": f"custom-{index}",
+                    "type": "Microsoft.Authorization/roleDefinitions",
+                    "properties": {
+                        "roleName": f"Custom role {index}",
+                        "roleType": "CustomRole",
+                        "permissions": [{"actions": [f"Microsoft.Compute/*/read/{index}"]}],
+                        "assignableScopes": [f"/subscriptions/{subscription_id}"],
+                    },
+                }
+                for index in range(5)
+            ]
+        }
+        cassette.add(
+            "GET",
+            f"{ARM}/subscriptions/{subscription_id}/providers/Microsoft.Authorization/roleDefinitions?api-version=2022-04-01",
+            definitions,
+        )
+
+
+def run(
+    server: ReplayServer,
+    monitors: list[str],
+    config: dict[str, Any],
+    workers: int,
+) -> dict[str, Any]:
+    config = {**config, "max_workers": workers, "http": {"pool_maxsize": max(10, workers)}}
+    http = ReplayHttpClient(server.url, pool_maxsize=max(10, workers))
+    limiter = RateLimiter.from_config(config)
+    credential = CachedCredential(ReplayCredential())
+    before = server.stats()
+    started = time.perf_counter()
+    items = 0
+    for name, monitor_cls in enabled_monitors({**config, "enabled_monitors": monitors}).items():
+        monitor = monitor_cls(config, credential, QuietLogger(), http_client=http, rate_limiter=limiter)
+        items += len(monitor.collect())
+    seconds = time.perf_counter() - started
+    after = server.stats()
+    http.close()
+    requests = after["requests"] - before["requests"]
+    return {
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "items": items,
+        "items_per_second": round(items / seconds),
+        "requests": requests,
+        "requests_per_second": round(requests / seconds, 1),
+        "throttled": after["throttled"] - before["throttled"],
+        "failed": after["failed"] - before["failed"],
+        "missing": after["missing"] - before["missing"],
+        "limiter": limiter.stats(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette-dir", help="replay a recorded cassette instead of a synthetic one")
+    parser.add_argument("--monitors", default="rbac_monitor")
+    parser.add_argument("--subscription-ids", help="comma-separated subscriptions to collect from a recorded cassette")
+    parser.add_argument("--subscriptions", type=int, default=50, help="synthetic subscriptions")
+    parser.add_argument("--assignments", type=int, default=500, help="synthetic role assignments per subscription")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--workers", default="1,4,16", help="comma-separated max_workers values to compare")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-seconds", type=float, default=1.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.cassette_dir:
+            directory = args.cassette_dir
+            subscriptions = [part for part in (args.subscription_ids or "").split(",") if part]
+        else:
+            directory = tmp_dir
+            subscriptions = [f"00000000-0000-0000-0000-{index:012d}" for index in range(args.subscriptions)]
+            synthetic_cassette(directory, subscriptions, args.assignments, args.page_size, args.seed)
+        server = ReplayServer(
+            Cassette(directory),
+            latency=args.latency_ms / 1000,
+            jitter=args.jitter_ms / 1000,
+            throttle_rate=args.throttle_rate,
+            retry_after=args.retry_after_seconds,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        ).start()
+        try:
+            monitors = [name for name in args.monitors.split(",") if name]
+            config = {"subscriptions": subscriptions, "tenant_id": "tenant"}
+            for workers in [int(part) for part in args.workers.split(",") if part]:
+                print(json.dumps(run(server, monitors, config, workers), sort_keys=True))
+        finally:
+            server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Benchmark diffing, hashing and snapshot state at production scale.
+
+Seeded generators build role assignments, conditional access policies and
+Sentinel analytics rules shaped like the monitors' items, plus a second
+snapshot with a given share of them created, updated or deleted. Every case
+runs in a fresh process so its peak RSS is its own.
+
+    python benchmarks/bench_scale.py --sizes 1000,100000 --change-ratios 0,0.01,0.1
+    python benchmarks/bench_scale.py --sizes 1000000 --kinds role_assignment --save-baseline baseline.json
+    python benchmarks/bench_scale.py --sizes 1000000 --kinds role_assignment --baseline baseline.json --threshold 0.2
+
+With ``--baseline``, the run fails when any operation's throughput drops, or
+a case's peak RSS grows, by more than ``--threshold`` against the stored run.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.diff import canonicalize, canonicalize_items, diff_snapshots, normalize_item, stable_hash  # noqa: E402
+from src.sqlite_state import SqliteStateManager  # noqa: E402
+from src.state_manager import StateManager  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+KQL_TABLES = ["SigninLogs", "AuditLogs", "AzureActivity", "SecurityEvent", "OfficeActivity", "AzureDiagnostics"]
+ROLE_DEFINITIONS = ["Owner", "Contributor", "Reader", "User Access Administrator", "Key Vault Administrator"]
+
+
+def _guid(rng: random.Random) -> str:
+    value = f"{rng.getrandbits(128):032x}"
+    return f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}"
+
+
+def role_assignment(rng: random.Random, index: int) -> dict[str, Any]:
+    subscription_id = f"00000000-0000-0000-0000-{index % 500:012d}"
+    scope = f"/subscriptions/{subscription_id}"
+    if rng.random() < 0.6:
+        scope += f"/resourceGroups/rg-{rng.randint(0, 200)}"
+    name = _guid(rng)
+    return {
+        "id": f"{scope}/providers/Microsoft.Authorization/roleAssignments/{name}",
+        "name": name,
+        "type": "Microsoft.Authorization/roleAssignments",
+        "scope": scope,
+        "subscriptionId": subscription_id,
+        "tenantId": "tenant",
+        "data": {
+            "principalId": _guid(rng),
+            "principalType": rng.choice(["User", "Group", "ServicePrincipal"]),
+            "roleDefinitionId": f"/providers/Microsoft.Authorization/roleDefinitions/{rng.choice(ROLE_DEFINITIONS)}",
+            "scope": scope,
+        },
+    }
+
+
+def _conditions(rng: random.Random, depth: int) -> Any:
+    if depth == 0:
+        return [f"{rng.getrandbits(64):016x}" for _ in range(rng.randint(2, 6))]
+    return [
+        {
+            "operator": rng.choice(["and", "or"]),
+            "includeGroups": [f"group-{rng.randint(0, 500)}" for _ in range(3)],
+            "rules": _conditions(rng, depth - 1),
+            "modifiedDateTime": "2024-01-01T00:00:00Z",
+        }
+        for _ in range(rng.randint(1, 2))
+    ]
+
+
+def conditional_access_policy(rng: random.Random, index: int) -> dict[str, Any]:
+    policy_id = _guid(rng)
+    return {
+        "id": f"conditionalAccessPolicy:{policy_id}",
+        "name": f"CA{index:07d} - require MFA",
+        "type": "conditionalAccessPolicy",
+        "scope": "tenant",
+        "subscriptionId": None,
+        "tenantId": "tenant",
+        "data": {
+            "state": rng.choice(["enabled", "disabled", "enabledForReportingButNotEnforced"]),
+            "conditions": {
+                "users": {
+                    "includeUsers": [f"user-{rng.randint(0, 10_000)}" for _ in range(20)],
+                    "excludeGroups": [f"group-{rng.randint(0, 500)}" for _ in range(10)],
+                },
+                "applications": {"includeApplications": ["All"], "excludeApplications": [f"app-{index}"]},
+                "locations": {"includeLocations": ["All"], "excludeLocations": [f"loc-{rng.randint(0, 50)}"]},
+                "nested": _conditions(rng, 4),
+            },
+            "grantControls": {"operator": "OR", "builtInControls": ["mfa", "compliantDevice"]},
+            "sessionControls": None,
+        },
+    }
+
+
+def _kql(rng: random.Random) -> str:
+    lines = [rng.choice(KQL_TABLES), f"| where TimeGenerated > ago({rng.randint(1, 24)}h)"]
+    for _ in range(rng.randint(20, 60)):
+        column = rng.choice(["UserPrincipalName", "IPAddress", "OperationName", "ResultType", "AppDisplayName"])
+        lines.append(f'| where {column} !has "{rng.getrandbits(48):012x}"')
+    lines.append("| summarize Count = count() by UserPrincipalName, IPAddress, bin(TimeGenerated, 5m)")
+    lines.append(f"| where Count > {rng.randint(1, 50)}")
+    return "\n".join(lines)
+
+
+def sentinel_rule(rng: random.Random, index: int) -> dict[str, Any]:
+    workspace = f"/subscriptions/sub-{index % 50}/resourceGroups/rg/providers/Microsoft.OperationalInsights/workspaces/ws"
+    rule_id = _guid(rng)
+    return {
+        "id": f"{workspace}/providers/Microsoft.SecurityInsights/alertRules/{rule_id}",
+        "name": rule_id,
+        "type": "Microsoft.SecurityInsights/alertRules",
+        "scope": workspace,
+        "subscriptionId": f"sub-{index % 50}",
+        "tenantId": "tenant",
+        "data": {
+            "kind": "Scheduled",
+            "displayName": f"Rule {index}",
+            "enabled": rng.random() < 0.9,
+            "severity": rng.choice(["Low", "Medium", "High"]),
+            "query": _kql(rng),
+            "queryFrequency": "PT5M",
+            "queryPeriod": "PT1H",
+            "tactics": rng.sample(["InitialAccess", "Persistence", "PrivilegeEscalation", "Exfiltration"], 2),
+            "lastModifiedUtc": "2024-01-01T00:00:00Z",
+        },
+    }
+
+
+GENERATORS: dict[str, Callable[[random.Random, int], dict[str, Any]]] = {
+    "role_assignment": role_assignment,
+    "conditional_access_policy": conditional_access_policy,
+    "sentinel_rule": sentinel_rule,
+}
+
+
+def generate(kind: str, size: int, seed: int) -> list[dict[str, Any]]:
+    rng = random.Random(f"{kind}:{seed}")
+    generator = GENERATORS[kind]
+    return [generator(rng, index) for index in range(size)]
+
+
+def mutate(kind: str, items: list[dict[str, Any]], ratio: float, seed: int) -> list[dict[str, Any]]:
+    """Return a next snapshot with ``ratio`` of the items changed: 60% updated, 20% deleted, 20% created."""
+    rng = random.Random(f"{kind}:{seed}:{ratio}")
+    changed = int(len(items) * ratio)
+    picked = rng.sample(range(len(items)), changed) if changed else []
+    deleted = set(picked[: changed // 5])
+    updated = set(picked[changed // 5 : changed - changed // 5])
+    current = []
+    for index, item in enumerate(items):
+        if index in deleted:
+            continue
+        if index in updated:
+            data = json.loads(json.dumps(item["data"]))
+            key = rng.choice(sorted(key for key in data if key != "scope"))
+            data[key] = f"changed-{rng.getrandbits(32):08x}"
+            item = {**item, "data": data}
+        current.append(item)
+    generator = GENERATORS[kind]
+    current.extend(generator(rng, len(items) + index) for index in range(changed // 5))
+    return current
+
+
+def _percentiles(samples: list[int]) -> dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    return {
+        f"p{percent}_us": round(ordered[min(len(ordered) - 1, len(ordered) * percent // 100)] / 1000, 2)
+        for percent in (50, 95, 99)
+    }
+
+
+def _per_item(func: Callable[[dict[str, Any]], Any], items: list[dict[str, Any]]) -> dict[str, Any]:
+    samples = []
+    started = time.perf_counter()
+    for item in items:
+        begin = time.perf_counter_ns()
+        func(item)
+        samples.append(time.perf_counter_ns() - begin)
+    seconds = time.perf_counter() - started
+    return {"seconds": round(seconds, 4), "items_per_second": round(len(items) / seconds), **_percentiles(samples)}
+
+
+def _timed(func: Callable[[], Any], count: int) -> dict[str, Any]:
+    started = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started
+    return {"seconds": round(seconds, 4), "items_per_second": round(count / seconds) if seconds else None}
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _best(measure: Callable[[], dict[str, Any]], repeat: int) -> dict[str, Any]:
+    return min((measure() for _ in range(max(1, repeat))), key=lambda result: result["seconds"])
+
+
+def run_case(kind: str, size: int, ratio: float, seed: int, backend: str, repeat: int = 3) -> dict[str, Any]:
+    previous = generate(kind, size, seed)
+    current = mutate(kind, previous, ratio, seed)
+    operations: dict[str, Any] = {
+        "normalize_item": _best(lambda: _per_item(lambda item: normalize_item(item["data"]), current), repeat),
+        "stable_hash": _best(lambda: _per_item(lambda item: stable_hash(item["data"]), current), repeat),
+        "canonicalize": _best(lambda: _per_item(lambda item: canonicalize(item["data"]), current), repeat),
+    }
+    old_canonical = canonicalize_items(previous)
+    old_hashes = {item_id: form.digest for item_id, form in old_canonical.items()}
+    new_canonical = canonicalize_items(current)
+    changes = diff_snapshots(previous, current, old_hashes=old_hashes, new_canonical=new_canonical)
+
+    def diff() -> None:
+        diff_snapshots(previous, current, old_hashes=old_hashes, new_canonical=new_canonical)
+
+    operations["diff_snapshots"] = _best(lambda: _timed(diff, len(current)), repeat)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if backend == "sqlite":
+            state = SqliteStateManager(str(Path(tmp_dir) / "state.db"))
+        else:
+            state = StateManager(tmp_dir)
+
+        def save_baseline() -> dict[str, Any]:
+            # The SQLite backend only writes changed rows; start from an empty snapshot each time.
+            state.save_snapshot(kind, [], {})
+            return _timed(lambda: state.save_snapshot(kind, previous, old_canonical), size)
+
+        def save_changes() -> dict[str, Any]:
+            state.save_snapshot(kind, previous, old_canonical)
+            return _timed(lambda: state.save_snapshot(kind, current, new_canonical), len(current))
+
+        operations["save_baseline"] = _best(save_baseline, repeat)
+        operations["load_index"] = _best(lambda: _timed(lambda: state.load_index(kind), size), repeat)
+        operations["load_snapshot"] = _best(lambda: _timed(lambda: state.load_snapshot(kind), size), repeat)
+        operations["save_changes"] = _best(save_changes, repeat)
+        if hasattr(state, "close"):
+            state.close()
+    return {
+        "kind": kind,
+        "size": size,
+        "change_ratio": ratio,
+        "backend": backend,
+        "changes": len(changes),
+        "operations": operations,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def case_key(result: dict[str, Any]) -> str:
+    return f"{result['kind']}/{result['size']}/{result['change_ratio']}/{result['backend']}"
+
+
+def regressions(results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float) -> list[str]:
+    """Describe every throughput drop or peak RSS growth beyond ``threshold`` against ``baseline``."""
+    stored = {case_key(result): result for result in baseline}
+    found = []
+    for result in results:
+        before = stored.get(case_key(result))
+        if before is None:
+            continue
+        for name, operation in result["operations"].items():
+            old_rate = (before["operations"].get(name) or {}).get("items_per_second")
+            new_rate = operation.get("items_per_second")
+            if old_rate and new_rate is not None and new_rate < old_rate * (1 - threshold):
+                found.append(f"{case_key(result)} {name}: {new_rate} items/s, baseline {old_rate}")
+        old_rss, new_rss = before.get("peak_rss_mb"), result.get("peak_rss_mb")
+        if old_rss and new_rss is not None and new_rss > old_rss * (1 + threshold):
+            found.append(f"{case_key(result)} peak RSS: {new_rss} MB, baseline {old_rss}")
+    return found
+
+
+def _print(result: dict[str, Any]) -> None:
+    print(f"{case_key(result)}  changes={result['changes']}  peak_rss={result['peak_rss_mb']} MB")
+    for name, operation in result["operations"].items():
+        latency = "  ".join(f"{key}={value}" for key, value in operation.items() if key.startswith("p"))
+        print(f"  {name:<16} {operation['seconds'] * 1000:10.1f} ms  {operation['items_per_second']:>10} items/s  {latency}")
+
+
+def _parse_list(value: str, cast: Callable[[str], Any]) -> list[Any]:
+    return [cast(part) for part in value.split(",") if part.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000", help="comma-separated item counts, e.g. 1000,100000,1000000")
+    parser.add_argument("--kinds", default=",".join(GENERATORS), help="comma-separated item shapes")
+    parser.add_argument("--change-ratios", default="0,0.01,0.1", help="share of items changed, 0 to 0.1")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs per operation")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--save-baseline", help="store the results as the baseline to compare later runs with")
+    parser.add_argument("--baseline", help="fail when results regress against this stored run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression, as a fraction")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        kind, size, ratio = args.case.split(":")
+        print(json.dumps(run_case(kind, int(size), float(ratio), args.seed, args.backend, args.repeat)))
+        return 0
+
+    results = []
+    for kind in _parse_list(args.kinds, str):
+        if kind not in GENERATORS:
+            parser.error(f"unknown kind {kind}; choose from {', '.join(GENERATORS)}")
+        for size in _parse_list(args.sizes, int):
+            for ratio in _parse_list(args.change_ratios, float):
+                # A fresh interpreter per case keeps each peak RSS separate.
+                command = [
+                    sys.executable,
+                    __file__,
+                    "--case",
+                    f"{kind}:{size}:{ratio}",
+                    "--seed",
+                    str(args.seed),
+                    "--backend",
+                    args.backend,
+                    "--repeat",
+                    str(args.repeat),
+                ]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                result = json.loads(output)
+                _print(result)
+                results.append(result)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.baseline:
+        found = regressions(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark cold start of azure-security-guard.py.
+
+Each scenario runs in fresh processes: ``help`` (argument parsing and
+module imports only) and ``once`` (a ``--once`` run of one monitor against
+a small replay cassette, so no Azure sign-in or network is needed). Wall
+times are reported as best and median of ``--repeat`` runs, together with
+the slowest top-level imports from ``python -X importtime``.
+
+    python benchmarks/bench_startup.py --repeat 10
+    python benchmarks/bench_startup.py --save-baseline startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --threshold 0.2
+
+With ``--baseline``, the run fails when a scenario's best wall time grows by
+more than ``--threshold`` (and at least ``--min-regression-ms``) against the
+stored run.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_collect import synthetic_cassette  # noqa: E402
+
+SCRIPT = str(ROOT / "azure-security-guard.py")
+
+
+def scenarios(work_dir: Path, monitor: str) -> dict[str, list[str]]:
+    subscriptions = ["00000000-0000-0000-0000-000000000001"]
+    synthetic_cassette(str(work_dir / "cassette"), subscriptions, assignments=20, page_size=100, seed=1)
+    config = {
+        "subscriptions": subscriptions,
+        "tenant_id": "tenant",
+        "enabled_monitors": [monitor],
+        "state_dir": str(work_dir / "state"),
+        "log_file": str(work_dir / "audit.log"),
+        "http": {"transport": "replay", "cassette_dir": str(work_dir / "cassette")},
+    }
+    (work_dir / "config.json").write_text(json.dumps(config))
+    return {
+        "help": [SCRIPT, "--help"],
+        "once": [SCRIPT, "--config", str(work_dir / "config.json"), "--once"],
+    }
+
+
+def wall_time(args: list[str], cwd: Path) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=cwd, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def import_times(args: list[str], cwd: Path, top: int) -> dict[str, Any]:
+    """Top-level modules by cumulative import time (ms), from one ``-X importtime`` run."""
+    command = [sys.executable, "-X", "importtime", *args]
+    result = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Nested imports are indented under the module that triggered them.
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(cumulative) / 1000))
+    modules.sort(key=lambda entry: entry[1], reverse=True)
+    return {
+        "total_ms": round(sum(ms for _, ms in modules), 1),
+        "slowest": [[name, round(ms, 1)] for name, ms in modules[:top]],
+    }
+
+
+def regressions(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+    min_ms: float,
+) -> list[str]:
+    found = []
+    for name, result in results.items():
+        old = (baseline.get(name) or {}).get("best_ms")
+        new = result["best_ms"]
+        if old and new > old * (1 + threshold) and new - old >= min_ms:
+            found.append(f"{name}: best {new} ms, baseline {old} ms")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default="help,once")
+    parser.add_argument("--monitor", default="rbac_monitor", help="monitor enabled in the once scenario")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to report")
+    parser.add_argument("--save-baseline", help="store the results as the baseline to compare later runs with")
+    parser.add_argument("--baseline", help="fail when results regress against this stored run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression, as a fraction")
+    parser.add_argument("--min-regression-ms", type=float, default=20, help="ignore smaller absolute slowdowns")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(tmp_dir)
+        available = scenarios(work_dir, args.monitor)
+        for name in [part for part in args.scenarios.split(",") if part]:
+            command = available[name]
+            wall_time(command, work_dir)  # warm the filesystem and bytecode caches
+            times = [wall_time(command, work_dir) * 1000 for _ in range(args.repeat)]
+            results[name] = {
+                "best_ms": round(min(times), 1),
+                "median_ms": round(statistics.median(times), 1),
+                "imports": import_times(command, work_dir, args.top),
+            }
+            print(json.dumps({"scenario": name, **results[name]}, sort_keys=True))
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2, sort_keys=True))
+    if args.baseline:
+        found = regressions(results, json.loads(Path(args.baseline).read_text()), args.threshold, args.min_regression_ms)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class AuditLogWriter:
+    """Long-lived, thread-safe, buffered writer for the JSON-lines audit log.
+
+    Lines are flushed every ``flush_every`` writes or ``flush_interval``
+    seconds (optionally followed by ``fsync``). The file is rotated once it
+    exceeds ``max_bytes`` or is older than ``rotate_interval`` seconds;
+    rotated segments are gzip-compressed in the background and only the
+    newest ``backup_count`` are kept. A value of 0 disables a limit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = 1,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = 10,
+        compress: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-compress")
+        self._pending = 0
+        self._closed = threading.Event()
+        self._open()
+        self._flusher: threading.Thread | None = None
+        if flush_interval > 0 and self.flush_every > 1:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="audit-flush", daemon=True)
+            self._flusher.start()
+
+    @classmethod
+    def from_config(cls, path: str, audit_log: dict | None = None) -> AuditLogWriter:
+        audit_log = audit_log or {}
+        return cls(
+            path,
+            flush_every=audit_log.get("flush_every", 1),
+            flush_interval=audit_log.get("flush_interval_seconds", 1.0),
+            fsync=audit_log.get("fsync", False),
+            max_bytes=audit_log.get("max_bytes", 0),
+            rotate_interval=audit_log.get("rotate_interval_seconds", 0),
+            backup_count=audit_log.get("backup_count", 10),
+            compress=audit_log.get("compress", True),
+        )
+
+    def _open(self) -> None:
+        self._handle = self.path.open("a", encoding="utf-8")
+        self._size = self._handle.tell()
+        self._opened_at = time.time()
+        self._last_flush = time.monotonic()
+
+    def write(self, line: str) -> None:
+        with self._lock:
+            if self._closed.is_set():
+                raise ValueError("audit log writer is closed")
+            size = len(line.encode("utf-8"))
+            if self._rotation_due(size):
+                self._rotate()
+            self._handle.write(line)
+            self._size += size
+            self._pending += 1
+            if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._closed.is_set():
+                self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._flush_locked()
+            self._handle.close()
+            self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._compressor.shutdown(wait=True)
+
+    def _flush_locked(self) -> None:
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._pending and not self._closed.is_set():
+                    self._flush_locked()
+
+    def _rotation_due(self, incoming: int) -> bool:
+        if self._size == 0:
+            return False
+        if self.max_bytes and self._size + incoming > self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self) -> None:
+        self._flush_locked()
+        self._handle.close()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        target = self.path.with_name(f"{self.path.name}.{stamp}")
+        suffix = 1
+        while target.exists() or target.with_name(target.name + ".gz").exists():
+            target = self.path.with_name(f"{self.path.name}.{stamp}.{suffix}")
+            suffix += 1
+        self.path.rename(target)
+        self._open()
+        if self.compress:
+            future = self._compressor.submit(self._compress_segment, target)
+        else:
+            future = self._compressor.submit(self._prune)
+        future.add_done_callback(_log_failure)
+
+    def _compress_segment(self, segment: Path) -> None:
+        compressed = segment.with_name(segment.name + ".gz")
+        with segment.open("rb") as source, gzip.open(compressed, "wb") as target:
+            shutil.copyfileobj(source, target)
+        segment.unlink()
+        self._prune()
+
+    def _prune(self) -> None:
+        if not self.backup_count:
+            return
+        # Segments still queued for compression are not counted, let alone deleted.
+        pattern = f"{self.path.name}.*.gz" if self.compress else f"{self.path.name}.*"
+        segments = sorted(self.path.parent.glob(pattern), key=lambda path: path.stat().st_mtime)
+        for stale in segments[: -self.backup_count]:
+            stale.unlink(missing_ok=True)
+
+
+def _log_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logging.error(f"Audit log segment maintenance failed: {future.exception()}")
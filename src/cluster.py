@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from src.scheduler import shard_subscriptions
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha256(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring; removing a node only moves the keys it owned."""
+
+    def __init__(self, nodes: list[str], replicas: int = 64) -> None:
+        self._points = sorted((_hash(f"{node}#{index}"), node) for node in set(nodes) for index in range(replicas))
+        self._hashes = [point for point, _ in self._points]
+
+    def owner(self, key: str) -> str | None:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+
+class Cluster:
+    """Splits monitors into partitions shared out between worker processes.
+
+    Every worker keeps a lease file in ``lease_dir`` (a directory all
+    workers share) and renews it from a heartbeat thread. Partitions are
+    assigned over a hash ring of the workers with live leases, so when a
+    worker stops renewing, its partitions move to the others once the lease
+    expires. A partition is only collected while holding its lock file, and
+    its snapshot lives in the shared state, so whichever worker picks it up
+    next diffs against the same snapshot: each change is reported once.
+    """
+
+    def __init__(
+        self,
+        lease_dir: str,
+        worker_id: str | None = None,
+        partitions: int = 16,
+        lease_ttl: float = 60.0,
+        replicas: int = 64,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.partitions = max(1, partitions)
+        self.lease_ttl = lease_ttl
+        self.replicas = replicas
+        self.clock = clock
+        self.workers_path = Path(lease_dir) / "workers"
+        self.locks_path = Path(lease_dir) / "locks"
+        self.workers_path.mkdir(parents=True, exist_ok=True)
+        self.locks_path.mkdir(parents=True, exist_ok=True)
+        self._held: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> Cluster:
+        settings = config.get("cluster") or {}
+        return cls(
+            settings.get("lease_dir") or str(Path(config["state_dir"]) / "cluster"),
+            worker_id=settings.get("worker_id"),
+            partitions=int(settings.get("partitions", 16)),
+            lease_ttl=float(settings.get("lease_ttl_seconds", 60)),
+        )
+
+    def _record(self) -> dict[str, Any]:
+        return {"worker": self.worker_id, "expires": self.clock() + self.lease_ttl}
+
+    @staticmethod
+    def _read(path: Path) -> dict[str, Any] | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: Path, record: dict[str, Any]) -> None:
+        tmp_path = path.with_name(f"{path.name}.{self.worker_id}.tmp")
+        tmp_path.write_text(json.dumps(record), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _lock_path(self, name: str) -> Path:
+        return self.locks_path / f"{name}.lock"
+
+    def heartbeat(self) -> None:
+        """Renew this worker's lease and every partition lock it holds."""
+        self._write(self.workers_path / f"{self.worker_id}.json", self._record())
+        with self._lock:
+            held = list(self._held)
+        for name in held:
+            current = self._read(self._lock_path(name))
+            if current is not None and current.get("worker") == self.worker_id:
+                self._write(self._lock_path(name), self._record())
+
+    def start(self, stop: threading.Event) -> None:
+        """Register this worker and keep its lease renewed until ``stop`` is set."""
+        self.heartbeat()
+
+        def renew() -> None:
+            while not stop.wait(self.lease_ttl / 3):
+                try:
+                    self.heartbeat()
+                except OSError as exc:
+                    logging.error(f"Cluster lease renewal failed: {exc}")
+
+        self._thread = threading.Thread(target=renew, name="cluster-heartbeat", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Give up the lease and all locks so other workers take over without waiting for expiry."""
+        with self._lock:
+            held = list(self._held)
+        for name in held:
+            self.release(name)
+        (self.workers_path / f"{self.worker_id}.json").unlink(missing_ok=True)
+
+    def live_workers(self) -> list[str]:
+        now = self.clock()
+        workers = {self.worker_id}
+        for path in self.workers_path.glob("*.json"):
+            record = self._read(path)
+            if record is not None and record.get("expires", 0) > now:
+                workers.add(record["worker"])
+        return sorted(workers)
+
+    def owned_partitions(
+        self,
+        name: str,
+        keys: set[str],
+        namespace: str | None = None,
+    ) -> dict[str, set[str] | None]:
+        """Map this worker's partitions of monitor ``name`` to the keys in each.
+
+        Partitions are named ``<monitor>.part<N>``; a monitor without keys
+        (one that cannot be split) is a single partition named after itself.
+        ``namespace`` (a tenant) keeps equally named partitions apart on the ring.
+        """
+        ring = HashRing(self.live_workers(), self.replicas)
+        prefix = "" if namespace is None else f"{namespace}."
+        if not keys:
+            return {name: None} if ring.owner(f"{prefix}{name}") == self.worker_id else {}
+        owned: dict[str, set[str] | None] = {}
+        for index, group in enumerate(shard_subscriptions(sorted(keys), self.partitions)):
+            partition = f"{name}.part{index}"
+            if group and ring.owner(f"{prefix}{partition}") == self.worker_id:
+                owned[partition] = group
+        return owned
+
+    def acquire(self, name: str) -> bool:
+        """Take the lock for partition ``name``; False while another worker holds it."""
+        path = self._lock_path(name)
+        tmp_path = path.with_name(f"{path.name}.{self.worker_id}.tmp")
+        tmp_path.write_text(json.dumps(self._record()), encoding="utf-8")
+        try:
+            # Linking fails if the lock exists, and never exposes a half-written file.
+            acquired = self._link(tmp_path, path)
+            if not acquired:
+                current = self._read(path)
+                if current is not None and current.get("worker") == self.worker_id:
+                    os.replace(tmp_path, path)
+                    acquired = True
+                elif current is None or current.get("expires", 0) <= self.clock():
+                    # Gone since the link, or expired because its worker died mid-run.
+                    acquired = self._take_over(path, tmp_path, current)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        if acquired:
+            with self._lock:
+                self._held.add(name)
+        return acquired
+
+    @staticmethod
+    def _link(source: Path, target: Path) -> bool:
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            return False
+        return True
+
+    def _take_over(self, path: Path, tmp_path: Path, stale: dict[str, Any] | None) -> bool:
+        """Replace the expired lock ``stale``; only one of several workers doing so at once wins.
+
+        The winner is whoever links the claim file named after ``stale``
+        first, and it only replaces the lock if ``stale`` is still there.
+        """
+        if stale is None:
+            return self._link(tmp_path, path)
+        claim = path.with_name(f"{path.name}.{_hash(json.dumps(stale, sort_keys=True)):x}.claim")
+        if not self._link(tmp_path, claim):
+            # A claim left behind by a worker that died mid-takeover expires like a lock.
+            record = self._read(claim)
+            if record is not None and record.get("expires", 0) <= self.clock():
+                claim.unlink(missing_ok=True)
+            return False
+        try:
+            if self._read(path) != stale:
+                return False
+            os.replace(tmp_path, path)
+            return True
+        finally:
+            claim.unlink(missing_ok=True)
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            self._held.discard(name)
+        path = self._lock_path(name)
+        current = self._read(path)
+        if current is not None and current.get("worker") == self.worker_id:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], max_workers: int = 1) -> list[R]:
+    """Apply ``func`` to every item, in parallel when ``max_workers > 1``.
+
+    Results are returned in input order so callers get the same output as the
+    serial path. The first exception (in input order) is re-raised.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return [future.result() for future in [submit(executor, func, item) for item in items]]
+
+
+def ordered_imap(func: Callable[[T], R], items: Iterable[T], max_workers: int = 1) -> Iterator[R]:
+    """Lazy ``ordered_map``: yields results in input order as they complete.
+
+    At most ``2 * max_workers`` calls are in flight, so results that have not
+    been consumed yet do not pile up in memory.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: deque[Future] = deque()
+        for item in items:
+            pending.append(submit(executor, func, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def submit(executor: ThreadPoolExecutor, func: Callable[..., R], *args) -> Future:
+    """``executor.submit`` in a copy of the caller's context, so tracing spans nest across threads."""
+    return executor.submit(contextvars.copy_context().run, func, *args)
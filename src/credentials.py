@@ -1,9 +1,108 @@
-from azure.identity import DefaultAzureCredential
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from src.tracing import span
 
 
 ARM_SCOPE = "https://management.azure.com/.default"
 GRAPH_SCOPE = "https://graph.microsoft.com/.default"
 
 
-def get_credential() -> DefaultAzureCredential:
+def get_credential(settings: dict | None = None):
+    """Credential for one tenant.
+
+    ``settings`` may name a service principal (``client_id`` with
+    ``client_secret`` or ``certificate_path``) in ``tenant_id``; otherwise
+    ``DefaultAzureCredential`` is used, allowed to request tokens for any tenant.
+    """
+    # azure-identity takes a large share of startup time; replays and tests never need it.
+    from azure.identity import CertificateCredential, ClientSecretCredential, DefaultAzureCredential
+
+    settings = settings or {}
+    tenant_id = settings.get("tenant_id")
+    client_id = settings.get("client_id")
+    if client_id and settings.get("client_secret"):
+        return ClientSecretCredential(tenant_id, client_id, settings["client_secret"])
+    if client_id and settings.get("certificate_path"):
+        return CertificateCredential(tenant_id, client_id, settings["certificate_path"])
+    if tenant_id:
+        return DefaultAzureCredential(additionally_allowed_tenants=["*"])
     return DefaultAzureCredential()
+
+
+class CachedCredential:
+    """Token cache in front of an azure-identity credential.
+
+    Tokens are cached per scope (and tenant, when one is requested) until
+    ``expires_on``. Once a token is within ``refresh_margin`` seconds of expiry
+    a single background refresh is started and callers keep using the cached
+    token; only when it is about to expire (``min_validity``) do callers block,
+    and then only one of them fetches while the others wait for its result.
+    ``tenant_id`` is requested when callers do not ask for a tenant.
+    """
+
+    def __init__(
+        self,
+        credential,
+        refresh_margin: float = 300,
+        min_validity: float = 30,
+        tenant_id: str | None = None,
+    ) -> None:
+        self.credential = credential
+        self.tenant_id = tenant_id
+        self.refresh_margin = refresh_margin
+        self.min_validity = min_validity
+        self._tokens: dict[tuple, Any] = {}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._refreshing: set[tuple] = set()
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, tenant_id: str | None = None, **kwargs: Any):
+        key = (scopes, tenant_id or self.tenant_id)
+        token = self._tokens.get(key)
+        remaining = token.expires_on - time.time() if token else 0
+        if token and remaining > self.refresh_margin:
+            return token
+        if token and remaining > self.min_validity:
+            self._refresh_in_background(key, kwargs)
+            return token
+        with self._lock_for(key):
+            token = self._tokens.get(key)
+            if token and token.expires_on - time.time() > self.min_validity:
+                return token
+            return self._fetch(key, kwargs)
+
+    def _lock_for(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _fetch(self, key: tuple, kwargs: dict[str, Any]):
+        scopes, tenant_id = key
+        if tenant_id:
+            kwargs = {**kwargs, "tenant_id": tenant_id}
+        with span("token", scope=" ".join(scopes), tenant=tenant_id):
+            token = self.credential.get_token(*scopes, **kwargs)
+        self._tokens[key] = token
+        return token
+
+    def _refresh_in_background(self, key: tuple, kwargs: dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                with self._lock_for(key):
+                    self._fetch(key, kwargs)
+            except Exception:  # noqa: BLE001
+                # The cached token is still valid; the next caller retries.
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="token-refresh", daemon=True).start()
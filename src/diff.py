@@ -1,5 +1,6 @@
 import hashlib
 import json
+from dataclasses import dataclass
 from typing import Any
 
 
@@ -19,25 +20,232 @@ def stable_hash(payload: Any) -> str:
     return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
 
 
-def _normalize(value: Any) -> Any:
+@dataclass(frozen=True)
+class Canonical:
+    """Normalized form of a payload with its canonical JSON text and hash.
+
+    ``text`` is exactly what ``stable_hash`` would serialize for
+    ``normalized``, so ``digest == stable_hash(normalized)``.
+    """
+
+    normalized: Any
+    text: str
+    digest: str
+
+
+def _encode_scalar(value: Any) -> tuple[str, str]:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    if "\\u" in encoded:
+        return encoded, json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return encoded, encoded
+
+
+def _canonical(value: Any) -> tuple[Any, str, str]:
+    """Return ``(normalized, sort_key, text)`` for ``value`` in a single pass.
+
+    ``sort_key`` is the ASCII-escaped compact JSON the list sort has always
+    used; ``text`` is the non-escaped JSON that is hashed. Both are built from
+    the children's encodings, so nothing is re-serialized at each level.
+    """
     if isinstance(value, dict):
         normalized = {}
+        key_parts = []
+        text_parts = []
         for key in sorted(value.keys()):
             if key in VOLATILE_FIELDS:
                 continue
-            normalized[key] = _normalize(value[key])
-        return normalized
+            child, child_key, child_text = _canonical(value[key])
+            normalized[key] = child
+            encoded_key, text_key = _encode_scalar(key)
+            key_parts.append(f"{encoded_key}:{child_key}")
+            text_parts.append(f"{text_key}:{child_text}")
+        return normalized, "{" + ",".join(key_parts) + "}", "{" + ",".join(text_parts) + "}"
     if isinstance(value, list):
-        normalized_list = [_normalize(item) for item in value]
-        return sorted(
-            normalized_list,
-            key=lambda item: json.dumps(item, sort_keys=True, separators=(",", ":")),
+        children = sorted((_canonical(item) for item in value), key=lambda child: child[1])
+        return (
+            [child[0] for child in children],
+            "[" + ",".join(child[1] for child in children) + "]",
+            "[" + ",".join(child[2] for child in children) + "]",
         )
-    return value
+    return (value, *_encode_scalar(value))
+
+
+def canonicalize(value: Any) -> Canonical:
+    normalized, _, text = _canonical(value)
+    return Canonical(normalized, text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+def canonicalize_items(
+    items: list[dict[str, Any]],
+    id_key: str = "id",
+    known: dict[str, Canonical] | None = None,
+) -> dict[str, Canonical]:
+    """Canonicalize every item's ``data`` once, keyed by item id.
+
+    Forms in ``known`` are reused for items whose ``data`` is the very object
+    they were built from (see ``PageCache``).
+    """
+    known = known or {}
+    canonical = {}
+    for item in items:
+        form = known.get(item[id_key])
+        if form is None or form.normalized is not item["data"]:
+            form = canonicalize(item["data"])
+        canonical[item[id_key]] = form
+    return canonical
+
+
+def canonical_record(item: dict[str, Any], canonical: Canonical) -> str:
+    """Serialize ``item`` as compact sorted JSON with ``data`` replaced by its canonical text."""
+    parts = []
+    for key in sorted(item.keys()):
+        value = canonical.text if key == "data" else _encode_scalar(item[key])[1]
+        parts.append(f"{_encode_scalar(key)[1]}:{value}")
+    return "{" + ",".join(parts) + "}"
 
 
 def normalize_item(item: dict[str, Any]) -> dict[str, Any]:
-    return _normalize(item)
+    return _canonical(item)[0]
+
+
+def item_hashes(items: list[dict[str, Any]], id_key: str = "id") -> dict[str, str]:
+    """Map each item id to the hash of its normalized ``data``."""
+    return {item_id: canonical.digest for item_id, canonical in canonicalize_items(items, id_key).items()}
+
+
+# Fields that identify an element of a list of objects, tried in order.
+LIST_KEYS = ("category", "categoryGroup", "id", "name", "displayName", "principalId", "roleDefinitionId")
+
+
+def _pointer(path: str, token: Any) -> str:
+    return f"{path}/{str(token).replace('~', '~0').replace('/', '~1')}"
+
+
+def _list_key(old: list[Any], new: list[Any]) -> str | None:
+    """The first ``LIST_KEYS`` field that is present and unique in every element of both lists."""
+    elements = old + new
+    if not elements or not all(isinstance(element, dict) for element in elements):
+        return None
+    for key in LIST_KEYS:
+        if all(key in element for element in elements) and all(
+            len({json.dumps(element[key], sort_keys=True) for element in side}) == len(side) for side in (old, new)
+        ):
+            return key
+    return None
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """RFC 6902 operations that turn normalized ``old`` into ``new``.
+
+    Lists are treated as sets, as normalization sorts them: removals come
+    first (highest index first), then changes to elements kept in place,
+    then additions appended with ``/-``. Applying the patch and normalizing
+    again gives ``new``. Elements of lists of objects are matched by their
+    ``LIST_KEYS`` field, so one changed log category or CA condition is one
+    nested operation. Operations inside such elements carry ``keys``, which
+    maps each keyed element's pointer on the path to its key. Other elements
+    only match when equal.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations: list[dict[str, Any]] = []
+        for key in sorted(old.keys() - new.keys()):
+            operations.append({"op": "remove", "path": _pointer(path, key)})
+        for key in sorted(new.keys()):
+            if key not in old:
+                operations.append({"op": "add", "path": _pointer(path, key), "value": new[key]})
+            elif not _same(old[key], new[key]):
+                operations.extend(json_patch(old[key], new[key], _pointer(path, key)))
+        return operations
+    if isinstance(old, list) and isinstance(new, list):
+        return _list_patch(old, new, path)
+    if _same(old, new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _same(old: Any, new: Any) -> bool:
+    """Equality that tells JSON types apart (``==`` has ``True == 1 == 1.0``)."""
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(_same(value, new[key]) for key, value in old.items())
+    if isinstance(old, list):
+        return len(old) == len(new) and all(_same(left, right) for left, right in zip(old, new))
+    return old == new
+
+
+def _list_patch(old: list[Any], new: list[Any], path: str) -> list[dict[str, Any]]:
+    key = _list_key(old, new)
+    if key is not None:
+        identity = [json.dumps(element[key], sort_keys=True) for element in old]
+        new_by_key = {json.dumps(element[key], sort_keys=True): element for element in new}
+        removed = [index for index, element_key in enumerate(identity) if element_key not in new_by_key]
+    else:
+        identity = [json.dumps(element, sort_keys=True) for element in old]
+        new_by_key = {}
+        remaining: dict[str, int] = {}
+        for element in new:
+            encoded = json.dumps(element, sort_keys=True)
+            remaining[encoded] = remaining.get(encoded, 0) + 1
+            new_by_key.setdefault(encoded, element)
+        removed = []
+        for index, element_key in enumerate(identity):
+            if remaining.get(element_key):
+                remaining[element_key] -= 1
+            else:
+                removed.append(index)
+
+    operations: list[dict[str, Any]] = []
+    for index in reversed(removed):
+        operation = {"op": "remove", "path": _pointer(path, index)}
+        if key is not None:
+            operation["keys"] = {operation["path"]: {key: old[index][key]}}
+        operations.append(operation)
+
+    removed_set = set(removed)
+    kept = [index for index in range(len(old)) if index not in removed_set]
+    if key is not None:
+        for position, index in enumerate(kept):
+            element_path = _pointer(path, position)
+            for operation in json_patch(old[index], new_by_key[identity[index]], element_path):
+                keys = {element_path: {key: old[index][key]}, **operation.get("keys", {})}
+                operations.append({**operation, "keys": keys})
+        kept_keys = {identity[index] for index in kept}
+        added = [element for element in new if json.dumps(element[key], sort_keys=True) not in kept_keys]
+    else:
+        added = []
+        for element_key, count in remaining.items():
+            added.extend([new_by_key[element_key]] * count)
+        added.sort(key=lambda element: json.dumps(element, sort_keys=True))
+
+    for element in added:
+        operation = {"op": "add", "path": f"{path}/-", "value": element}
+        if key is not None:
+            operation["keys"] = {operation["path"]: {key: element[key]}}
+        operations.append(operation)
+    return operations
+
+
+def patch_fields(operations: list[dict[str, Any]]) -> list[str]:
+    """Dotted field names touched by ``json_patch`` operations.
+
+    Keyed list elements are named by their key, as in
+    ``logs[category=AuditEvent].enabled``; other list indices are left out.
+    """
+    fields = set()
+    for operation in operations:
+        keys = operation.get("keys") or {}
+        pointer = ""
+        parts: list[str] = []
+        for token in operation["path"].split("/")[1:]:
+            pointer = f"{pointer}/{token}"
+            if (token == "-" or token.isdigit()) and parts:
+                for name, value in (keys.get(pointer) or {}).items():
+                    parts[-1] += f"[{name}={value}]"
+                continue
+            parts.append(token.replace("~1", "/").replace("~0", "~"))
+        fields.add(".".join(parts))
+    return sorted(fields)
 
 
 def _diff_fields(old: Any, new: Any, prefix: str = "") -> list[str]:
@@ -67,12 +275,25 @@ def diff_snapshots(
     old_items: list[dict[str, Any]],
     new_items: list[dict[str, Any]],
     id_key: str = "id",
+    old_hashes: dict[str, str] | None = None,
+    new_canonical: dict[str, Canonical] | None = None,
 ) -> list[dict[str, Any]]:
+    """Diff two snapshots by id.
+
+    ``new_canonical`` (see ``canonicalize_items``) is computed when not given.
+    Items whose stored hash in ``old_hashes`` matches are skipped without
+    normalizing the old side. The ``old``/``new`` items in the returned
+    changes carry normalized ``data``.
+    """
     old_map = {item[id_key]: item for item in old_items}
     new_map = {item[id_key]: item for item in new_items}
+    old_hashes = old_hashes or {}
+    if new_canonical is None:
+        new_canonical = canonicalize_items(new_items, id_key)
     changes = []
 
     for item_id, new_item in new_map.items():
+        new_form = new_canonical[item_id]
         old_item = old_map.get(item_id)
         if old_item is None:
             changes.append(
@@ -80,40 +301,43 @@ def diff_snapshots(
                     "changeType": "Created",
                     "id": item_id,
                     "old": None,
-                    "new": new_item,
+                    "new": {**new_item, "data": new_form.normalized},
                     "changedFields": [],
                     "baselineHash": None,
-                    "currentHash": stable_hash(normalize_item(new_item["data"])),
+                    "currentHash": new_form.digest,
                 }
             )
             continue
 
-        old_data = normalize_item(old_item["data"])
-        new_data = normalize_item(new_item["data"])
-        if old_data != new_data:
+        if old_hashes.get(item_id) == new_form.digest:
+            continue
+
+        old_form = canonicalize(old_item["data"])
+        if old_form.digest != new_form.digest:
             changes.append(
                 {
                     "changeType": "Updated",
                     "id": item_id,
-                    "old": {**old_item, "data": old_data},
-                    "new": {**new_item, "data": new_data},
-                    "changedFields": _diff_fields(old_data, new_data),
-                    "baselineHash": stable_hash(old_data),
-                    "currentHash": stable_hash(new_data),
+                    "old": {**old_item, "data": old_form.normalized},
+                    "new": {**new_item, "data": new_form.normalized},
+                    "changedFields": _diff_fields(old_form.normalized, new_form.normalized),
+                    "baselineHash": old_form.digest,
+                    "currentHash": new_form.digest,
                 }
             )
 
     for item_id, old_item in old_map.items():
         if item_id in new_map:
             continue
+        old_form = canonicalize(old_item["data"])
         changes.append(
             {
                 "changeType": "Deleted",
                 "id": item_id,
-                "old": old_item,
+                "old": {**old_item, "data": old_form.normalized},
                 "new": None,
                 "changedFields": [],
-                "baselineHash": stable_hash(normalize_item(old_item["data"])),
+                "baselineHash": old_form.digest,
                 "currentHash": None,
             }
         )
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import gzip
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from src.http_client import HttpClient, get_http_client
+from src.metrics import FLUENCY_SEND_SECONDS
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class FluencyForwarder:
+    """Background, batched forwarder for Fluency REST sources.
+
+    Events go into a bounded queue and are posted by a worker thread as one
+    gzip-compressed JSON array per batch, cut by ``batch_size`` or
+    ``flush_interval`` seconds. Failed batches are retried with jittered
+    backoff and then spilled to ``spool_dir``; spooled batches are replayed on
+    start and after the next successful delivery.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        verify_tls: bool = True,
+        timeout: float = 10,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        queue_size: int = 10_000,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        spool_dir: str = ".fluency-spool",
+        http_client: HttpClient | None = None,
+    ) -> None:
+        self.url = url
+        self.api_key = api_key
+        self.verify_tls = verify_tls
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.spool_path = Path(spool_dir)
+        self.spool_path.mkdir(parents=True, exist_ok=True)
+        self.http = http_client or get_http_client()
+        self._queue: queue.Queue[tuple[float, dict[str, Any]]] = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "events_submitted": 0,
+            "events_delivered": 0,
+            "batches_delivered": 0,
+            "events_spooled": 0,
+            "batches_spooled": 0,
+            "batches_replayed": 0,
+            "batches_dropped": 0,
+            "failed_attempts": 0,
+            "last_delivery_latency_seconds": None,
+            "max_delivery_latency_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, fluency: dict, http_client: HttpClient | None = None) -> FluencyForwarder:
+        return cls(
+            url=fluency["url"],
+            api_key=fluency["api_key"],
+            verify_tls=fluency.get("verify_tls", True),
+            timeout=fluency.get("timeout_seconds", 10),
+            batch_size=fluency.get("batch_size", 500),
+            flush_interval=fluency.get("flush_interval_seconds", 5.0),
+            queue_size=fluency.get("queue_size", 10_000),
+            max_retries=fluency.get("max_retries", 5),
+            backoff_seconds=fluency.get("backoff_seconds", 1.0),
+            spool_dir=fluency.get("spool_dir", ".fluency-spool"),
+            http_client=http_client,
+        )
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fluency-forwarder", daemon=True)
+            self._thread.start()
+
+    def submit(self, event: dict[str, Any]) -> None:
+        """Queue an event without blocking; spills to the spool when the queue is full."""
+        with self._lock:
+            self._metrics["events_submitted"] += 1
+        try:
+            self._queue.put_nowait((time.monotonic(), event))
+        except queue.Full:
+            self._spool(self._encode([event]), 1)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Flush queued events, stop the worker and spool whatever could not be sent."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        leftovers = self._drain(self.batch_size)
+        while leftovers:
+            self._spool(self._encode([event for _, event in leftovers]), len(leftovers))
+            leftovers = self._drain(self.batch_size)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["queue_capacity"] = self._queue.maxsize
+        metrics["spool_files"] = sum(1 for _ in self.spool_path.glob("*.json.gz"))
+        return metrics
+
+    def _run(self) -> None:
+        self._replay_spool()
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            body = self._encode([event for _, event in batch])
+            status = self._send(body)
+            if status == "delivered":
+                self._record_delivery(batch)
+                self._replay_spool()
+            elif status == "failed":
+                self._spool(body, len(batch))
+
+    def _next_batch(self) -> list[tuple[float, dict[str, Any]]]:
+        try:
+            first = self._queue.get(timeout=0.2)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.2)))
+            except queue.Empty:
+                continue
+        batch.extend(self._drain(self.batch_size - len(batch)))
+        return batch
+
+    def _drain(self, limit: int) -> list[tuple[float, dict[str, Any]]]:
+        drained = []
+        while len(drained) < limit:
+            try:
+                drained.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return drained
+
+    @staticmethod
+    def _encode(events: list[dict[str, Any]]) -> bytes:
+        return gzip.compress(json.dumps(events).encode("utf-8"))
+
+    def _send(self, body: bytes) -> str:
+        """POST one batch; returns ``"delivered"``, ``"dropped"`` (rejected) or ``"failed"``."""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+        }
+        for attempt in range(self.max_retries):
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = self.http.request(
+                    "POST",
+                    self.url,
+                    data=body,
+                    headers=headers,
+                    timeout=self.timeout,
+                    verify=self.verify_tls,
+                )
+                FLUENCY_SEND_SECONDS.observe(time.perf_counter() - started, outcome=response.status_code)
+                if response.status_code < 400:
+                    return "delivered"
+                if response.status_code not in RETRY_STATUSES:
+                    logging.error(f"Fluency rejected batch with {response.status_code}; dropping it")
+                    with self._lock:
+                        self._metrics["batches_dropped"] += 1
+                    return "dropped"
+                retry_after = response.headers.get("Retry-After")
+            except requests.RequestException as exc:
+                FLUENCY_SEND_SECONDS.observe(time.perf_counter() - started, outcome="error")
+                logging.error(f"Failed to post to Fluency: {exc}")
+            with self._lock:
+                self._metrics["failed_attempts"] += 1
+            if attempt + 1 < self.max_retries and not self._stop.is_set():
+                delay = self.backoff_seconds * 2**attempt
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+                time.sleep(delay + random.uniform(0, delay / 2))
+        return "failed"
+
+    def _record_delivery(self, batch: list[tuple[float, dict[str, Any]]]) -> None:
+        latency = time.monotonic() - min(enqueued for enqueued, _ in batch)
+        with self._lock:
+            self._metrics["events_delivered"] += len(batch)
+            self._metrics["batches_delivered"] += 1
+            self._metrics["last_delivery_latency_seconds"] = round(latency, 3)
+            self._metrics["max_delivery_latency_seconds"] = round(
+                max(self._metrics["max_delivery_latency_seconds"], latency), 3
+            )
+
+    def _spool(self, body: bytes, count: int) -> None:
+        path = self.spool_path / f"{time.time_ns()}-{next(self._sequence):06d}.json.gz"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(body)
+        tmp_path.replace(path)
+        with self._lock:
+            self._metrics["events_spooled"] += count
+            self._metrics["batches_spooled"] += 1
+
+    def _replay_spool(self) -> None:
+        for path in sorted(self.spool_path.glob("*.json.gz")):
+            if self._send(path.read_bytes()) == "failed":
+                return
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._metrics["batches_replayed"] += 1
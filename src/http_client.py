@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpClient:
+    """Process-wide HTTP client with keep-alive connection pools per host."""
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, timeout: float = 30) -> None:
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0,
+        )
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self._lock = threading.Lock()
+        self._requests: dict[str, int] = {}
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+        return self.session.request(method, url, **kwargs)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-host pool statistics: requests, new connections, reuse rate and idle sockets."""
+        pools = self._adapter.poolmanager.pools
+        stats: dict[str, dict[str, Any]] = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            stats[pool.host] = {
+                "requests": pool.num_requests,
+                "connections_opened": pool.num_connections,
+                "reuse_rate": (
+                    round(1 - pool.num_connections / pool.num_requests, 4) if pool.num_requests else 0.0
+                ),
+                "idle_connections": idle,
+                "pool_maxsize": self.pool_maxsize,
+            }
+        with self._lock:
+            for netloc, count in self._requests.items():
+                host = netloc.split(":")[0]
+                stats.setdefault(host, {"requests": count, "connections_opened": 0, "reuse_rate": 0.0})
+        return stats
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_shared_client: HttpClient | None = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client(config: dict | None = None) -> HttpClient:
+    """Return the shared client, creating it from ``config["http"]`` on first use.
+
+    ``http.transport`` is ``live`` (default), ``record`` (also write responses
+    to ``http.cassette_dir``) or ``replay`` (send everything to the replay
+    server at ``http.replay_url``, or to one started here from ``replay``).
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            config = config or {}
+            http = config.get("http", {}) or {}
+            workers = int(config.get("max_workers", 1) or 1)
+            options = {
+                "pool_connections": http.get("pool_connections", 10),
+                "pool_maxsize": http.get("pool_maxsize", max(10, workers)),
+                "timeout": http.get("timeout_seconds", 30),
+            }
+            transport = http.get("transport", "live")
+            if transport == "record":
+                from src.replay import Cassette, RecordingHttpClient
+
+                _shared_client = RecordingHttpClient(Cassette(http.get("cassette_dir") or "cassettes"), **options)
+            elif transport == "replay":
+                from src.replay import ReplayHttpClient, ReplayServer
+
+                server = None if http.get("replay_url") else ReplayServer.from_config(config).start()
+                _shared_client = ReplayHttpClient(http.get("replay_url") or server.url, server=server, **options)
+            else:
+                _shared_client = HttpClient(**options)
+        return _shared_client
@@ -4,22 +4,40 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import requests
+from src.audit_writer import AuditLogWriter
+from src.forwarder import FluencyForwarder
+from src.metrics import AUDIT_WRITE_SECONDS
 
 
 class AuditLogger:
-    def __init__(self, log_file: str, fluency: dict, verbose: bool = False) -> None:
+    def __init__(
+        self,
+        log_file: str,
+        fluency: dict,
+        verbose: bool = False,
+        http_client=None,
+        audit_log: dict | None = None,
+    ) -> None:
         self.log_path = Path(log_file)
-        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.writer = AuditLogWriter.from_config(log_file, audit_log)
         self.fluency = fluency or {}
         self.verbose = verbose
         logging.basicConfig(level=logging.INFO)
+        self.forwarder: FluencyForwarder | None = None
+        if self.fluency.get("enabled"):
+            if not self.fluency.get("url") or not self.fluency.get("api_key"):
+                self.error("Fluency enabled but url/api_key not configured")
+            else:
+                self.forwarder = FluencyForwarder.from_config(self.fluency, http_client=http_client)
+                self.forwarder.start()
 
     def log_event(self, event: dict[str, Any]) -> None:
         event.setdefault("eventTime", datetime.now(timezone.utc).isoformat())
-        self.log_path.open("a", encoding="utf-8").write(json.dumps(event) + "\n")
-        if self.fluency.get("enabled"):
-            self._post_fluency(event)
+        line = json.dumps(event) + "\n"
+        with AUDIT_WRITE_SECONDS.time():
+            self.writer.write(line)
+        if self.forwarder is not None:
+            self.forwarder.submit(event)
 
     def info(self, message: str) -> None:
         if self.verbose:
@@ -28,19 +46,9 @@ class AuditLogger:
     def error(self, message: str) -> None:
         logging.error(message)
 
-    def _post_fluency(self, event: dict[str, Any]) -> None:
-        url = self.fluency.get("url")
-        api_key = self.fluency.get("api_key")
-        if not url or not api_key:
-            self.error("Fluency enabled but url/api_key not configured")
-            return
-        verify_tls = self.fluency.get("verify_tls", True)
-        timeout = self.fluency.get("timeout_seconds", 10)
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        }
-        try:
-            requests.post(url, json=event, headers=headers, timeout=timeout, verify=verify_tls)
-        except requests.RequestException as exc:
-            self.error(f"Failed to post to Fluency: {exc}")
+    def close(self) -> None:
+        self.writer.close()
+        if self.forwarder is not None:
+            self.forwarder.close()
+            if self.verbose:
+                self.info(f"Fluency forwarder: {json.dumps(self.forwarder.metrics(), sort_keys=True)}")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 
 from src.monitors.base import MonitorBase
 
@@ -10,49 +10,58 @@ class ActivityExportMonitor(MonitorBase):
     event_category = "AzureDiagnosticSettings"
     event_provider = "Azure.ResourceManager"
     severity = "high"
+    activity_operations = ("microsoft.insights/diagnosticsettings/",)
 
-    def collect(self) -> list[dict[str, Any]]:
+    def iter_items(self) -> Iterator[dict[str, Any]]:
+        yield from self._iter_collected(self._collect_subscription, self._subscriptions())
+
+    def _collect_subscription(self, subscription_id: str) -> Iterator[dict[str, Any]]:
+        url = (
+            "https://management.azure.com"
+            f"/subscriptions/{subscription_id}/providers/Microsoft.Insights/diagnosticSettings"
+        )
+        return self._arm_paged_items(
+            url,
+            lambda data: self._setting_items(subscription_id, data.get("value", [])),
+            params={"api-version": "2021-05-01-preview"},
+        )
+
+    def _setting_items(self, subscription_id: str, settings: list[dict[str, Any]]) -> list[dict[str, Any]]:
         items: list[dict[str, Any]] = []
         tenant_id = self.config.get("tenant_id")
-        for subscription_id in self.config.get("subscriptions", []):
-            url = (
-                "https://management.azure.com"
-                f"/subscriptions/{subscription_id}/providers/Microsoft.Insights/diagnosticSettings"
+        for setting in settings:
+            props = setting.get("properties", {})
+            logs = [
+                {
+                    "category": log.get("category"),
+                    "enabled": log.get("enabled"),
+                    "retention": log.get("retentionPolicy", {}).get("days"),
+                }
+                for log in props.get("logs", [])
+            ]
+            metrics = [
+                {
+                    "category": metric.get("category"),
+                    "enabled": metric.get("enabled"),
+                    "retention": metric.get("retentionPolicy", {}).get("days"),
+                }
+                for metric in props.get("metrics", [])
+            ]
+            items.append(
+                {
+                    "id": setting.get("id"),
+                    "name": setting.get("name"),
+                    "type": setting.get("type"),
+                    "scope": f"/subscriptions/{subscription_id}",
+                    "subscriptionId": subscription_id,
+                    "tenantId": tenant_id,
+                    "data": {
+                        "workspaceId": props.get("workspaceId"),
+                        "eventHubAuthorizationRuleId": props.get("eventHubAuthorizationRuleId"),
+                        "storageAccountId": props.get("storageAccountId"),
+                        "logs": logs,
+                        "metrics": metrics,
+                    },
+                }
             )
-            data = self._arm_get(url, params={"api-version": "2021-05-01-preview"})
-            for setting in data.get("value", []):
-                props = setting.get("properties", {})
-                logs = [
-                    {
-                        "category": log.get("category"),
-                        "enabled": log.get("enabled"),
-                        "retention": log.get("retentionPolicy", {}).get("days"),
-                    }
-                    for log in props.get("logs", [])
-                ]
-                metrics = [
-                    {
-                        "category": metric.get("category"),
-                        "enabled": metric.get("enabled"),
-                        "retention": metric.get("retentionPolicy", {}).get("days"),
-                    }
-                    for metric in props.get("metrics", [])
-                ]
-                items.append(
-                    {
-                        "id": setting.get("id"),
-                        "name": setting.get("name"),
-                        "type": setting.get("type"),
-                        "scope": f"/subscriptions/{subscription_id}",
-                        "subscriptionId": subscription_id,
-                        "tenantId": tenant_id,
-                        "data": {
-                            "workspaceId": props.get("workspaceId"),
-                            "eventHubAuthorizationRuleId": props.get("eventHubAuthorizationRuleId"),
-                            "storageAccountId": props.get("storageAccountId"),
-                            "logs": logs,
-                            "metrics": metrics,
-                        },
-                    }
-                )
         return items
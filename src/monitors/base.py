@@ -1,13 +1,60 @@
 from __future__ import annotations
 
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
+from urllib.parse import urlsplit
 
 import requests
 
+from src.concurrency import ordered_imap, ordered_map, submit
 from src.credentials import ARM_SCOPE, GRAPH_SCOPE
-from src.diff import normalize_item
+from src.diff import json_patch, patch_fields
+from src.http_client import HttpClient, get_http_client
+from src.metrics import HTTP_BYTES, HTTP_REQUESTS, HTTP_RETRIES, HTTP_THROTTLED
+from src.page_cache import PageCache, request_key
+from src.rate_limiter import RateLimiter, get_rate_limiter, parse_retry_after
+from src.tracing import current_span, span
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+GRAPH_BATCH_LIMIT = 20
+RESOURCE_GRAPH_URL = "https://management.azure.com/providers/Microsoft.ResourceGraph/resources"
+RESOURCE_GRAPH_SUBSCRIPTION_LIMIT = 1000
+GRAPH_RESYNC_ERRORS = {"syncStateNotFound", "syncStateInvalid", "resyncRequired"}
+
+
+def _merge_delta_entry(objects: dict[str, dict[str, Any]], entry: dict[str, Any]) -> None:
+    """Apply one Graph delta entry, including ``<relationship>@delta`` lists."""
+    object_id = entry.get("id")
+    if "@removed" in entry:
+        objects.pop(object_id, None)
+        return
+    current = objects.setdefault(object_id, {"id": object_id})
+    for key, value in entry.items():
+        if key.endswith("@delta"):
+            related = {member["id"]: member for member in current.get(key, [])}
+            for member in value or []:
+                if "@removed" in member:
+                    related.pop(member["id"], None)
+                else:
+                    related[member["id"]] = member
+            current[key] = [related[member_id] for member_id in sorted(related)]
+        elif not key.startswith("@odata."):
+            current[key] = value
+
+
+def _resync_required(exc: requests.HTTPError) -> bool:
+    response = exc.response
+    if response is None:
+        return False
+    if response.status_code == 410:
+        return True
+    try:
+        code = response.json().get("error", {}).get("code")
+    except ValueError:
+        return False
+    return code in GRAPH_RESYNC_ERRORS
 
 
 class MonitorBase:
@@ -16,31 +63,152 @@ class MonitorBase:
     event_provider = "Azure"
     event_source = "azure-security-guard"
     severity = "medium"
+    # Lower-cased Activity Log operation name prefixes that can change this
+    # monitor's items. Monitors without any are always collected in full.
+    activity_operations: tuple[str, ...] = ()
 
-    def __init__(self, config: dict, credential, logger, verbose: bool = False) -> None:
+    def __init__(
+        self,
+        config: dict,
+        credential,
+        logger,
+        verbose: bool = False,
+        http_client: HttpClient | None = None,
+        state=None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
         self.config = config
         self.credential = credential
         self.logger = logger
         self.verbose = verbose
+        self.http = http_client or get_http_client(config)
+        self.rate_limiter = rate_limiter or get_rate_limiter(config)
+        # State backend for data kept between cycles, such as Graph delta links.
+        self.state = state
+        # Set by run_once when ``page_cache.enabled``; see ``_arm_paged_items``.
+        self.page_cache: PageCache | None = None
+        # Lower-cased subscription ids to re-fetch in an incremental cycle;
+        # None collects everything.
+        self.subscription_filter: set[str] | None = None
+        # Lower-cased ``partition_keys`` owned by this instance when a schedule
+        # or cluster splits the monitor into shards; None owns every key.
+        self.shard: set[str] | None = None
+        # Threads for this monitor's scopes; run_once lowers it when several
+        # monitors are collected at once. None uses ``max_workers``.
+        self.max_workers: int | None = None
 
     def collect(self) -> list[dict[str, Any]]:
-        raise NotImplementedError
+        return list(self.iter_items())
+
+    def iter_items(self) -> Iterator[dict[str, Any]]:
+        """Yield items page by page; streaming mode consumes this directly.
+
+        Monitors that only override ``collect`` are streamed from its list.
+        """
+        if type(self).collect is MonitorBase.collect:
+            raise NotImplementedError
+        yield from self.collect()
+
+    def tracked_subscriptions(self) -> set[str]:
+        """Lower-cased ids of the subscriptions this monitor (shard) collects from."""
+        tracked = self._configured_subscriptions()
+        return tracked if self.shard is None else tracked & self.shard
+
+    def partition_keys(self) -> set[str]:
+        """Keys that shards split this monitor by; empty if it cannot be split."""
+        return self._configured_subscriptions()
+
+    def _configured_subscriptions(self) -> set[str]:
+        return {subscription_id.lower() for subscription_id in self.config.get("subscriptions", [])}
+
+    def _subscriptions(self) -> list[str]:
+        return [
+            subscription_id
+            for subscription_id in self.config.get("subscriptions", [])
+            if self._in_filter(subscription_id)
+        ]
+
+    def _in_filter(self, subscription_id: str | None) -> bool:
+        for allowed in (self.shard, self.subscription_filter):
+            if allowed is not None and not (subscription_id and subscription_id.lower() in allowed):
+                return False
+        return True
+
+    def _map(self, func, items) -> list:
+        return ordered_map(func, items, self._max_workers())
+
+    def _imap(self, func, items) -> Iterator:
+        return ordered_imap(func, items, self._max_workers())
+
+    def _iter_collected(self, func: Callable[[Any], Iterable[dict[str, Any]]], items) -> Iterator[dict[str, Any]]:
+        """Yield ``func(item)`` for each item, in order.
+
+        Serially the pages behind each item are streamed straight through;
+        with several workers each item's items are gathered in its worker.
+        """
+        if self._max_workers() <= 1:
+            for item in items:
+                with span("scope", monitor=self.name, scope=self._scope_label(item)) as scope_span:
+                    for collected in func(item):
+                        scope_span.add("items")
+                        yield collected
+            return
+
+        def gather(item) -> list[dict[str, Any]]:
+            with span("scope", monitor=self.name, scope=self._scope_label(item)) as scope_span:
+                collected = list(func(item))
+                scope_span.set(items=len(collected))
+                return collected
+
+        for batch in self._imap(gather, items):
+            yield from batch
+
+    @staticmethod
+    def _scope_label(item) -> str:
+        return item if isinstance(item, str) else " ".join(str(part) for part in item)
+
+    def _max_workers(self) -> int:
+        if self.max_workers is not None:
+            return self.max_workers
+        return int(self.config.get("max_workers", 1) or 1)
+
+    def _backend_for(self, resource: str) -> str:
+        """Return ``"arm"`` or ``"resource_graph"`` for one of this monitor's resource lists.
+
+        ``collection_backends`` maps a monitor name either to a backend or to a
+        ``{resource: backend}`` dict; anything unset uses ARM.
+        """
+        backend = (self.config.get("collection_backends") or {}).get(self.name, "arm")
+        if isinstance(backend, dict):
+            backend = backend.get(resource, "arm")
+        return backend
 
     def build_event(self, change: dict[str, Any]) -> dict[str, Any]:
         new_item = change.get("new")
         old_item = change.get("old")
         item = new_item or old_item
+        # diff_snapshots already hands over normalized data.
         raw_old = None
         raw_new = None
         if change["changeType"] == "Updated":
-            raw_old = normalize_item(old_item["data"]) if old_item else None
-            raw_new = normalize_item(new_item["data"]) if new_item else None
+            raw_old = old_item["data"] if old_item else None
+            raw_new = new_item["data"] if new_item else None
         elif change["changeType"] == "Deleted":
-            raw_old = normalize_item(old_item["data"]) if old_item else None
+            raw_old = old_item["data"] if old_item else None
         elif change["changeType"] == "Created":
-            raw_new = normalize_item(new_item["data"]) if new_item else None
+            raw_new = new_item["data"] if new_item else None
 
-        return {
+        events = self.config.get("events") or {}
+        patch = None
+        changed_fields = change.get("changedFields", [])
+        if events.get("format") == "patch" and change["changeType"] == "Updated":
+            # Element-level patch instead of both payloads; see ``json_patch``.
+            patch = json_patch(raw_old, raw_new)
+            changed_fields = patch_fields(patch)
+            if not events.get("include_raw"):
+                raw_old = raw_new = None
+
+        event = {
             "eventTime": datetime.now(timezone.utc).isoformat(),
             "eventSource": self.event_source,
             "eventCategory": self.event_category,
@@ -54,7 +222,7 @@ class MonitorBase:
             "resourceName": item.get("name"),
             "changeType": change["changeType"],
             "severity": self.severity,
-            "changedFields": change.get("changedFields", []),
+            "changedFields": changed_fields,
             "baselineHash": change.get("baselineHash"),
             "currentHash": change.get("currentHash"),
             "raw": {
@@ -62,6 +230,9 @@ class MonitorBase:
                 "new": raw_new,
             },
         }
+        if patch is not None:
+            event["patch"] = patch
+        return event
 
     def _request(
         self,
@@ -73,6 +244,19 @@ class MonitorBase:
         json_body: dict[str, Any] | None = None,
         max_retries: int = 5,
     ) -> dict[str, Any]:
+        response = self._send(method, url, scope, headers, params, json_body, max_retries)
+        return response.json() if response.content else {}
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        scope: str = ARM_SCOPE,
+        headers: dict[str, str] | None = None,
+        params: dict[str, Any] | None = None,
+        json_body: dict[str, Any] | None = None,
+        max_retries: int = 5,
+    ) -> requests.Response:
         token = self.credential.get_token(scope).token
         request_headers = {
             "Authorization": f"Bearer {token}",
@@ -81,25 +265,51 @@ class MonitorBase:
         if headers:
             request_headers.update(headers)
 
-        for attempt in range(max_retries):
-            response = requests.request(
-                method,
-                url,
-                headers=request_headers,
-                params=params,
-                json=json_body,
-                timeout=30,
-            )
-            if response.status_code < 400:
-                return response.json() if response.content else {}
-            if response.status_code in {429, 500, 502, 503, 504}:
-                backoff = 2**attempt
+        # Tenant-wide quotas are kept apart when one process serves several tenants.
+        tenant = self.config.get("tenant_id")
+        host = urlsplit(url).netloc.lower()
+        response = None
+        with span("request", **{"http.request.method": method, "server.address": host}) as request_span:
+            # Set after the span opens so profiles group requests by host, not by URL.
+            request_span.set(**{"url.path": urlsplit(url).path})
+            for attempt in range(max(1, max_retries)):
+                last_attempt = attempt + 1 >= max_retries
+                request_span.set(attempts=attempt + 1)
+                self.rate_limiter.acquire(url, tenant)
+                try:
+                    response = self.http.request(
+                        method,
+                        url,
+                        headers=request_headers,
+                        params=params,
+                        json=json_body,
+                    )
+                except requests.RequestException:
+                    HTTP_REQUESTS.inc(host=host, status="error")
+                    self.rate_limiter.record_error(url, tenant)
+                    if last_attempt:
+                        raise
+                    HTTP_RETRIES.inc(host=host)
+                    time.sleep(self.rate_limiter.backoff(attempt))
+                    continue
+                HTTP_REQUESTS.inc(host=host, status=response.status_code)
+                HTTP_BYTES.inc(len(response.content), host=host)
+                request_span.set(**{"http.response.status_code": response.status_code, "bytes": len(response.content)})
+                if response.status_code == 429:
+                    HTTP_THROTTLED.inc(host=host)
+                self.rate_limiter.observe(url, response, tenant)
+                if response.status_code < 400:
+                    return response
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    break
+                backoff = self.rate_limiter.backoff(attempt, self.rate_limiter.retry_after(response))
                 if self.verbose:
-                    self.logger.info(f"Retrying {url} after {backoff}s due to {response.status_code}")
+                    self.logger.info(f"Retrying {url} after {backoff:.1f}s due to {response.status_code}")
+                HTTP_RETRIES.inc(host=host)
                 time.sleep(backoff)
-                continue
+            # Raised for the final response itself; nothing is slept after the last attempt.
             response.raise_for_status()
-        response.raise_for_status()
+        return response
 
     def _arm_get(self, url: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
         if self.verbose:
@@ -111,6 +321,80 @@ class MonitorBase:
             self.logger.info(f"Graph GET {url}")
         return self._request("GET", url, scope=GRAPH_SCOPE, params=params)
 
+    def _arm_paged(self, url: str, params: dict[str, Any] | None = None) -> Iterator[dict[str, Any]]:
+        """Yield every page body of an ARM list, following ``nextLink``."""
+        yield from self._follow_pages(
+            lambda page_url, page_params: self._arm_get(page_url, params=page_params),
+            lambda page_url, page_params, data: (data, data.get("nextLink")),
+            url,
+            params,
+        )
+
+    def _arm_paged_items(
+        self,
+        url: str,
+        build: Callable[[dict[str, Any]], list[dict[str, Any]]],
+        params: dict[str, Any] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield the items ``build`` makes from every page of an ARM list.
+
+        Items are streamed page by page; with a page cache, the raw body of
+        each page is fingerprinted before parsing, and unchanged pages return
+        last cycle's items without being parsed or normalized (see ``PageCache.page``).
+        """
+        if self.page_cache is None:
+            for data in self._arm_paged(url, params):
+                yield from build(data)
+            return
+
+        def fetch(page_url: str, page_params: dict[str, Any] | None) -> requests.Response:
+            if self.verbose:
+                self.logger.info(f"ARM GET {page_url}")
+            return self._send("GET", page_url, scope=ARM_SCOPE, params=page_params)
+
+        def parse(page_url: str, page_params: dict[str, Any] | None, response: requests.Response):
+            def build_page() -> tuple[list[dict[str, Any]], str | None]:
+                data = response.json() if response.content else {}
+                return build(data), data.get("nextLink")
+
+            return self.page_cache.page(request_key(page_url, page_params), response.content, build_page)
+
+        for items in self._follow_pages(fetch, parse, url, params):
+            yield from items
+
+    def _follow_pages(
+        self,
+        fetch: Callable[[str, dict[str, Any] | None], Any],
+        parse: Callable[[str, dict[str, Any] | None, Any], tuple[Any, str | None]],
+        url: str,
+        params: dict[str, Any] | None = None,
+    ) -> Iterator[Any]:
+        """Fetch and parse pages until there is no next link.
+
+        With ``arm_prefetch`` the next page is requested in the background
+        while the caller processes the current one. Next links carry their
+        own query string, so ``params`` only apply to the first page.
+        """
+        executor = None
+        if self.config.get("arm_prefetch"):
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-prefetch")
+        try:
+            prefetched: Future | None = None
+            page_url: str | None = url
+            page_params = params
+            while page_url:
+                raw = prefetched.result() if prefetched is not None else fetch(page_url, page_params)
+                result, next_link = parse(page_url, page_params, raw)
+                current_span().add("pages")
+                prefetched = None
+                if next_link and executor is not None:
+                    prefetched = submit(executor, fetch, next_link, None)
+                yield result
+                page_url, page_params = next_link, None
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
     def _graph_paged(self, url: str) -> list[dict[str, Any]]:
         items: list[dict[str, Any]] = []
         next_url = url
@@ -119,3 +403,172 @@ class MonitorBase:
             items.extend(data.get("value", []))
             next_url = data.get("@odata.nextLink")
         return items
+
+    def _graph_delta(self, key: str, url: str) -> list[dict[str, Any]]:
+        """Return a Graph collection kept current through its ``/delta`` function.
+
+        The merged objects and the ``@odata.deltaLink`` are stored in state
+        metadata under ``key``, so later cycles only download what changed.
+        An expired or invalid delta token triggers a full resync from ``url``.
+        Objects are returned sorted by id.
+        """
+        meta_key = f"graph_delta.{self.name}.{key}"
+        stored = (self.state.load_meta(meta_key) if self.state is not None else None) or {}
+        objects = None
+        delta_link = stored.get("deltaLink")
+        if delta_link:
+            try:
+                objects, delta_link = self._graph_delta_walk(delta_link, stored.get("objects", {}))
+            except requests.HTTPError as exc:
+                if not _resync_required(exc):
+                    raise
+                self.logger.info(f"Graph delta token for {key} expired; running a full resync")
+        if objects is None:
+            objects, delta_link = self._graph_delta_walk(url, {})
+        if self.state is not None:
+            self.state.save_meta(meta_key, {"deltaLink": delta_link, "objects": objects})
+        return [objects[object_id] for object_id in sorted(objects)]
+
+    def _graph_delta_walk(
+        self,
+        url: str,
+        objects: dict[str, dict[str, Any]],
+    ) -> tuple[dict[str, dict[str, Any]], str | None]:
+        next_url = url
+        while True:
+            data = self._graph_get(next_url)
+            for entry in data.get("value", []):
+                _merge_delta_entry(objects, entry)
+            next_url = data.get("@odata.nextLink")
+            if not next_url:
+                return objects, data.get("@odata.deltaLink")
+
+    def _resource_graph_query(self, query: str, subscriptions: list[str]) -> list[dict[str, Any]]:
+        """Run an Azure Resource Graph query, following ``$skipToken`` pages."""
+        rows: list[dict[str, Any]] = []
+        for start in range(0, len(subscriptions), RESOURCE_GRAPH_SUBSCRIPTION_LIMIT):
+            body = {
+                "subscriptions": subscriptions[start : start + RESOURCE_GRAPH_SUBSCRIPTION_LIMIT],
+                "query": query,
+                "options": {"resultFormat": "objectArray", "$top": 1000},
+            }
+            while True:
+                if self.verbose:
+                    self.logger.info(f"Resource Graph query {query}")
+                data = self._request(
+                    "POST",
+                    RESOURCE_GRAPH_URL,
+                    scope=ARM_SCOPE,
+                    params={"api-version": "2022-10-01"},
+                    json_body=body,
+                )
+                rows.extend(data.get("data", []))
+                skip_token = data.get("$skipToken")
+                if not skip_token:
+                    break
+                body["options"] = {**body["options"], "$skipToken": skip_token}
+        return rows
+
+    def _resource_graph_by_subscription(
+        self,
+        query: str,
+        subscriptions: list[str],
+        resource_type: str,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Group Resource Graph rows by lower-cased subscription id.
+
+        Rows are shaped like ARM list entries; ``type`` is reset to the ARM
+        casing since Resource Graph reports it lower-cased.
+        """
+        grouped: dict[str, list[dict[str, Any]]] = {}
+        for row in self._resource_graph_query(f"{query} | order by id asc", list(subscriptions)):
+            row["type"] = resource_type
+            grouped.setdefault((row.get("subscriptionId") or "").lower(), []).append(row)
+        return grouped
+
+    def _graph_batch(self, urls: list[str], max_retries: int = 5) -> list[dict[str, Any]]:
+        """GET several Graph URLs through ``$batch``, 20 per round trip.
+
+        Bodies are returned in the order of ``urls``. Sub-requests that are
+        throttled or fail transiently are resent in a follow-up batch after the
+        largest ``Retry-After`` they reported.
+        """
+        results: dict[int, dict[str, Any]] = {}
+        for start in range(0, len(urls), GRAPH_BATCH_LIMIT):
+            chunk = dict(enumerate(urls[start : start + GRAPH_BATCH_LIMIT], start=start))
+            pending = set(chunk)
+            for attempt in range(max_retries):
+                batch_url, sub_requests = self._graph_batch_body({index: chunk[index] for index in pending})
+                if self.verbose:
+                    self.logger.info(f"Graph POST {batch_url} ({len(sub_requests)} requests)")
+                data = self._request(
+                    "POST",
+                    batch_url,
+                    scope=GRAPH_SCOPE,
+                    json_body={"requests": sub_requests},
+                )
+                retry_after = 0.0
+                for response in data.get("responses", []):
+                    index = int(response["id"])
+                    status = response.get("status", 500)
+                    if status < 400:
+                        results[index] = response.get("body") or {}
+                        pending.discard(index)
+                    elif status in RETRY_STATUSES:
+                        # Throttled sub-requests never show up as 429 responses of their own.
+                        if status == 429:
+                            HTTP_THROTTLED.inc(host=urlsplit(batch_url).netloc.lower())
+                        headers = {key.lower(): value for key, value in (response.get("headers") or {}).items()}
+                        delay = self.rate_limiter.backoff(attempt, parse_retry_after(headers.get("retry-after")))
+                        retry_after = max(retry_after, delay)
+                    else:
+                        error = (response.get("body") or {}).get("error", {})
+                        raise requests.HTTPError(
+                            f"Graph batch request {chunk[index]} failed with {status}: {error.get('message')}"
+                        )
+                if not pending:
+                    break
+                if self.verbose:
+                    self.logger.info(f"Retrying {len(pending)} Graph batch requests after {retry_after:.1f}s")
+                HTTP_RETRIES.inc(len(pending), host=urlsplit(batch_url).netloc.lower())
+                time.sleep(retry_after)
+            if pending:
+                raise requests.HTTPError(f"Graph batch requests still throttled after {max_retries} attempts")
+        return [results[index] for index in range(len(urls))]
+
+    def _graph_batch_paged(self, urls: list[str]) -> list[dict[str, Any]]:
+        """Like ``_graph_batch`` but follows ``@odata.nextLink`` for collections.
+
+        First pages of every URL share one round trip, and further pages of all
+        collections are fetched together in the following rounds.
+        """
+        bodies = self._graph_batch(urls)
+        next_links = {
+            index: body["@odata.nextLink"] for index, body in enumerate(bodies) if body.get("@odata.nextLink")
+        }
+        while next_links:
+            indexes = list(next_links)
+            pages = self._graph_batch([next_links[index] for index in indexes])
+            next_links = {}
+            for index, page in zip(indexes, pages):
+                bodies[index].setdefault("value", []).extend(page.get("value", []))
+                if page.get("@odata.nextLink"):
+                    next_links[index] = page["@odata.nextLink"]
+        for body in bodies:
+            body.pop("@odata.nextLink", None)
+        return bodies
+
+    @staticmethod
+    def _graph_batch_body(urls: dict[int, str]) -> tuple[str, list[dict[str, Any]]]:
+        batch_url = None
+        sub_requests = []
+        for index, url in urls.items():
+            parts = urlsplit(url)
+            version, _, path = parts.path.lstrip("/").partition("/")
+            endpoint = f"{parts.scheme}://{parts.netloc}/{version}/$batch"
+            if batch_url is not None and endpoint != batch_url:
+                raise ValueError(f"Cannot batch Graph requests across API versions: {url}")
+            batch_url = endpoint
+            relative = f"/{path}" + (f"?{parts.query}" if parts.query else "")
+            sub_requests.append({"id": str(index), "method": "GET", "url": relative})
+        return batch_url, sub_requests
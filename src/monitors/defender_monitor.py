@@ -1,62 +1,116 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 
 from src.monitors.base import MonitorBase
 
+RESOURCE_GRAPH_QUERIES = {
+    "pricings": (
+        "securityresources | where type =~ 'microsoft.security/pricings'",
+        "Microsoft.Security/pricings",
+    ),
+    "autoProvisioningSettings": (
+        "securityresources | where type =~ 'microsoft.security/autoprovisioningsettings'",
+        "Microsoft.Security/autoProvisioningSettings",
+    ),
+}
+
 
 class DefenderMonitor(MonitorBase):
     name = "defender_monitor"
     event_category = "DefenderForCloud"
     event_provider = "Azure.Security"
     severity = "high"
+    activity_operations = (
+        "microsoft.security/pricings/",
+        "microsoft.security/autoprovisioningsettings/",
+    )
 
-    def collect(self) -> list[dict[str, Any]]:
-        items: list[dict[str, Any]] = []
-        tenant_id = self.config.get("tenant_id")
-        for subscription_id in self.config.get("subscriptions", []):
+    def iter_items(self) -> Iterator[dict[str, Any]]:
+        subscriptions = self._subscriptions()
+        prefetched = {
+            resource: self._resource_graph_by_subscription(query, subscriptions, resource_type)
+            for resource, (query, resource_type) in RESOURCE_GRAPH_QUERIES.items()
+            if self._backend_for(resource) == "resource_graph"
+        }
+        yield from self._iter_collected(lambda sub: self._collect_subscription(sub, prefetched), subscriptions)
+
+    def _collect_subscription(
+        self,
+        subscription_id: str,
+        prefetched: dict[str, dict[str, list[dict[str, Any]]]] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        prefetched = prefetched or {}
+        if "pricings" in prefetched:
+            yield from self._pricing_items(subscription_id, prefetched["pricings"].get(subscription_id.lower(), []))
+        else:
             pricings_url = (
                 "https://management.azure.com"
                 f"/subscriptions/{subscription_id}/providers/Microsoft.Security/pricings"
             )
-            pricing_data = self._arm_get(pricings_url, params={"api-version": "2023-01-01"})
-            for pricing in pricing_data.get("value", []):
-                props = pricing.get("properties", {})
-                items.append(
-                    {
-                        "id": pricing.get("id"),
-                        "name": pricing.get("name"),
-                        "type": pricing.get("type"),
-                        "scope": f"/subscriptions/{subscription_id}",
-                        "subscriptionId": subscription_id,
-                        "tenantId": tenant_id,
-                        "data": {
-                            "pricingTier": props.get("pricingTier"),
-                            "subPlan": props.get("subPlan"),
-                            "freeTrialRemainingTime": props.get("freeTrialRemainingTime"),
-                            "extensions": props.get("extensions"),
-                        },
-                    }
-                )
+            yield from self._arm_paged_items(
+                pricings_url,
+                lambda data: self._pricing_items(subscription_id, data.get("value", [])),
+                params={"api-version": "2023-01-01"},
+            )
 
+        if "autoProvisioningSettings" in prefetched:
+            auto_settings = prefetched["autoProvisioningSettings"].get(subscription_id.lower(), [])
+            yield from self._auto_provisioning_items(subscription_id, auto_settings)
+        else:
             auto_url = (
                 "https://management.azure.com"
                 f"/subscriptions/{subscription_id}/providers/Microsoft.Security/autoProvisioningSettings"
             )
-            auto_data = self._arm_get(auto_url, params={"api-version": "2017-08-01-preview"})
-            for setting in auto_data.get("value", []):
-                props = setting.get("properties", {})
-                items.append(
-                    {
-                        "id": setting.get("id"),
-                        "name": setting.get("name"),
-                        "type": setting.get("type"),
-                        "scope": f"/subscriptions/{subscription_id}",
-                        "subscriptionId": subscription_id,
-                        "tenantId": tenant_id,
-                        "data": {
-                            "autoProvision": props.get("autoProvision"),
-                        },
-                    }
-                )
+            yield from self._arm_paged_items(
+                auto_url,
+                lambda data: self._auto_provisioning_items(subscription_id, data.get("value", [])),
+                params={"api-version": "2017-08-01-preview"},
+            )
+
+    def _pricing_items(self, subscription_id: str, pricings: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        tenant_id = self.config.get("tenant_id")
+        for pricing in pricings:
+            props = pricing.get("properties", {})
+            items.append(
+                {
+                    "id": pricing.get("id"),
+                    "name": pricing.get("name"),
+                    "type": pricing.get("type"),
+                    "scope": f"/subscriptions/{subscription_id}",
+                    "subscriptionId": subscription_id,
+                    "tenantId": tenant_id,
+                    "data": {
+                        "pricingTier": props.get("pricingTier"),
+                        "subPlan": props.get("subPlan"),
+                        "freeTrialRemainingTime": props.get("freeTrialRemainingTime"),
+                        "extensions": props.get("extensions"),
+                    },
+                }
+            )
+        return items
+
+    def _auto_provisioning_items(
+        self,
+        subscription_id: str,
+        settings: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        tenant_id = self.config.get("tenant_id")
+        for setting in settings:
+            props = setting.get("properties", {})
+            items.append(
+                {
+                    "id": setting.get("id"),
+                    "name": setting.get("name"),
+                    "type": setting.get("type"),
+                    "scope": f"/subscriptions/{subscription_id}",
+                    "subscriptionId": subscription_id,
+                    "tenantId": tenant_id,
+                    "data": {
+                        "autoProvision": props.get("autoProvision"),
+                    },
+                }
+            )
         return items
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 
 from src.monitors.base import MonitorBase
 
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+# Opt-in collections (``entraid_collections``) synced through Graph delta queries.
+DELTA_COLLECTIONS = {
+    "servicePrincipals": (
+        f"{GRAPH_URL}/servicePrincipals/delta?$select=id,appId,displayName,accountEnabled,"
+        "servicePrincipalType,appRoleAssignmentRequired,keyCredentials,passwordCredentials"
+    ),
+    "applications": (
+        f"{GRAPH_URL}/applications/delta?$select=id,appId,displayName,signInAudience,"
+        "requiredResourceAccess,keyCredentials,passwordCredentials"
+    ),
+    "directoryRoles": f"{GRAPH_URL}/directoryRoles/delta?$select=id,displayName,roleTemplateId,members",
+    "groupMemberships": f"{GRAPH_URL}/groups/delta?$select=id,displayName,members",
+}
+
 
 class EntraIdMonitor(MonitorBase):
     name = "entraid_monitor"
@@ -11,65 +26,117 @@ class EntraIdMonitor(MonitorBase):
     event_provider = "MicrosoftGraph"
     severity = "high"
 
-    def collect(self) -> list[dict[str, Any]]:
-        items: list[dict[str, Any]] = []
+    def partition_keys(self) -> set[str]:
+        # Tenant-wide: collected by a single shard.
+        return set()
+
+    def iter_items(self) -> Iterator[dict[str, Any]]:
         tenant_id = self.config.get("tenant_id")
 
-        policies = self._graph_paged("https://graph.microsoft.com/v1.0/identity/conditionalAccess/policies")
-        for policy in policies:
-            items.append(
-                {
-                    "id": f"conditionalAccessPolicy:{policy.get('id')}",
-                    "name": policy.get("displayName"),
-                    "type": "conditionalAccessPolicy",
-                    "scope": "tenant",
-                    "subscriptionId": None,
-                    "tenantId": tenant_id,
-                    "data": {
-                        "state": policy.get("state"),
-                        "conditions": policy.get("conditions"),
-                        "grantControls": policy.get("grantControls"),
-                        "sessionControls": policy.get("sessionControls"),
-                    },
-                }
-            )
+        policies_page, locations_page, auth_policy = self._graph_batch_paged(
+            [
+                f"{GRAPH_URL}/identity/conditionalAccess/policies",
+                f"{GRAPH_URL}/identity/conditionalAccess/namedLocations",
+                f"{GRAPH_URL}/policies/authenticationMethodsPolicy",
+            ]
+        )
 
-        locations = self._graph_paged("https://graph.microsoft.com/v1.0/identity/conditionalAccess/namedLocations")
-        for location in locations:
-            items.append(
-                {
-                    "id": f"namedLocation:{location.get('id')}",
-                    "name": location.get("displayName"),
-                    "type": "namedLocation",
-                    "scope": "tenant",
-                    "subscriptionId": None,
-                    "tenantId": tenant_id,
-                    "data": {
-                        "isTrusted": location.get("isTrusted"),
-                        "ipRanges": location.get("ipRanges"),
-                        "countriesAndRegions": location.get("countriesAndRegions"),
-                        "includeUnknownCountriesAndRegions": location.get(
-                            "includeUnknownCountriesAndRegions"
-                        ),
-                    },
-                }
-            )
+        for policy in policies_page.get("value", []):
+            yield {
+                "id": f"conditionalAccessPolicy:{policy.get('id')}",
+                "name": policy.get("displayName"),
+                "type": "conditionalAccessPolicy",
+                "scope": "tenant",
+                "subscriptionId": None,
+                "tenantId": tenant_id,
+                "data": {
+                    "state": policy.get("state"),
+                    "conditions": policy.get("conditions"),
+                    "grantControls": policy.get("grantControls"),
+                    "sessionControls": policy.get("sessionControls"),
+                },
+            }
 
-        auth_policy = self._graph_get("https://graph.microsoft.com/v1.0/policies/authenticationMethodsPolicy")
-        items.append(
-            {
-                "id": "authenticationMethodsPolicy",
-                "name": auth_policy.get("id", "authenticationMethodsPolicy"),
-                "type": "authenticationMethodsPolicy",
+        for location in locations_page.get("value", []):
+            yield {
+                "id": f"namedLocation:{location.get('id')}",
+                "name": location.get("displayName"),
+                "type": "namedLocation",
                 "scope": "tenant",
                 "subscriptionId": None,
                 "tenantId": tenant_id,
                 "data": {
-                    "policyVersion": auth_policy.get("policyVersion"),
-                    "authenticationMethodsPolicy": auth_policy.get("authenticationMethodConfigurations"),
-                    "policyState": auth_policy.get("state"),
+                    "isTrusted": location.get("isTrusted"),
+                    "ipRanges": location.get("ipRanges"),
+                    "countriesAndRegions": location.get("countriesAndRegions"),
+                    "includeUnknownCountriesAndRegions": location.get(
+                        "includeUnknownCountriesAndRegions"
+                    ),
                 },
             }
-        )
 
-        return items
+        yield {
+            "id": "authenticationMethodsPolicy",
+            "name": auth_policy.get("id", "authenticationMethodsPolicy"),
+            "type": "authenticationMethodsPolicy",
+            "scope": "tenant",
+            "subscriptionId": None,
+            "tenantId": tenant_id,
+            "data": {
+                "policyVersion": auth_policy.get("policyVersion"),
+                "authenticationMethodsPolicy": auth_policy.get("authenticationMethodConfigurations"),
+                "policyState": auth_policy.get("state"),
+            },
+        }
+
+        for collection in self.config.get("entraid_collections", []):
+            if collection not in DELTA_COLLECTIONS:
+                self.logger.error(f"Unknown Entra ID collection: {collection}")
+                continue
+            for entry in self._graph_delta(collection, DELTA_COLLECTIONS[collection]):
+                yield self._delta_item(collection, entry, tenant_id)
+
+    @staticmethod
+    def _delta_item(collection: str, entry: dict[str, Any], tenant_id: str | None) -> dict[str, Any]:
+        if collection in {"servicePrincipals", "applications"}:
+            data = {
+                key: entry.get(key)
+                for key in (
+                    "appId",
+                    "accountEnabled",
+                    "servicePrincipalType",
+                    "appRoleAssignmentRequired",
+                    "signInAudience",
+                    "requiredResourceAccess",
+                )
+                if key in entry
+            }
+            # Credential metadata only; Graph never returns secret values here.
+            for key in ("keyCredentials", "passwordCredentials"):
+                data[key] = [
+                    {
+                        "keyId": credential.get("keyId"),
+                        "displayName": credential.get("displayName"),
+                        "endDateTime": credential.get("endDateTime"),
+                    }
+                    for credential in entry.get(key) or []
+                ]
+        else:
+            data = {
+                "members": [
+                    {"id": member.get("id"), "type": member.get("@odata.type")}
+                    for member in entry.get("members@delta", [])
+                ],
+            }
+            if "roleTemplateId" in entry:
+                data["roleTemplateId"] = entry["roleTemplateId"]
+        item_type = collection[:-1] if collection != "groupMemberships" else "groupMembership"
+        return {
+            "id": f"{item_type}:{entry.get('id')}",
+            "name": entry.get("displayName"),
+            "type": item_type,
+            "scope": "tenant",
+            "subscriptionId": None,
+            "tenantId": tenant_id,
+            "data": data,
+        }
@@ -1,80 +1,181 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 
 from src.monitors.base import MonitorBase
 
+ROLE_ASSIGNMENTS_QUERY = "authorizationresources | where type =~ 'microsoft.authorization/roleassignments'"
+ROLE_DEFINITIONS_QUERY = "authorizationresources | where type =~ 'microsoft.authorization/roledefinitions'"
+SUBSCRIPTION_CONTAINERS_QUERY = (
+    "resourcecontainers | where type =~ 'microsoft.resources/subscriptions' | project id, subscriptionId, properties"
+)
+
 
 class RBACMonitor(MonitorBase):
     name = "rbac_monitor"
     event_category = "AzureRBAC"
     event_provider = "Azure.Authorization"
     severity = "high"
+    activity_operations = (
+        "microsoft.authorization/roleassignments/",
+        "microsoft.authorization/roledefinitions/",
+    )
 
-    def collect(self) -> list[dict[str, Any]]:
-        items: list[dict[str, Any]] = []
-        tenant_id = self.config.get("tenant_id")
+    def iter_items(self) -> Iterator[dict[str, Any]]:
         scopes = list(self.config.get("rbac_scopes", []))
         scopes.extend(self.config.get("sentinel_workspaces", []))
         for subscription_id in self.config.get("subscriptions", []):
             scopes.append(f"/subscriptions/{subscription_id}")
 
-        for scope in sorted(set(scopes)):
-            if not scope:
-                continue
-            role_assignments_url = (
-                f"https://management.azure.com{scope}"
-                "/providers/Microsoft.Authorization/roleAssignments"
+        # Incremental cycles skip scopes outside the re-fetched subscriptions,
+        # including management groups, which only full sweeps collect.
+        scopes = [scope for scope in sorted(set(scopes)) if scope and self._in_filter(self._scope_key(scope))]
+        subscriptions = self._subscriptions()
+        if self._backend_for("roleAssignments") == "resource_graph":
+            # Resource Graph answers every subscription scope in one paged query;
+            # resource-level scopes and workspaces still go through ARM. Its rows
+            # stop at the subscription, so the assignments ARM would list as
+            # inherited are read once per parent management group.
+            assignments = self._resource_graph_by_subscription(
+                ROLE_ASSIGNMENTS_QUERY, subscriptions, "Microsoft.Authorization/roleAssignments"
             )
-            data = self._arm_get(role_assignments_url, params={"api-version": "2022-04-01"})
-            for assignment in data.get("value", []):
-                props = assignment.get("properties", {})
-                items.append(
-                    {
-                        "id": assignment.get("id"),
-                        "name": assignment.get("name"),
-                        "type": assignment.get("type"),
-                        "scope": scope,
-                        "subscriptionId": self._subscription_from_scope(scope),
-                        "tenantId": tenant_id,
-                        "data": {
-                            "principalId": props.get("principalId"),
-                            "principalType": props.get("principalType"),
-                            "roleDefinitionId": props.get("roleDefinitionId"),
-                            "scope": props.get("scope"),
-                        },
-                    }
+            parents = self._parent_management_groups(subscriptions)
+            management_groups = sorted(set(parents.values()))
+            inherited = dict(zip(management_groups, self._map(self._inherited_assignments, management_groups)))
+            subscription_scopes = set()
+            for subscription_id in subscriptions:
+                parent = parents.get(subscription_id.lower())
+                if parent is None:
+                    # Without its management group chain the subscription is listed through ARM.
+                    continue
+                scope = f"/subscriptions/{subscription_id}"
+                subscription_scopes.add(scope)
+                yield from self._role_assignment_items(
+                    scope, assignments.get(subscription_id.lower(), []) + inherited[parent]
                 )
+            scopes = [scope for scope in scopes if scope not in subscription_scopes]
+        yield from self._iter_collected(self._collect_role_assignments, scopes)
 
-        for subscription_id in self.config.get("subscriptions", []):
-            role_def_url = (
-                "https://management.azure.com"
-                f"/subscriptions/{subscription_id}/providers/Microsoft.Authorization/roleDefinitions"
+        if self._backend_for("roleDefinitions") == "resource_graph":
+            definitions = self._resource_graph_by_subscription(
+                ROLE_DEFINITIONS_QUERY, subscriptions, "Microsoft.Authorization/roleDefinitions"
             )
-            data = self._arm_get(role_def_url, params={"api-version": "2022-04-01"})
-            for definition in data.get("value", []):
-                props = definition.get("properties", {})
-                if props.get("roleType") != "CustomRole":
-                    continue
-                items.append(
-                    {
-                        "id": definition.get("id"),
-                        "name": definition.get("name"),
-                        "type": definition.get("type"),
-                        "scope": f"/subscriptions/{subscription_id}",
-                        "subscriptionId": subscription_id,
-                        "tenantId": tenant_id,
-                        "data": {
-                            "roleName": props.get("roleName"),
-                            "description": props.get("description"),
-                            "permissions": props.get("permissions"),
-                            "assignableScopes": props.get("assignableScopes"),
-                        },
-                    }
-                )
+            for subscription_id in subscriptions:
+                yield from self._role_definition_items(subscription_id, definitions.get(subscription_id.lower(), []))
+        else:
+            yield from self._iter_collected(self._collect_role_definitions, subscriptions)
+
+    def partition_keys(self) -> set[str]:
+        # Scopes outside any subscription (management groups) are partitioned on their own.
+        scopes = self.config.get("rbac_scopes", [])
+        return super().partition_keys() | {self._scope_key(scope) for scope in scopes}
+
+    def _configured_subscriptions(self) -> set[str]:
+        scopes = [*self.config.get("rbac_scopes", []), *self.config.get("sentinel_workspaces", [])]
+        tracked = {self._subscription_from_scope(scope) for scope in scopes}
+        tracked = {subscription_id.lower() for subscription_id in tracked if subscription_id}
+        return super()._configured_subscriptions() | tracked
+
+    def _collect_role_assignments(self, scope: str) -> Iterator[dict[str, Any]]:
+        role_assignments_url = (
+            f"https://management.azure.com{scope}"
+            "/providers/Microsoft.Authorization/roleAssignments"
+        )
+        return self._arm_paged_items(
+            role_assignments_url,
+            lambda data: self._role_assignment_items(scope, data.get("value", [])),
+            params={"api-version": "2022-04-01"},
+        )
+
+    def _parent_management_groups(self, subscriptions: list[str]) -> dict[str, str]:
+        """Map lower-cased subscription ids to the name of their parent management group."""
+        containers = self._resource_graph_by_subscription(
+            SUBSCRIPTION_CONTAINERS_QUERY, subscriptions, "Microsoft.Resources/subscriptions"
+        )
+        parents: dict[str, str] = {}
+        for subscription_id, rows in containers.items():
+            chain = (rows[0].get("properties") or {}).get("managementGroupAncestorsChain") or []
+            if chain and chain[0].get("name"):
+                parents[subscription_id] = chain[0]["name"]
+        return parents
 
+    def _inherited_assignments(self, management_group: str) -> list[dict[str, Any]]:
+        """Role assignments at ``management_group`` and above it, up to the root scope."""
+        url = (
+            "https://management.azure.com"
+            f"/providers/Microsoft.Management/managementGroups/{management_group}"
+            "/providers/Microsoft.Authorization/roleAssignments"
+        )
+        params = {"api-version": "2022-04-01", "$filter": "atScope()"}
+        return [assignment for data in self._arm_paged(url, params) for assignment in data.get("value", [])]
+
+    def _role_assignment_items(self, scope: str, assignments: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        tenant_id = self.config.get("tenant_id")
+        for assignment in assignments:
+            props = assignment.get("properties", {})
+            items.append(
+                {
+                    "id": assignment.get("id"),
+                    "name": assignment.get("name"),
+                    "type": assignment.get("type"),
+                    "scope": scope,
+                    "subscriptionId": self._subscription_from_scope(scope),
+                    "tenantId": tenant_id,
+                    "data": {
+                        "principalId": props.get("principalId"),
+                        "principalType": props.get("principalType"),
+                        "roleDefinitionId": props.get("roleDefinitionId"),
+                        "scope": props.get("scope"),
+                    },
+                }
+            )
+        return items
+
+    def _collect_role_definitions(self, subscription_id: str) -> Iterator[dict[str, Any]]:
+        role_def_url = (
+            "https://management.azure.com"
+            f"/subscriptions/{subscription_id}/providers/Microsoft.Authorization/roleDefinitions"
+        )
+        return self._arm_paged_items(
+            role_def_url,
+            lambda data: self._role_definition_items(subscription_id, data.get("value", [])),
+            params={"api-version": "2022-04-01"},
+        )
+
+    def _role_definition_items(
+        self,
+        subscription_id: str,
+        definitions: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        tenant_id = self.config.get("tenant_id")
+        for definition in definitions:
+            props = definition.get("properties", {})
+            if props.get("roleType") != "CustomRole":
+                continue
+            items.append(
+                {
+                    "id": definition.get("id"),
+                    "name": definition.get("name"),
+                    "type": definition.get("type"),
+                    "scope": f"/subscriptions/{subscription_id}",
+                    "subscriptionId": subscription_id,
+                    "tenantId": tenant_id,
+                    "data": {
+                        "roleName": props.get("roleName"),
+                        "description": props.get("description"),
+                        "permissions": props.get("permissions"),
+                        "assignableScopes": props.get("assignableScopes"),
+                    },
+                }
+            )
         return items
 
+    def _scope_key(self, scope: str) -> str:
+        subscription_id = self._subscription_from_scope(scope)
+        return subscription_id.lower() if subscription_id else scope.lower()
+
     @staticmethod
     def _subscription_from_scope(scope: str) -> str | None:
         parts = scope.split("/")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import importlib
+from functools import lru_cache
+from typing import Any
+
+ENTRY_POINT_GROUP = "azure_security_guard.monitors"
+
+# Name -> "module:Class"; a monitor's module is only imported once it is enabled.
+BUILTIN_MONITORS = {
+    "activity_export_monitor": "src.monitors.activity_export_monitor:ActivityExportMonitor",
+    "sentinel_monitor": "src.monitors.sentinel_monitor:SentinelMonitor",
+    "defender_monitor": "src.monitors.defender_monitor:DefenderMonitor",
+    "entraid_monitor": "src.monitors.entraid_monitor:EntraIdMonitor",
+    "rbac_monitor": "src.monitors.rbac_monitor:RBACMonitor",
+}
+
+
+@lru_cache(maxsize=None)
+def discovered_monitors() -> dict[str, str]:
+    """Monitors installed packages register under the ``azure_security_guard.monitors`` entry point group."""
+    from importlib.metadata import entry_points
+
+    return {entry_point.name: entry_point.value for entry_point in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def available_monitors(config: dict[str, Any] | None = None, discover: bool = True) -> dict[str, str]:
+    """Every known monitor name and its ``module:Class``, in run order.
+
+    Built-ins come first, then installed entry points, then the config's
+    ``monitor_plugins`` manifest, which may also replace a built-in.
+    Entry points are only scanned with ``discover``.
+    """
+    specs = dict(BUILTIN_MONITORS)
+    if discover:
+        for name, spec in discovered_monitors().items():
+            specs.setdefault(name, spec)
+    specs.update((config or {}).get("monitor_plugins") or {})
+    return specs
+
+
+@lru_cache(maxsize=None)
+def load_monitor(spec: str) -> type:
+    """Import and return the class named by ``module:Class``."""
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Monitor {spec!r} must be given as 'module:Class'")
+    target: Any = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def enabled_monitors(config: dict[str, Any]) -> dict[str, type]:
+    """Classes of the monitors in ``enabled_monitors`` (all known ones when unset).
+
+    Unknown names are skipped. Installed packages are only scanned when
+    some enabled name is neither built in nor in ``monitor_plugins``.
+    """
+    enabled = config.get("enabled_monitors") or []
+    known = available_monitors(config, discover=False)
+    specs = known if enabled and all(name in known for name in enabled) else available_monitors(config)
+    return {name: load_monitor(specs[name]) for name in (enabled or specs) if name in specs}
@@ -1,74 +1,108 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 
 from src.monitors.base import MonitorBase
 
+SENTINEL_RESOURCES = [
+    ("alertRules", "alertRule"),
+    ("automationRules", "automationRule"),
+    ("dataConnectors", "dataConnector"),
+]
+
 
 class SentinelMonitor(MonitorBase):
     name = "sentinel_monitor"
     event_category = "MicrosoftSentinel"
     event_provider = "Azure.ResourceManager"
     severity = "high"
+    activity_operations = (
+        "microsoft.securityinsights/",
+        "microsoft.operationalinsights/workspaces/write",
+        "microsoft.operationalinsights/workspaces/delete",
+    )
 
-    def collect(self) -> list[dict[str, Any]]:
-        items: list[dict[str, Any]] = []
-        tenant_id = self.config.get("tenant_id")
+    def iter_items(self) -> Iterator[dict[str, Any]]:
         workspaces = self.config.get("sentinel_workspaces", [])
         if not workspaces:
             workspaces = self._discover_workspaces()
-        for workspace_id in workspaces:
-            base = f"https://management.azure.com{workspace_id}/providers/Microsoft.SecurityInsights"
-            for resource, label in [
-                ("alertRules", "alertRule"),
-                ("automationRules", "automationRule"),
-                ("dataConnectors", "dataConnector"),
-            ]:
-                url = f"{base}/{resource}"
-                data = self._arm_get(url, params={"api-version": "2023-02-01-preview"})
-                for entry in data.get("value", []):
-                    props = entry.get("properties", {})
-                    items.append(
-                        {
-                            "id": entry.get("id"),
-                            "name": entry.get("name"),
-                            "type": entry.get("type"),
-                            "scope": workspace_id,
-                            "subscriptionId": self._subscription_from_id(workspace_id),
-                            "tenantId": tenant_id,
-                            "data": {
-                                "kind": entry.get("kind"),
-                                "label": label,
-                                "displayName": props.get("displayName"),
-                                "enabled": props.get("enabled"),
-                                "severity": props.get("severity"),
-                                "query": props.get("query"),
-                                "triggerOperator": props.get("triggerOperator"),
-                                "triggerThreshold": props.get("triggerThreshold"),
-                                "queryFrequency": props.get("queryFrequency"),
-                                "queryPeriod": props.get("queryPeriod"),
-                                "tactics": props.get("tactics"),
-                                "techniques": props.get("techniques"),
-                            },
-                        }
-                    )
+        workspaces = [
+            workspace_id for workspace_id in workspaces if self._in_filter(self._subscription_from_id(workspace_id))
+        ]
+        tasks = [
+            (workspace_id, resource, label)
+            for workspace_id in workspaces
+            for resource, label in SENTINEL_RESOURCES
+        ]
+        yield from self._iter_collected(self._collect_resource, tasks)
+
+    def _collect_resource(self, task: tuple[str, str, str]) -> Iterator[dict[str, Any]]:
+        workspace_id, resource, label = task
+        base = f"https://management.azure.com{workspace_id}/providers/Microsoft.SecurityInsights"
+        return self._arm_paged_items(
+            f"{base}/{resource}",
+            lambda data: self._resource_items(workspace_id, label, data.get("value", [])),
+            params={"api-version": "2023-02-01-preview"},
+        )
+
+    def _resource_items(self, workspace_id: str, label: str, entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        tenant_id = self.config.get("tenant_id")
+        for entry in entries:
+            props = entry.get("properties", {})
+            items.append(
+                {
+                    "id": entry.get("id"),
+                    "name": entry.get("name"),
+                    "type": entry.get("type"),
+                    "scope": workspace_id,
+                    "subscriptionId": self._subscription_from_id(workspace_id),
+                    "tenantId": tenant_id,
+                    "data": {
+                        "kind": entry.get("kind"),
+                        "label": label,
+                        "displayName": props.get("displayName"),
+                        "enabled": props.get("enabled"),
+                        "severity": props.get("severity"),
+                        "query": props.get("query"),
+                        "triggerOperator": props.get("triggerOperator"),
+                        "triggerThreshold": props.get("triggerThreshold"),
+                        "queryFrequency": props.get("queryFrequency"),
+                        "queryPeriod": props.get("queryPeriod"),
+                        "tactics": props.get("tactics"),
+                        "techniques": props.get("techniques"),
+                    },
+                }
+            )
         return items
 
+    def _configured_subscriptions(self) -> set[str]:
+        workspaces = self.config.get("sentinel_workspaces", [])
+        if not workspaces:
+            return super()._configured_subscriptions()
+        tracked = {self._subscription_from_id(workspace_id) for workspace_id in workspaces}
+        return {subscription_id.lower() for subscription_id in tracked if subscription_id}
+
     def _discover_workspaces(self) -> list[str]:
         discovered: list[str] = []
-        for subscription_id in self.config.get("subscriptions", []):
-            url = (
-                "https://management.azure.com"
-                f"/subscriptions/{subscription_id}/providers/Microsoft.OperationalInsights/workspaces"
-            )
-            data = self._arm_get(url, params={"api-version": "2022-10-01"})
-            for workspace in data.get("value", []):
-                if workspace.get("id"):
-                    discovered.append(workspace["id"])
+        for batch in self._map(self._discover_subscription, self._subscriptions()):
+            discovered.extend(batch)
         if self.verbose:
             self.logger.info(f"Discovered {len(discovered)} workspaces")
         return discovered
 
+    def _discover_subscription(self, subscription_id: str) -> list[str]:
+        url = (
+            "https://management.azure.com"
+            f"/subscriptions/{subscription_id}/providers/Microsoft.OperationalInsights/workspaces"
+        )
+        return [
+            workspace["id"]
+            for data in self._arm_paged(url, params={"api-version": "2022-10-01"})
+            for workspace in data.get("value", [])
+            if workspace.get("id")
+        ]
+
     @staticmethod
     def _subscription_from_id(resource_id: str) -> str | None:
         parts = resource_id.split("/")
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable
+
+from src.diff import Canonical, canonicalize
+
+
+def fingerprint(body: bytes) -> str:
+    """Hash a raw response body; headers (dates, request ids) never take part."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def request_key(url: str, params: dict[str, Any] | None = None) -> str:
+    return json.dumps([url, sorted((params or {}).items())], separators=(",", ":"))
+
+
+class PageCache:
+    """Items built from each response page, keyed by request and body fingerprint.
+
+    A page whose body hashes the same as last time is answered with the
+    items built from it then, already normalized, so the body is neither
+    parsed nor normalized again. ``canonical`` holds the canonical forms of
+    every item handed out this cycle for ``canonicalize_items`` to reuse.
+    The cache is persisted in state metadata under ``page_cache.<monitor>``.
+    """
+
+    def __init__(self, state, monitor_name: str) -> None:
+        self.state = state
+        self.meta_key = f"page_cache.{monitor_name}"
+        stored = (state.load_meta(self.meta_key) if state is not None else None) or {}
+        self._entries: dict[str, dict[str, Any]] = stored
+        self._visited: set[str] = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.canonical: dict[str, Canonical] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def begin(self) -> None:
+        with self._lock:
+            self._visited = set()
+            self.canonical = {}
+            self.hits = 0
+            self.misses = 0
+
+    def page(
+        self,
+        key: str,
+        body: bytes,
+        parse: Callable[[], tuple[list[dict[str, Any]], str | None]],
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Return the items and next link for a page body, calling ``parse`` only when it changed."""
+        digest = fingerprint(body)
+        with self._lock:
+            self._visited.add(key)
+            entry = self._entries.get(key)
+        # Entries written before next links and canonical texts were cached lack
+        # "next" or "texts"; reusing them would end the list early or re-serialize items.
+        if entry is not None and entry["fingerprint"] == digest and "next" in entry and "texts" in entry:
+            items = [dict(item) for item in entry["items"]]
+            forms = {
+                item["id"]: Canonical(item["data"], text, item_digest)
+                for item, text, item_digest in zip(items, entry["texts"], entry["digests"])
+            }
+            with self._lock:
+                self.canonical.update(forms)
+                self.hits += 1
+            return items, entry.get("next")
+
+        built, next_link = parse()
+        items = []
+        texts = []
+        digests = []
+        forms = {}
+        for item in built:
+            form = canonicalize(item["data"])
+            item = {**item, "data": form.normalized}
+            forms[item["id"]] = form
+            items.append(item)
+            texts.append(form.text)
+            digests.append(form.digest)
+        with self._lock:
+            self._entries[key] = {
+                "fingerprint": digest,
+                "items": items,
+                "texts": texts,
+                "digests": digests,
+                "next": next_link,
+            }
+            self.canonical.update(forms)
+            self.misses += 1
+            self._dirty = True
+        return [dict(item) for item in items], next_link
+
+    def commit(self, complete: bool = True) -> None:
+        """Persist changed entries; a complete collection also drops pages it no longer requested."""
+        with self._lock:
+            if complete:
+                stale = set(self._entries) - self._visited
+                for key in stale:
+                    del self._entries[key]
+                self._dirty = self._dirty or bool(stale)
+            if self._dirty and self.state is not None:
+                self.state.save_meta(self.meta_key, self._entries)
+            self._dirty = False
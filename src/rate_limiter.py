@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import requests
+
+ARM_HOST = "management.azure.com"
+SUBSCRIPTION_PATTERN = re.compile(r"/subscriptions/([^/?]+)", re.IGNORECASE)
+REMAINING_HEADERS = {
+    "x-ms-ratelimit-remaining-subscription-reads": "subscription",
+    "x-ms-ratelimit-remaining-tenant-reads": "tenant",
+}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can be synced with server-reported quota."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return 0, or return how long to wait before asking again."""
+        with self._lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def observe_remaining(self, remaining: float) -> None:
+        # The server's count also covers other clients of the same quota.
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens = min(self.tokens, remaining)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; one trial call after ``reset_timeout``."""
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release_trial(self) -> None:
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a ``Retry-After`` value (delay seconds or an HTTP-date); None if unusable."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def endpoint_key(url: str) -> str:
+    """Group URLs by host and resource provider type (or first path segments), ignoring ids."""
+    parts = urlsplit(url)
+    path = parts.path
+    index = path.lower().rfind("/providers/")
+    if index >= 0:
+        path = path[index + len("/providers/") :]
+    segments = [segment for segment in path.split("/") if segment]
+    return f"{parts.netloc} {'/'.join(segments[:2]).lower()}"
+
+
+class RateLimiter:
+    """Request admission shared by every monitor and worker thread.
+
+    ARM requests take a token from their tenant's bucket and, for
+    subscription URLs, from that subscription's bucket; other hosts (Graph)
+    have one bucket per host and tenant. The buckets are synced from
+    ``x-ms-ratelimit-remaining-*`` headers and paused for ``Retry-After`` on
+    throttling, so every worker backs off together. Each endpoint has a
+    circuit breaker that fails fast while it keeps erroring.
+    """
+
+    def __init__(
+        self,
+        subscription_rate: float = 25.0,
+        subscription_burst: float = 250.0,
+        tenant_rate: float = 25.0,
+        tenant_burst: float = 250.0,
+        host_rate: float = 100.0,
+        host_burst: float = 2000.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.subscription_rate = subscription_rate
+        self.subscription_burst = subscription_burst
+        self.tenant_rate = tenant_rate
+        self.tenant_burst = tenant_burst
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets: dict[str, TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict | None = None) -> RateLimiter:
+        settings = (config or {}).get("rate_limit", {}) or {}
+        return cls(
+            subscription_rate=settings.get("subscription_reads_per_second", 25.0),
+            subscription_burst=settings.get("subscription_burst", 250.0),
+            tenant_rate=settings.get("tenant_reads_per_second", 25.0),
+            tenant_burst=settings.get("tenant_burst", 250.0),
+            host_rate=settings.get("host_requests_per_second", 100.0),
+            host_burst=settings.get("host_burst", 2000.0),
+            breaker_threshold=settings.get("breaker_failures", 5),
+            breaker_reset=settings.get("breaker_reset_seconds", 30.0),
+            base_backoff=settings.get("backoff_seconds", 1.0),
+            max_backoff=settings.get("max_backoff_seconds", 60.0),
+        )
+
+    def _bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if key.startswith("subscription:"):
+                    bucket = TokenBucket(self.subscription_rate, self.subscription_burst, self.clock)
+                elif key.startswith("tenant:"):
+                    bucket = TokenBucket(self.tenant_rate, self.tenant_burst, self.clock)
+                else:
+                    bucket = TokenBucket(self.host_rate, self.host_burst, self.clock)
+                self._buckets[key] = bucket
+            return bucket
+
+    @staticmethod
+    def _breaker_key(url: str, tenant: str | None = None) -> str:
+        return endpoint_key(url) if tenant is None else f"{endpoint_key(url)} {tenant}"
+
+    def breaker(self, url: str, tenant: str | None = None) -> CircuitBreaker:
+        """The breaker of ``url``'s endpoint; like the buckets, each tenant has its own."""
+        key = self._breaker_key(url, tenant)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self.breaker_threshold, self.breaker_reset, self.clock)
+            return self._breakers[key]
+
+    def _bucket_keys(self, url: str, tenant: str | None = None) -> list[str]:
+        host = urlsplit(url).netloc.lower()
+        if host != ARM_HOST:
+            return [f"host:{host}" if tenant is None else f"host:{host}:{tenant}"]
+        keys = [f"tenant:{tenant or 'arm'}"]
+        match = SUBSCRIPTION_PATTERN.search(url)
+        if match:
+            keys.append(f"subscription:{match.group(1).lower()}")
+        return keys
+
+    def acquire(self, url: str, tenant: str | None = None) -> None:
+        """Block until ``url`` may be called; raise ``CircuitOpenError`` if its endpoint is open."""
+        if not self.breaker(url, tenant).allow():
+            raise CircuitOpenError(f"Circuit open for {self._breaker_key(url, tenant)}")
+        for key in self._bucket_keys(url, tenant):
+            bucket = self._bucket(key)
+            while True:
+                wait = bucket.reserve()
+                if wait <= 0:
+                    break
+                with self._lock:
+                    self.waited_seconds += wait
+                self.sleep(wait)
+
+    def observe(self, url: str, response: requests.Response, tenant: str | None = None) -> None:
+        """Feed quota headers, throttling and outcome of a response back into the limiter."""
+        keys = self._bucket_keys(url, tenant)
+        headers = response.headers
+        for header, scope in REMAINING_HEADERS.items():
+            value = headers.get(header)
+            if value is not None and value.isdigit():
+                for key in keys:
+                    if key.startswith(f"{scope}:"):
+                        self._bucket(key).observe_remaining(float(value))
+        breaker = self.breaker(url, tenant)
+        if response.status_code == 429:
+            # Throttling pauses the quota for every worker but says nothing about endpoint health.
+            with self._lock:
+                self.throttled += 1
+            pause = self.retry_after(response)
+            for key in keys:
+                self._bucket(key).pause(pause if pause is not None else self.base_backoff)
+            breaker.release_trial()
+        elif response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def record_error(self, url: str, tenant: str | None = None) -> None:
+        self.breaker(url, tenant).record_failure()
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> float | None:
+        return parse_retry_after(response.headers.get("Retry-After"))
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Delay before retry ``attempt``: ``Retry-After`` plus a little jitter, else full-jitter exponential."""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.1))
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2**attempt))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "open_circuits": sorted(key for key, breaker in self._breakers.items() if breaker.state != "closed"),
+            }
+
+
+_shared_limiter: RateLimiter | None = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter(config: dict | None = None) -> RateLimiter:
+    """Return the process-wide limiter, created from ``config["rate_limit"]`` on first use."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter.from_config(config)
+        return _shared_limiter
@@ -0,0 +1,401 @@
+"""Record ARM and Graph traffic to a cassette and replay it through a local stand-in server.
+
+    python -m src.replay serve --cassette-dir cassettes/prod --port 8080 --latency-ms 80 --throttle-rate 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, NamedTuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from src.http_client import HttpClient
+
+# Only Azure API traffic is recorded and replayed; anything else (Fluency) goes out as usual.
+AZURE_HOSTS = ("management.azure.com", "graph.microsoft.com")
+REDACTED = "REDACTED"
+# Lower-cased substrings of JSON keys whose values are never written to a cassette.
+SECRET_KEYS = (
+    "secret",
+    "password",
+    "connectionstring",
+    "sharedkey",
+    "accesskey",
+    "primarykey",
+    "secondarykey",
+    "token",
+)
+# Pagination cursors match SECRET_KEYS by name but are replayed as sent, or later pages would not be found.
+PAGING_KEYS = {"$skiptoken", "skiptoken", "nextlink", "@odata.nextlink", "@odata.deltalink"}
+# SAS signatures and OAuth values in URLs, JWTs and bearer tokens inside any string.
+SECRET_PATTERNS = [
+    (re.compile(r"(?i)\b(sig|signature|code|client_secret|access_token|refresh_token)=[^&\s\"']+"), rf"\1={REDACTED}"),
+    (re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+"), REDACTED),
+    (re.compile(r"(?i)\b(bearer\s+)[\w.~+/-]+=*"), rf"\1{REDACTED}"),
+]
+# Response headers worth replaying; everything else (cookies, request ids) is dropped.
+KEPT_HEADERS = (
+    "content-type",
+    "retry-after",
+    "x-ms-ratelimit-remaining-subscription-reads",
+    "x-ms-ratelimit-remaining-tenant-reads",
+)
+
+
+def scrub(value: Any) -> Any:
+    """Replace secrets in a JSON value: string values of secret-looking keys, SAS signatures, JWTs."""
+    if isinstance(value, dict):
+        scrubbed = {}
+        for key, child in value.items():
+            lowered = key.lower()
+            secret = (
+                isinstance(child, str)
+                and lowered not in PAGING_KEYS
+                and any(word in lowered for word in SECRET_KEYS)
+            )
+            scrubbed[key] = REDACTED if secret else scrub(child)
+        return scrubbed
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    if isinstance(value, str):
+        return scrub_text(value)
+    return value
+
+
+def scrub_text(text: str) -> str:
+    for pattern, replacement in SECRET_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def request_key(method: str, url: str, body: bytes | str | None = None) -> str:
+    """Identify a request by method, URL with sorted query, and canonical JSON body."""
+    parts = urlsplit(scrub_text(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    key = f"{method.upper()} {parts.netloc.lower()}{parts.path}?{query}"
+    if body:
+        try:
+            canonical = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            canonical = body.decode("utf-8", "replace") if isinstance(body, bytes) else body
+        key += " " + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+    return key
+
+
+class Cassette:
+    """Interactions recorded in ``<directory>/interactions.jsonl``.
+
+    A request recorded more than once (a delta query, say) replays its
+    responses in recorded order and then keeps returning the last one.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.path = Path(directory) / "interactions.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._interactions: dict[str, list[dict[str, Any]]] | None = None
+        self._served: dict[str, int] = {}
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        body: Any = None,
+        status: int = 200,
+        headers: dict[str, str] | None = None,
+        request_body: bytes | str | None = None,
+    ) -> None:
+        text = body if isinstance(body, str) or body is None else json.dumps(body)
+        headers = {name: value for name, value in (headers or {}).items() if name.lower() in KEPT_HEADERS}
+        if text:
+            try:
+                text = json.dumps(scrub(json.loads(text)))
+            except ValueError:
+                text = scrub_text(text)
+        interaction = {
+            "key": request_key(method, url, request_body),
+            "method": method.upper(),
+            "url": scrub_text(url),
+            "status": status,
+            "headers": headers,
+            "body": text or "",
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(interaction, sort_keys=True) + "\n")
+            if self._interactions is not None:
+                self._interactions.setdefault(interaction["key"], []).append(interaction)
+
+    def lookup(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            if self._interactions is None:
+                self._interactions = {}
+                if self.path.exists():
+                    with open(self.path, encoding="utf-8") as handle:
+                        for line in handle:
+                            if line.strip():
+                                interaction = json.loads(line)
+                                self._interactions.setdefault(interaction["key"], []).append(interaction)
+            responses = self._interactions.get(key)
+            if not responses:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+
+class RecordingHttpClient(HttpClient):
+    """HttpClient that also writes every ARM and Graph response, scrubbed, to a cassette."""
+
+    def __init__(self, cassette: Cassette, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        response = super().request(method, url, **kwargs)
+        if urlsplit(url).netloc.lower() not in AZURE_HOSTS:
+            return response
+        sent = response.request
+        self.cassette.add(
+            method,
+            sent.url or url,
+            response.text,
+            status=response.status_code,
+            headers=dict(response.headers),
+            request_body=sent.body,
+        )
+        return response
+
+
+class ReplayHttpClient(HttpClient):
+    """HttpClient that sends ARM and Graph requests to a ``ReplayServer`` at ``base_url``.
+
+    ``server``, when this process started it, is stopped by ``close``.
+    """
+
+    def __init__(self, base_url: str, server: ReplayServer | None = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.server = server
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        parts = urlsplit(url)
+        if parts.netloc.lower() not in AZURE_HOSTS:
+            return super().request(method, url, **kwargs)
+        target = f"{self.base_url}/{parts.netloc}{parts.path}"
+        if parts.query:
+            target += f"?{parts.query}"
+        return super().request(method, target, **kwargs)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        stats = super().stats()
+        if self.server is not None:
+            stats["replay-server"] = self.server.stats()
+        return stats
+
+    def close(self) -> None:
+        super().close()
+        if self.server is not None:
+            self.server.stop()
+
+
+class ReplayToken(NamedTuple):
+    """Shaped like ``azure.core.credentials.AccessToken``, without importing azure-core."""
+
+    token: str
+    expires_on: int
+
+
+class ReplayCredential:
+    """Credential for replay runs; the stand-in server does not check tokens."""
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> ReplayToken:
+        return ReplayToken("replay", int(time.time()) + 3600)
+
+
+class ReplayServer:
+    """Local stand-in for ARM and Graph that serves a cassette.
+
+    Requests arrive as ``/<original host>/<path>``. Each one waits
+    ``latency`` seconds plus up to ``jitter``. A ``throttle_rate`` share is
+    answered with 429 and ``Retry-After``, a ``failure_rate`` share with 503.
+    Requests missing from the cassette get 404.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "served": 0, "throttled": 0, "failed": 0, "missing": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> ReplayServer:
+        settings = config.get("replay") or {}
+        return cls(
+            Cassette((config.get("http") or {}).get("cassette_dir") or "cassettes"),
+            latency=settings.get("latency_ms", 0) / 1000,
+            jitter=settings.get("jitter_ms", 0) / 1000,
+            throttle_rate=settings.get("throttle_rate", 0.0),
+            retry_after=settings.get("retry_after_seconds", 1.0),
+            failure_rate=settings.get("failure_rate", 0.0),
+            seed=settings.get("seed"),
+            port=settings.get("port", 0),
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> ReplayServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def _decide(self) -> tuple[float, str]:
+        with self._lock:
+            self.counts["requests"] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return delay, "throttled"
+        if roll < self.throttle_rate + self.failure_rate:
+            return delay, "failed"
+        return delay, "served"
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                # Headers and body are separate writes; without this, delayed ACKs add ~40ms per response.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _reply(self, status: int, body: str, headers: dict[str, str] | None = None) -> None:
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                headers = {"Content-Type": "application/json", **(headers or {})}
+                for name, value in headers.items():
+                    if name.lower() != "content-length":
+                        self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+                delay, outcome = server._decide()
+                if delay:
+                    time.sleep(delay)
+                if outcome == "throttled":
+                    server._count(outcome)
+                    error = {"error": {"code": "TooManyRequests", "message": "Injected by the replay server"}}
+                    self._reply(429, json.dumps(error), {"Retry-After": f"{server.retry_after:g}"})
+                    return
+                if outcome == "failed":
+                    server._count(outcome)
+                    error = {"error": {"code": "ServiceUnavailable", "message": "Injected by the replay server"}}
+                    self._reply(503, json.dumps(error))
+                    return
+                original = f"https://{self.path.lstrip('/')}"
+                interaction = server.cassette.lookup(request_key(self.command, original, body))
+                if interaction is None:
+                    server._count("missing")
+                    message = f"{self.command} {original} is not in the cassette"
+                    self._reply(404, json.dumps({"error": {"code": "NotRecorded", "message": message}}))
+                    return
+                server._count("served")
+                self._reply(interaction["status"], interaction["body"], interaction["headers"])
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return None
+
+        return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve a recorded cassette as a stand-in for ARM and Graph")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve = subparsers.add_parser("serve")
+    serve.add_argument("--cassette-dir", required=True)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--latency-ms", type=float, default=0)
+    serve.add_argument("--jitter-ms", type=float, default=0)
+    serve.add_argument("--throttle-rate", type=float, default=0)
+    serve.add_argument("--retry-after-seconds", type=float, default=1)
+    serve.add_argument("--failure-rate", type=float, default=0)
+    serve.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        Cassette(args.cassette_dir),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after_seconds,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    ).start()
+    print(f"Replaying {server.cassette.path} on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+
+def shard_subscriptions(subscriptions: list[str], shards: int) -> list[set[str]]:
+    """Split subscriptions into ``shards`` stable groups of lower-cased ids.
+
+    A subscription's group depends only on its id, so adding or removing
+    other subscriptions never moves it.
+    """
+    groups: list[set[str]] = [set() for _ in range(shards)]
+    for subscription_id in subscriptions:
+        lowered = subscription_id.lower()
+        index = int.from_bytes(hashlib.sha256(lowered.encode("utf-8")).digest()[:8], "big") % shards
+        groups[index].add(lowered)
+    return groups
+
+
+def _iso(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    jitter: float = 0.0
+    priority: int = 0
+    group: str | None = None
+    anchor: float = 0.0
+    next_run: float = 0.0
+    running: bool = False
+    last_start: float | None = None
+    last_duration: float | None = None
+    runs: int = 0
+    skipped: int = 0
+    failures: int = 0
+    labels: dict[str, Any] = field(default_factory=dict)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            **self.labels,
+            "interval_seconds": self.interval,
+            "jitter_seconds": self.jitter,
+            "priority": self.priority,
+            "group": self.group,
+            "running": self.running,
+            "next_run": _iso(self.next_run),
+            "last_start": _iso(self.last_start),
+            "last_duration_seconds": None if self.last_duration is None else round(self.last_duration, 3),
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+        }
+
+
+class Scheduler:
+    """Runs jobs on independent intervals with jitter and priorities.
+
+    Runs are anchored to their schedule rather than to the end of the
+    previous run, so durations do not accumulate as drift. A job whose
+    previous run is still going when it comes due again is skipped for that
+    slot, as are slots missed entirely. When more jobs are due than there are
+    workers, lower ``priority`` values start first; the rest wait, still due.
+
+    Jobs may belong to a ``group`` (a tenant). Among due jobs of equal
+    priority, the group with the fewest running jobs goes first, and no group
+    runs more than ``max_per_group`` jobs at once, so one large group cannot
+    hold every worker.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        clock: Callable[[], float] = time.time,
+        on_complete: Callable[[Job], None] | None = None,
+        max_per_group: int | None = None,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_per_group = max_per_group
+        self.clock = clock
+        self.on_complete = on_complete
+        self._jobs: list[Job] = []
+        self._active = 0
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scheduler")
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval: float,
+        jitter: float = 0.0,
+        priority: int = 0,
+        group: str | None = None,
+        **labels: Any,
+    ) -> Job:
+        now = self.clock()
+        job = Job(name, func, float(interval), float(jitter), priority, group, anchor=now, labels=labels)
+        job.next_run = now + random.uniform(0, job.jitter)
+        with self._condition:
+            self._jobs.append(job)
+            self._condition.notify_all()
+        return job
+
+    def run_pending(self) -> list[Job]:
+        """Start every due job a worker is free for; returns the jobs started."""
+        started = []
+        with self._condition:
+            now = self.clock()
+            waiting = []
+            for job in self._jobs:
+                if job.next_run > now:
+                    continue
+                if job.running:
+                    job.skipped += 1
+                    self._reschedule(job, now)
+                else:
+                    waiting.append(job)
+            running = Counter(job.group for job in self._jobs if job.running)
+            while waiting and self._active < self.max_workers:
+                eligible = [
+                    job
+                    for job in waiting
+                    if self.max_per_group is None or job.group is None or running[job.group] < self.max_per_group
+                ]
+                if not eligible:
+                    break
+                job = min(eligible, key=lambda job: (job.priority, running[job.group], job.next_run))
+                waiting.remove(job)
+                running[job.group] += 1
+                job.running = True
+                job.last_start = now
+                self._active += 1
+                self._reschedule(job, now)
+                started.append(job)
+        for job in started:
+            self._executor.submit(self._run, job)
+        return started
+
+    def run_forever(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self.run_pending()
+            with self._condition:
+                pending = [job.next_run for job in self._jobs if not job.running]
+                if pending and self._active < self.max_workers:
+                    delay = max(0.0, min(pending) - self.clock())
+                else:
+                    delay = 1.0
+                # Woken early when a job finishes or is added.
+                self._condition.wait(min(delay, 1.0))
+
+    def status(self) -> list[dict[str, Any]]:
+        with self._condition:
+            return [job.status() for job in sorted(self._jobs, key=lambda job: (job.priority, job.name))]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _reschedule(self, job: Job, now: float) -> None:
+        job.anchor += job.interval
+        if job.anchor <= now:
+            missed = int((now - job.anchor) // job.interval) + 1
+            job.skipped += missed
+            job.anchor += missed * job.interval
+        job.next_run = job.anchor + random.uniform(0, job.jitter)
+
+    def _run(self, job: Job) -> None:
+        started = time.monotonic()
+        failed = False
+        try:
+            job.func()
+        except Exception:  # noqa: BLE001
+            failed = True
+            logging.exception(f"Scheduled job {job.name} failed")
+        with self._condition:
+            job.last_duration = time.monotonic() - started
+            job.runs += 1
+            job.failures += failed
+            job.running = False
+            self._active -= 1
+            self._condition.notify_all()
+        if self.on_complete is not None:
+            try:
+                self.on_complete(job)
+            except Exception:  # noqa: BLE001
+                logging.exception(f"Completion hook of scheduled job {job.name} failed")
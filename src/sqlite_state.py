@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from src.diff import Canonical, canonical_record, canonicalize_items
+from src.metrics import STATE_BYTES
+from src.state_manager import StateManager
+from src.streaming import SnapshotRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    monitor TEXT PRIMARY KEY,
+    item_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    monitor TEXT NOT NULL,
+    id TEXT NOT NULL,
+    subscription_id TEXT,
+    scope TEXT,
+    hash TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (monitor, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_subscription ON items (monitor, subscription_id);
+CREATE INDEX IF NOT EXISTS items_scope ON items (monitor, scope);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO items (monitor, id, subscription_id, scope, hash, payload) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (monitor, id) DO UPDATE SET
+    subscription_id = excluded.subscription_id,
+    scope = excluded.scope,
+    hash = excluded.hash,
+    payload = excluded.payload
+"""
+
+BATCH_SIZE = 1000
+
+
+class _Row:
+    """Item pending a write; the payload is only built if the row changed."""
+
+    def __init__(self, item_id: str, digest: str, item: dict[str, Any], canonical: Canonical) -> None:
+        self.id = item_id
+        self.digest = digest
+        self.item = item
+        self.canonical = canonical
+
+    def values(self, monitor_name: str) -> tuple:
+        return (
+            monitor_name,
+            self.id,
+            self.item.get("subscriptionId"),
+            self.item.get("scope"),
+            self.digest,
+            canonical_record(self.item, self.canonical),
+        )
+
+
+def _record_values(monitor_name: str, record: SnapshotRecord) -> tuple:
+    item = record.item()
+    return (monitor_name, record.id, item.get("subscriptionId"), item.get("scope"), record.digest, record.payload)
+
+
+class SqliteStateManager:
+    """StateManager backed by SQLite, one row per monitor item.
+
+    Each save runs in a single transaction that only touches created,
+    updated and deleted rows, found by merge-joining the new id-sorted items
+    against the stored ``(id, hash)`` pairs.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _has_snapshot(self, monitor_name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM snapshots WHERE monitor = ?", (monitor_name,)).fetchone()
+        return row is not None
+
+    def load_meta(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_meta(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value, sort_keys=True)),
+            )
+
+    def load_snapshot(
+        self,
+        monitor_name: str,
+        subscription_id: str | None = None,
+        scope: str | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """Load the snapshot, optionally only the rows for one subscription or scope."""
+        if not self._has_snapshot(monitor_name):
+            return None
+        query = "SELECT payload FROM items WHERE monitor = ?"
+        params: list[Any] = [monitor_name]
+        if subscription_id is not None:
+            query += " AND subscription_id = ?"
+            params.append(subscription_id)
+        if scope is not None:
+            query += " AND scope = ?"
+            params.append(scope)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def load_index(self, monitor_name: str) -> dict[str, str] | None:
+        if not self._has_snapshot(monitor_name):
+            return None
+        with self._lock:
+            rows = self._conn.execute("SELECT id, hash FROM items WHERE monitor = ?", (monitor_name,)).fetchall()
+        return dict(rows)
+
+    def iter_snapshot(self, monitor_name: str) -> Iterator[SnapshotRecord] | None:
+        if not self._has_snapshot(monitor_name):
+            return None
+        return (
+            SnapshotRecord(item_id, digest, payload)
+            for item_id, digest, payload in self._iter_rows(
+                "SELECT id, hash, payload FROM items WHERE monitor = ? ORDER BY id", monitor_name
+            )
+        )
+
+    def _iter_rows(self, query: str, monitor_name: str) -> Iterator[tuple]:
+        # A separate read connection sees a consistent snapshot (WAL) while the
+        # main connection writes, and keeps memory bounded by the fetch size.
+        conn = self._connect()
+        try:
+            cursor = conn.execute(query, (monitor_name,))
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def save_snapshot(
+        self,
+        monitor_name: str,
+        snapshot: list[dict[str, Any]],
+        canonical: dict[str, Canonical] | None = None,
+    ) -> None:
+        if canonical is None:
+            canonical = canonicalize_items(snapshot)
+        latest = {item["id"]: item for item in snapshot}
+        rows = (
+            _Row(item_id, canonical[item_id].digest, latest[item_id], canonical[item_id])
+            for item_id in sorted(latest)
+        )
+        self._apply(monitor_name, rows, lambda row: row.values(monitor_name))
+
+    def save_snapshot_stream(self, monitor_name: str, records: Iterable[SnapshotRecord]) -> None:
+        self._apply(monitor_name, records, lambda record: _record_values(monitor_name, record))
+
+    def _apply(self, monitor_name: str, rows: Iterable, values) -> None:
+        stored = self._iter_rows("SELECT id, hash FROM items WHERE monitor = ? ORDER BY id", monitor_name)
+        upserts: list[tuple] = []
+        deletes: list[tuple] = []
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = next(stored, None)
+                for row in rows:
+                    count += 1
+                    while current is not None and current[0] < row.id:
+                        deletes.append((monitor_name, current[0]))
+                        current = next(stored, None)
+                    if current is not None and current[0] == row.id:
+                        if current[1] != row.digest:
+                            upserts.append(values(row))
+                        current = next(stored, None)
+                    else:
+                        upserts.append(values(row))
+                    if len(upserts) >= BATCH_SIZE or len(deletes) >= BATCH_SIZE:
+                        self._flush(upserts, deletes)
+                while current is not None:
+                    deletes.append((monitor_name, current[0]))
+                    current = next(stored, None)
+                self._flush(upserts, deletes)
+                self._conn.execute(
+                    "INSERT INTO snapshots (monitor, item_count) VALUES (?, ?) "
+                    "ON CONFLICT (monitor) DO UPDATE SET item_count = excluded.item_count",
+                    (monitor_name, count),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                stored.close()
+        for path in (self.db_path, self.db_path.with_name(f"{self.db_path.name}-wal")):
+            if path.exists():
+                STATE_BYTES.set(path.stat().st_size, file=str(path))
+
+    def _flush(self, upserts: list[tuple], deletes: list[tuple]) -> None:
+        if upserts:
+            self._conn.executemany(UPSERT, upserts)
+            upserts.clear()
+        if deletes:
+            self._conn.executemany("DELETE FROM items WHERE monitor = ? AND id = ?", deletes)
+            deletes.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_state(state_dir: str, db_path: str) -> dict[str, int]:
+    """Import ``<state_dir>/*.json`` and ``*.tsv`` snapshots (and checkpoints) into a SQLite state database.
+
+    Files that do not hold a snapshot are logged and skipped; each snapshot
+    is imported in its own transaction.
+    """
+    source = StateManager(state_dir)
+    target = SqliteStateManager(db_path)
+    imported: dict[str, int] = {}
+    try:
+        names = {
+            path.stem
+            for path in Path(state_dir).glob("*.json")
+            if not path.name.endswith((".index.json", ".meta.json"))
+        }
+        names |= {path.stem for path in Path(state_dir).glob("*.tsv")}
+        for name in sorted(names):
+            # Other JSON files (status files, backups) may sit next to the snapshots.
+            try:
+                records = source.iter_snapshot(name)
+                if records is None:
+                    continue
+                target.save_snapshot_stream(name, records)
+            except (KeyError, TypeError, ValueError) as exc:
+                logging.warning(f"Skipping {name}: not a snapshot ({type(exc).__name__}: {exc})")
+                continue
+            imported[name] = len(target.load_index(name) or {})
+        for path in Path(state_dir).glob("*.meta.json"):
+            key = path.name.removesuffix(".meta.json")
+            try:
+                value = source.load_meta(key)
+            except ValueError as exc:
+                logging.warning(f"Skipping {path.name}: {exc}")
+                continue
+            target.save_meta(key, value)
+    finally:
+        target.close()
+    return imported
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import JSON state snapshots into SQLite")
+    parser.add_argument("--state-dir", default=".state")
+    parser.add_argument("--db", help="SQLite database path (default: <state-dir>/state.db)")
+    args = parser.parse_args()
+    db_path = args.db or str(Path(args.state_dir) / "state.db")
+    for name, count in migrate_json_state(args.state_dir, db_path).items():
+        print(f"{name}: {count} items")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,11 @@
 import json
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from src.diff import Canonical, canonical_record, canonicalize_items
+from src.metrics import STATE_BYTES
+from src.streaming import SnapshotRecord, dedupe_last, read_records
 
 
 class StateManager:
@@ -11,13 +16,103 @@ class StateManager:
     def _path_for(self, monitor_name: str) -> Path:
         return self.state_path / f"{monitor_name}.json"
 
+    def _index_path_for(self, monitor_name: str) -> Path:
+        return self.state_path / f"{monitor_name}.index.json"
+
+    def _stream_path_for(self, monitor_name: str) -> Path:
+        return self.state_path / f"{monitor_name}.tsv"
+
+    def _meta_path_for(self, key: str) -> Path:
+        return self.state_path / f"{key}.meta.json"
+
+    def load_meta(self, key: str) -> Any | None:
+        """Return a small JSON value stored with ``save_meta``, such as a checkpoint."""
+        path = self._meta_path_for(key)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save_meta(self, key: str, value: Any) -> None:
+        path = self._meta_path_for(key)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(value, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, path)
+
     def load_snapshot(self, monitor_name: str) -> list[dict[str, Any]] | None:
         path = self._path_for(monitor_name)
         if not path.exists():
+            stream_path = self._stream_path_for(monitor_name)
+            if stream_path.exists():
+                return [record.item() for record in dedupe_last(read_records(stream_path))]
             return None
         return json.loads(path.read_text())
 
-    def save_snapshot(self, monitor_name: str, snapshot: list[dict[str, Any]]) -> None:
-        path = self._path_for(monitor_name)
-        stable = sorted(snapshot, key=lambda item: item.get("id", ""))
-        path.write_text(json.dumps(stable, sort_keys=True, indent=2))
+    def iter_snapshot(self, monitor_name: str) -> Iterator[SnapshotRecord] | None:
+        """Stream the snapshot as id-sorted records, or None if there is none.
+
+        Snapshots saved by ``save_snapshot_stream`` are read line by line; a
+        JSON snapshot left by ``save_snapshot`` is converted in memory once.
+        """
+        stream_path = self._stream_path_for(monitor_name)
+        if stream_path.exists():
+            return dedupe_last(read_records(stream_path))
+        snapshot = self.load_snapshot(monitor_name)
+        if snapshot is None:
+            return None
+        records = [SnapshotRecord.from_item(item) for item in snapshot]
+        records.sort(key=lambda record: record.id)
+        return dedupe_last(iter(records))
+
+    def save_snapshot_stream(self, monitor_name: str, records: Iterable[SnapshotRecord]) -> None:
+        """Write id-sorted records to ``<monitor>.tsv`` via an atomic rename."""
+        path = self._stream_path_for(monitor_name)
+        tmp_path = path.with_suffix(".tsv.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.writelines(record.to_line() for record in records)
+        os.replace(tmp_path, path)
+        self._path_for(monitor_name).unlink(missing_ok=True)
+        self._index_path_for(monitor_name).unlink(missing_ok=True)
+        self._record_sizes(path)
+
+    def load_index(self, monitor_name: str) -> dict[str, str] | None:
+        """Return the stored ``{id: hash}`` index, or None if there is none."""
+        path = self._index_path_for(monitor_name)
+        if not path.exists() or not self._path_for(monitor_name).exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save_snapshot(
+        self,
+        monitor_name: str,
+        snapshot: list[dict[str, Any]],
+        canonical: dict[str, Canonical] | None = None,
+    ) -> None:
+        """Persist the snapshot and its hash index.
+
+        Items are stored one per line, sorted by id, with their normalized
+        ``data``; ``canonical`` (from ``canonicalize_items``) is reused when
+        given so nothing is normalized or serialized twice.
+        """
+        if canonical is None:
+            canonical = canonicalize_items(snapshot)
+        latest = {item["id"]: item for item in snapshot}
+        lines = [canonical_record(latest[item_id], canonical[item_id]) for item_id in sorted(latest)]
+        # The old index goes first and the new one is written last, so a crash
+        # in between leaves a snapshot without an index, never a mismatched pair.
+        self._index_path_for(monitor_name).unlink(missing_ok=True)
+        self._replace(self._path_for(monitor_name), "[\n" + ",\n".join(lines) + "\n]\n")
+        index = {item_id: canonical[item_id].digest for item_id in sorted(latest)}
+        self._replace(self._index_path_for(monitor_name), json.dumps(index, separators=(",", ":")))
+        self._stream_path_for(monitor_name).unlink(missing_ok=True)
+        self._record_sizes(self._path_for(monitor_name), self._index_path_for(monitor_name))
+
+    @staticmethod
+    def _replace(path: Path, text: str) -> None:
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _record_sizes(*paths: Path) -> None:
+        for path in paths:
+            STATE_BYTES.set(path.stat().st_size, file=str(path))
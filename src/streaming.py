@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+from src.diff import _diff_fields, canonical_record, canonicalize
+
+
+@dataclass(frozen=True)
+class SnapshotRecord:
+    """One snapshot item as stored on disk: id, hash of normalized data, item JSON.
+
+    The item JSON is only parsed when the record takes part in a change.
+    """
+
+    id: str
+    digest: str
+    payload: str
+
+    @classmethod
+    def from_item(cls, item: dict[str, Any]) -> SnapshotRecord:
+        canonical = canonicalize(item["data"])
+        return cls(item["id"], canonical.digest, canonical_record(item, canonical))
+
+    @classmethod
+    def from_line(cls, line: str) -> SnapshotRecord:
+        item_id, digest, payload = line.rstrip("\n").split("\t", 2)
+        return cls(json.loads(item_id), digest, payload)
+
+    def to_line(self) -> str:
+        # JSON never contains raw tabs or newlines, so they are safe separators.
+        return f"{json.dumps(self.id, ensure_ascii=False)}\t{self.digest}\t{self.payload}\n"
+
+    def item(self) -> dict[str, Any]:
+        return json.loads(self.payload)
+
+
+def read_records(path: str | os.PathLike) -> Iterator[SnapshotRecord]:
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield SnapshotRecord.from_line(line)
+
+
+def dedupe_last(records: Iterable[SnapshotRecord]) -> Iterator[SnapshotRecord]:
+    """Collapse runs of equal ids in an id-sorted stream, keeping the last one."""
+    previous = None
+    for record in records:
+        if previous is not None and record.id != previous.id:
+            yield previous
+        previous = record
+    if previous is not None:
+        yield previous
+
+
+class SortedRecords:
+    """Items sorted by id, spilled to temporary run files above ``chunk_size``.
+
+    Iterating merges the runs lazily, so memory stays bounded by the chunk
+    size. The result can be iterated more than once; call ``close`` to remove
+    the run files.
+    """
+
+    def __init__(self, items: Iterable[dict[str, Any]], chunk_size: int = 50_000, tmp_dir: str | None = None) -> None:
+        self.count = 0
+        self._memory: list[SnapshotRecord] = []
+        self._runs: list[str] = []
+        chunk: list[SnapshotRecord] = []
+        try:
+            for item in items:
+                chunk.append(SnapshotRecord.from_item(item))
+                self.count += 1
+                if len(chunk) >= chunk_size:
+                    self._spill(chunk, tmp_dir)
+                    chunk = []
+            if self._runs:
+                if chunk:
+                    self._spill(chunk, tmp_dir)
+            else:
+                chunk.sort(key=lambda record: record.id)
+                self._memory = chunk
+        except BaseException:
+            self.close()
+            raise
+
+    def _spill(self, chunk: list[SnapshotRecord], tmp_dir: str | None) -> None:
+        chunk.sort(key=lambda record: record.id)
+        handle, path = tempfile.mkstemp(prefix="snapshot-run-", suffix=".tsv", dir=tmp_dir)
+        with os.fdopen(handle, "w", encoding="utf-8") as run:
+            run.writelines(record.to_line() for record in chunk)
+        self._runs.append(path)
+
+    def __iter__(self) -> Iterator[SnapshotRecord]:
+        if not self._runs:
+            return dedupe_last(iter(self._memory))
+        # heapq.merge is stable across runs, so the last-collected duplicate wins.
+        return dedupe_last(heapq.merge(*(read_records(path) for path in self._runs), key=lambda record: record.id))
+
+    def close(self) -> None:
+        for path in self._runs:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self._runs = []
+        self._memory = []
+
+
+def diff_streams(
+    old_records: Iterable[SnapshotRecord],
+    new_records: Iterable[SnapshotRecord],
+) -> Iterator[dict[str, Any]]:
+    """Merge-join two id-sorted record streams, yielding ``diff_snapshots``-style changes."""
+    old_iter = iter(old_records)
+    new_iter = iter(new_records)
+    old = next(old_iter, None)
+    new = next(new_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old.id < new.id):
+            old_item = old.item()
+            old_form = canonicalize(old_item["data"])
+            yield {
+                "changeType": "Deleted",
+                "id": old.id,
+                "old": {**old_item, "data": old_form.normalized},
+                "new": None,
+                "changedFields": [],
+                "baselineHash": old_form.digest,
+                "currentHash": None,
+            }
+            old = next(old_iter, None)
+        elif old is None or new.id < old.id:
+            yield {
+                "changeType": "Created",
+                "id": new.id,
+                "old": None,
+                "new": new.item(),
+                "changedFields": [],
+                "baselineHash": None,
+                "currentHash": new.digest,
+            }
+            new = next(new_iter, None)
+        else:
+            if old.digest != new.digest:
+                old_item = old.item()
+                old_form = canonicalize(old_item["data"])
+                new_item = new.item()
+                if old_form.digest != new.digest:
+                    yield {
+                        "changeType": "Updated",
+                        "id": new.id,
+                        "old": {**old_item, "data": old_form.normalized},
+                        "new": new_item,
+                        "changedFields": _diff_fields(old_form.normalized, new_item["data"]),
+                        "baselineHash": old_form.digest,
+                        "currentHash": new.digest,
+                    }
+            old = next(old_iter, None)
+            new = next(new_iter, None)
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+SERVICE_NAME = "azure-security-guard"
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+
+
+class Span:
+    """One timed operation; serialized as an OpenTelemetry (OTLP JSON) span."""
+
+    __slots__ = ("trace_id", "span_id", "parent", "name", "attributes", "label", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, parent: Span | None, attributes: dict[str, Any]) -> None:
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.name = name
+        self.attributes = attributes
+        # Attributes known up front name the span's frame in profiles; counts set later would split it.
+        self.label = name + "".join(f" {key}={value}" for key, value in attributes.items() if value is not None)
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: str | None = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class _NoopSpan:
+    def set(self, **attributes: Any) -> None:
+        return None
+
+    def add(self, key: str, amount: int = 1) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def otlp_request(spans: list[Span], service_name: str = SERVICE_NAME) -> dict[str, Any]:
+    """An OTLP ``ExportTraceServiceRequest`` in its JSON encoding."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+                "scopeSpans": [{"scope": {"name": "azure-guard"}, "spans": [span.to_otlp() for span in spans]}],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """Appends one OTLP JSON export request per trace, as the collector's file exporter writes them."""
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        line = json.dumps(otlp_request(spans, self.service_name), separators=(",", ":")) + "\n"
+        with self._lock, self.path.open("a", encoding="utf-8") as handle:
+            handle.write(line)
+
+
+class OtlpHttpExporter:
+    """Posts each trace to an OTLP/HTTP endpoint, e.g. ``http://localhost:4318/v1/traces``."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        http_client,
+        headers: dict[str, str] | None = None,
+        service_name: str = SERVICE_NAME,
+        timeout: float = 10,
+    ) -> None:
+        self.endpoint = endpoint
+        self.http = http_client
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]) -> None:
+        try:
+            response = self.http.request(
+                "POST",
+                self.endpoint,
+                data=json.dumps(otlp_request(spans, self.service_name)),
+                headers=self.headers,
+                timeout=self.timeout,
+            )
+            if response.status_code >= 400:
+                logging.error(f"Trace export to {self.endpoint} failed: HTTP {response.status_code}")
+        except Exception as exc:  # noqa: BLE001
+            logging.error(f"Trace export to {self.endpoint} failed: {exc}")
+
+
+_current: ContextVar[Span | None] = ContextVar("azure_guard_span", default=None)
+
+
+class Tracer:
+    """Records nested spans and exports each trace once its root span ends.
+
+    The current span follows ``contextvars``, so work handed to
+    ``src.concurrency`` pools is parented to the span that submitted it.
+    Without exporters, ``span`` is a no-op.
+    """
+
+    def __init__(self) -> None:
+        self.exporters: list[Any] = []
+        self._lock = threading.Lock()
+        self._pending: dict[str, list[Span]] = {}
+        # Innermost open span per thread, kept only while a profiler samples them.
+        self.active: dict[int, Span] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def configure(self, exporters: list[Any]) -> None:
+        self.exporters = list(exporters)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+        if not self.exporters:
+            yield NOOP_SPAN
+            return
+        parent = _current.get()
+        span = Span(name, parent, attributes)
+        token = _current.set(span)
+        thread_id = threading.get_ident()
+        previous = None
+        if self.active is not None:
+            previous = self.active.get(thread_id)
+            self.active[thread_id] = span
+        try:
+            yield span
+        except GeneratorExit:
+            raise
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            if self.active is not None:
+                if previous is None:
+                    self.active.pop(thread_id, None)
+                else:
+                    self.active[thread_id] = previous
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        root = span
+        while root.parent is not None:
+            root = root.parent
+        with self._lock:
+            spans = self._pending.setdefault(span.trace_id, [])
+            spans.append(span)
+            # A span outliving its root (say, a cancelled prefetch) is exported on its own.
+            if root is not span and not root.end_ns:
+                return
+            del self._pending[span.trace_id]
+        for exporter in self.exporters:
+            exporter.export(spans)
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **attributes: Any):
+    """``TRACER.span``: a context manager yielding the new span (or a no-op stand-in)."""
+    return TRACER.span(name, **attributes)
+
+
+def current_span() -> Span | _NoopSpan:
+    return _current.get() or NOOP_SPAN
+
+
+def configure_tracing(config: dict, http_client=None, extra_exporters: list[Any] | None = None) -> bool:
+    """Set up ``TRACER`` from ``config["tracing"]``; returns whether tracing is on."""
+    settings = config.get("tracing") or {}
+    service_name = settings.get("service_name", SERVICE_NAME)
+    exporters: list[Any] = list(extra_exporters or [])
+    if settings.get("enabled"):
+        if settings.get("file"):
+            exporters.append(FileExporter(settings["file"], service_name))
+        if settings.get("otlp_endpoint"):
+            exporters.append(
+                OtlpHttpExporter(settings["otlp_endpoint"], http_client, settings.get("otlp_headers"), service_name)
+            )
+    TRACER.configure(exporters)
+    return TRACER.enabled
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads inside a span and writes folded stacks.
+
+    Each line is ``frame;frame;... count``, the input format of
+    ``flamegraph.pl`` and speedscope. Stacks start with the open spans
+    (name and initial attributes), followed by the Python frames.
+    """
+
+    def __init__(self, path: str, interval: float = 0.005, tracer: Tracer = TRACER) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self.tracer = tracer
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> SamplingProfiler:
+        self.tracer.active = {}
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.tracer.active = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as handle:
+            for stack, count in sorted(self.samples.items()):
+                handle.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            active = dict(self.tracer.active or {})
+            for thread_id, frame in sys._current_frames().items():
+                span = active.get(thread_id)
+                if thread_id == own or span is None:
+                    continue
+                self.samples[";".join(_span_frames(span) + _python_frames(frame))] += 1
+
+
+def _frame_name(name: str) -> str:
+    # ";" separates frames in the folded format; the count follows the last space.
+    return name.replace(";", ",").replace("\n", " ")
+
+
+def _span_frames(span: Span) -> list[str]:
+    frames = []
+    current: Span | None = span
+    while current is not None:
+        frames.append(_frame_name(f"[{current.label}]"))
+        current = current.parent
+    return frames[::-1]
+
+
+def _python_frames(frame) -> list[str]:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(_frame_name(f"{Path(code.co_filename).stem}.{code.co_qualname}"))
+        frame = frame.f_back
+    return frames[::-1]
@@ -0,0 +1,65 @@
+import json
+import threading
+from unittest import mock
+
+import requests
+
+from src.monitors.sentinel_monitor import SentinelMonitor
+from src.page_cache import PageCache
+
+WORKSPACE = "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.OperationalInsights/workspaces/ws"
+RULES = f"https://management.azure.com{WORKSPACE}/providers/Microsoft.SecurityInsights/alertRules"
+
+
+class DummyLogger:
+    def info(self, message: str) -> None:
+        return None
+
+
+def _pages():
+    pages = {}
+    for index in range(3):
+        url = RULES if index == 0 else f"{RULES}?$skipToken={index}"
+        body = {"value": [{"id": f"{WORKSPACE}/rule-{index}", "properties": {"displayName": f"rule {index}"}}]}
+        if index < 2:
+            body["nextLink"] = f"{RULES}?$skipToken={index + 1}"
+        pages[url] = body
+    return pages
+
+
+def test_arm_lists_follow_next_link_with_prefetch():
+    pages = _pages()
+    threads = set()
+
+    def fake_arm_get(url, params=None):
+        threads.add(threading.current_thread().name.split("_")[0])
+        return pages.get(url, {"value": []})
+
+    config = {"sentinel_workspaces": [WORKSPACE], "arm_prefetch": True}
+    monitor = SentinelMonitor(config=config, credential=None, logger=DummyLogger(), http_client=object())
+    with mock.patch.object(monitor, "_arm_get", side_effect=fake_arm_get):
+        items = list(monitor.iter_items())
+    assert [item["data"]["displayName"] for item in items] == ["rule 0", "rule 1", "rule 2"]
+    assert "page-prefetch" in threads
+
+
+def test_cached_pages_keep_their_next_link():
+    pages = _pages()
+    calls = []
+
+    def fake_send(method, url, scope=None, params=None, **kwargs):
+        calls.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(pages.get(url, {"value": []})).encode("utf-8")
+        return response
+
+    config = {"sentinel_workspaces": [WORKSPACE]}
+    cache = PageCache(None, "sentinel_monitor")
+    for _ in range(2):
+        monitor = SentinelMonitor(config=config, credential=None, logger=DummyLogger(), http_client=object())
+        monitor.page_cache = cache
+        with mock.patch.object(monitor, "_send", side_effect=fake_send):
+            items = list(monitor.iter_items())
+        assert len(items) == 3
+    assert cache.hits == 5 and calls.count(f"{RULES}?$skipToken=2") == 2
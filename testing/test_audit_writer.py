@@ -0,0 +1,65 @@
+import gzip
+import os
+import threading
+
+from src.audit_writer import AuditLogWriter
+
+
+def test_writer_rotates_and_compresses_segments(tmp_path):
+    path = tmp_path / "audit.log"
+    writer = AuditLogWriter(str(path), flush_every=10, max_bytes=200, backup_count=0)
+    threads = [
+        threading.Thread(target=lambda n=n: [writer.write(f'{{"thread": {n}, "i": {i}}}\n') for i in range(20)])
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    segments = sorted(tmp_path.glob("audit.log.*"))
+    assert segments and all(segment.suffix == ".gz" for segment in segments)
+    lines = path.read_text().splitlines()
+    for segment in segments:
+        lines.extend(gzip.decompress(segment.read_bytes()).decode().splitlines())
+    assert len(lines) == 80
+    assert all(line.startswith('{"thread"') and line.endswith("}") for line in lines)
+
+
+def test_writer_flushes_by_count(tmp_path):
+    path = tmp_path / "audit.log"
+    writer = AuditLogWriter(str(path), flush_every=3, flush_interval=60)
+    writer.write("one\n")
+    writer.write("two\n")
+    assert path.read_text() == ""
+    writer.write("three\n")
+    assert path.read_text() == "one\ntwo\nthree\n"
+    writer.close()
+
+
+def test_prune_keeps_segments_queued_for_compression(tmp_path):
+    path = tmp_path / "audit.log"
+    writer = AuditLogWriter(str(path), backup_count=1)
+    queued = tmp_path / "audit.log.20000101T000000"
+    queued.write_text("queued\n")
+    for age, name in enumerate(("audit.log.20000101T000002.gz", "audit.log.20000101T000001.gz")):
+        (tmp_path / name).write_bytes(gzip.compress(b"done\n"))
+        os.utime(tmp_path / name, (1_000_000 - age, 1_000_000 - age))
+    writer._prune()
+    writer.close()
+    assert sorted(segment.name for segment in tmp_path.glob("audit.log.*")) == [
+        "audit.log.20000101T000000",
+        "audit.log.20000101T000002.gz",
+    ]
+
+
+def test_rotation_counts_bytes(tmp_path):
+    path = tmp_path / "audit.log"
+    writer = AuditLogWriter(str(path), max_bytes=40, backup_count=0, compress=False)
+    line = "\u00e9" * 10 + "\n"
+    writer.write(line)
+    writer.write(line)
+    writer.close()
+    assert path.read_text(encoding="utf-8") == line
+    assert len(list(tmp_path.glob("audit.log.*"))) == 1
@@ -0,0 +1,64 @@
+from src.cluster import Cluster
+from src.monitors.rbac_monitor import RBACMonitor
+
+SUBSCRIPTIONS = {f"sub-{index}" for index in range(40)}
+
+
+def test_partitions_split_between_live_workers_and_rebalance(tmp_path):
+    now = [1000.0]
+    first = Cluster(str(tmp_path), "worker-a", partitions=8, lease_ttl=60, clock=lambda: now[0])
+    second = Cluster(str(tmp_path), "worker-b", partitions=8, lease_ttl=60, clock=lambda: now[0])
+    first.heartbeat()
+    second.heartbeat()
+
+    mine = first.owned_partitions("rbac_monitor", SUBSCRIPTIONS)
+    theirs = second.owned_partitions("rbac_monitor", SUBSCRIPTIONS)
+    assert mine and theirs and not set(mine) & set(theirs)
+    assert set().union(*mine.values(), *theirs.values()) == SUBSCRIPTIONS
+    assert len(first.owned_partitions("entraid_monitor", set()) | second.owned_partitions("entraid_monitor", set())) == 1
+
+    # worker-b stops renewing: once its lease expires, worker-a owns everything.
+    partition = next(iter(theirs))
+    assert second.acquire(partition)
+    assert not first.acquire(partition)
+    now[0] += 61
+    first.heartbeat()
+    assert set(first.owned_partitions("rbac_monitor", SUBSCRIPTIONS)) == set(mine) | set(theirs)
+    assert first.acquire(partition)
+    first.release(partition)
+    assert second.acquire(partition)
+
+
+def test_only_one_worker_takes_over_an_expired_lock(tmp_path):
+    now = [1000.0]
+    workers = [Cluster(str(tmp_path), f"worker-{name}", lease_ttl=60, clock=lambda: now[0]) for name in "abc"]
+    first, second, third = workers
+    assert first.acquire("rbac_monitor")
+    now[0] += 61
+
+    # Both see the expired lock; the third worker finishes its takeover before the second does.
+    results = []
+    take_over = second._take_over
+
+    def interleaved(*args):
+        results.append(third.acquire("rbac_monitor"))
+        return take_over(*args)
+
+    second._take_over = interleaved
+    results.append(second.acquire("rbac_monitor"))
+    assert results == [True, False]
+    assert Cluster._read(third._lock_path("rbac_monitor"))["worker"] == "worker-c"
+    assert sorted(path.name for path in third.locks_path.iterdir()) == ["rbac_monitor.lock"]
+
+
+def test_rbac_partitions_management_group_scopes():
+    management_group = "/providers/Microsoft.Management/managementGroups/MG-1"
+    config = {
+        "subscriptions": ["SUB-1"],
+        "rbac_scopes": [management_group, "/subscriptions/SUB-2/resourceGroups/rg"],
+    }
+    monitor = RBACMonitor(config=config, credential=None, logger=None, http_client=object())
+    assert monitor.partition_keys() == {"sub-1", "sub-2", management_group.lower()}
+    monitor.shard = {management_group.lower()}
+    assert monitor._in_filter(monitor._scope_key(management_group))
+    assert not monitor._in_filter(monitor._scope_key("/subscriptions/SUB-1"))
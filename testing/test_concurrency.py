@@ -0,0 +1,56 @@
+import importlib.util
+import time
+from pathlib import Path
+
+from src.concurrency import ordered_map
+from src.monitors.rbac_monitor import RBACMonitor
+
+
+class DummyLogger:
+    def info(self, message: str) -> None:
+        return None
+
+
+def test_ordered_map_preserves_input_order():
+    def slow_identity(value):
+        time.sleep(0.01 * (5 - value))
+        return value
+
+    assert ordered_map(slow_identity, range(5), max_workers=5) == [0, 1, 2, 3, 4]
+
+
+def test_parallel_collect_matches_serial():
+    def fake_arm_get(url, params=None):
+        return {
+            "value": [
+                {
+                    "id": f"{url}/a",
+                    "name": "a",
+                    "type": "roleAssignment",
+                    "properties": {"principalId": url, "roleType": "CustomRole"},
+                }
+            ]
+        }
+
+    config = {
+        "tenant_id": "tenant",
+        "subscriptions": [f"sub-{index}" for index in range(8)],
+        "rbac_scopes": ["/subscriptions/sub-0/resourceGroups/rg"],
+    }
+    results = []
+    for workers in (1, 4):
+        monitor = RBACMonitor(config={**config, "max_workers": workers}, credential=None, logger=DummyLogger())
+        monitor._arm_get = fake_arm_get
+        results.append(monitor.collect())
+    assert results[0] == results[1]
+
+
+def test_monitors_and_their_scopes_share_max_workers():
+    script = Path(__file__).resolve().parents[1] / "azure-security-guard.py"
+    spec = importlib.util.spec_from_file_location("azure_security_guard", script)
+    guard = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(guard)
+    assert guard.worker_split({"max_workers": 8}, monitors=5) == (5, 1)
+    assert guard.worker_split({"max_workers": 8, "monitor_workers": 2}, monitors=5) == (2, 4)
+    assert guard.worker_split({"max_workers": 8}, monitors=1) == (1, 8)
+    assert guard.worker_split({"max_workers": 1}, monitors=3) == (1, 1)
@@ -0,0 +1,45 @@
+import threading
+import time
+from collections import namedtuple
+
+from src.credentials import ARM_SCOPE, GRAPH_SCOPE, CachedCredential
+
+AccessToken = namedtuple("AccessToken", ["token", "expires_on"])
+
+
+class CountingCredential:
+    def __init__(self, lifetime: float) -> None:
+        self.lifetime = lifetime
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        time.sleep(0.01)
+        with self.lock:
+            self.calls.append(scopes)
+            return AccessToken(f"token-{len(self.calls)}", int(time.time() + self.lifetime))
+
+
+def test_cached_credential_fetches_once_per_scope_under_concurrency():
+    inner = CountingCredential(lifetime=3600)
+    credential = CachedCredential(inner)
+    threads = [
+        threading.Thread(target=credential.get_token, args=(scope,))
+        for scope in [ARM_SCOPE, GRAPH_SCOPE] * 10
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(inner.calls) == sorted([(ARM_SCOPE,), (GRAPH_SCOPE,)])
+
+
+def test_cached_credential_refreshes_in_background_before_expiry():
+    inner = CountingCredential(lifetime=120)
+    credential = CachedCredential(inner, refresh_margin=300, min_validity=30)
+    first = credential.get_token(ARM_SCOPE)
+    assert credential.get_token(ARM_SCOPE) is first
+    deadline = time.time() + 2
+    while len(inner.calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(inner.calls) == 2
@@ -1,4 +1,7 @@
-from src.diff import diff_snapshots, normalize_item
+import json
+
+from src.diff import canonicalize, diff_snapshots, json_patch, normalize_item, patch_fields, stable_hash
+from src.monitors.base import MonitorBase
 
 
 def test_normalize_drops_volatile_fields_and_sorts_lists():
@@ -29,3 +32,64 @@ def test_diff_detects_created_deleted_updated():
     assert change_types["one"] == "Deleted"
     assert change_types["two"] == "Updated"
     assert change_types["three"] == "Created"
+
+
+def test_canonicalize_matches_normalize_and_stable_hash():
+    payload = {
+        "conditions": {
+            "users": {"includeGroups": ["b", "Ä", "a"], "excludeUsers": [{"id": "ö"}, {"id": "o"}]},
+            "locations": [["z", "y"], ["b", "a"]],
+        },
+        "displayName": "Blöck légacy ☃",
+        "etag": "volatile",
+    }
+    canonical = canonicalize(payload)
+    expected = normalize_item(payload)
+    assert canonical.normalized == expected
+    assert canonical.text == json.dumps(expected, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    assert canonical.digest == stable_hash(expected)
+
+
+def test_json_patch_matches_list_elements_by_natural_key():
+    old = normalize_item(
+        {
+            "logs": [{"category": "Audit", "enabled": True}, {"category": "Signin", "enabled": True}],
+            "users": ["u1", "u2"],
+        }
+    )
+    new = normalize_item(
+        {
+            "logs": [{"category": "Audit", "enabled": True}, {"category": "Signin", "enabled": False}],
+            "users": ["u1", "u3"],
+        }
+    )
+    patch = json_patch(old, new)
+    assert patch == [
+        {"op": "replace", "path": "/logs/1/enabled", "value": False, "keys": {"/logs/1": {"category": "Signin"}}},
+        {"op": "remove", "path": "/users/1"},
+        {"op": "add", "path": "/users/-", "value": "u3"},
+    ]
+    assert patch_fields(patch) == ["logs[category=Signin].enabled", "users"]
+
+
+def test_patch_events_omit_full_payloads_unless_requested():
+    old = [{"id": "policy", "data": {"logs": [{"category": "Audit", "enabled": True}], "kql": "x" * 5000}}]
+    new = [{"id": "policy", "data": {"logs": [{"category": "Audit", "enabled": False}], "kql": "x" * 5000}}]
+    change = diff_snapshots(old, new)[0]
+    full = MonitorBase({}, None, None, http_client=object(), rate_limiter=object()).build_event(change)
+    assert full["changedFields"] == ["logs"] and "patch" not in full
+
+    monitor = MonitorBase({"events": {"format": "patch"}}, None, None, http_client=object(), rate_limiter=object())
+    event = monitor.build_event(change)
+    assert event["changedFields"] == ["logs[category=Audit].enabled"]
+    assert event["raw"] == {"old": None, "new": None}
+    assert len(json.dumps(event)) < len(json.dumps(full)) / 5
+
+
+def test_json_patch_tells_booleans_and_numbers_apart():
+    old = {"settings": {"enabled": True, "retention": 1}, "days": 1}
+    new = {"settings": {"enabled": 1, "retention": 1.0}, "days": 1}
+    assert json_patch(old, new) == [
+        {"op": "replace", "path": "/settings/enabled", "value": 1},
+        {"op": "replace", "path": "/settings/retention", "value": 1.0},
+    ]
@@ -0,0 +1,91 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.forwarder import FluencyForwarder
+from src.http_client import HttpClient
+
+
+class FluencyStandIn(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FluencyHandler)
+        self.status = 200
+        self.batches = []
+
+
+class FluencyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.server.status == 200:
+            assert self.headers["Content-Encoding"] == "gzip"
+            self.server.batches.append(json.loads(gzip.decompress(body)))
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        return None
+
+
+def _serve():
+    server = FluencyStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _forwarder(server, spool_dir):
+    return FluencyForwarder(
+        url=f"http://127.0.0.1:{server.server_port}/api/events",
+        api_key="key",
+        batch_size=10,
+        flush_interval=0.2,
+        max_retries=2,
+        backoff_seconds=0.01,
+        spool_dir=str(spool_dir),
+        http_client=HttpClient(timeout=5),
+    )
+
+
+def test_forwarder_batches_events(tmp_path):
+    server = _serve()
+    try:
+        forwarder = _forwarder(server, tmp_path)
+        forwarder.start()
+        for index in range(25):
+            forwarder.submit({"index": index})
+        forwarder.close()
+        assert [len(batch) for batch in server.batches] == [10, 10, 5]
+        assert [event["index"] for batch in server.batches for event in batch] == list(range(25))
+        metrics = forwarder.metrics()
+        assert metrics["events_delivered"] == 25
+        assert metrics["queue_depth"] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_forwarder_spools_failed_batches_and_replays_on_restart(tmp_path):
+    server = _serve()
+    try:
+        server.status = 503
+        forwarder = _forwarder(server, tmp_path)
+        forwarder.start()
+        for index in range(3):
+            forwarder.submit({"index": index})
+        forwarder.close()
+        assert forwarder.metrics()["spool_files"] == 1
+        assert server.batches == []
+
+        server.status = 200
+        restarted = _forwarder(server, tmp_path)
+        restarted.start()
+        restarted.submit({"index": 3})
+        restarted.close()
+        assert [event["index"] for batch in server.batches for event in batch] == [0, 1, 2, 3]
+        assert restarted.metrics()["spool_files"] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from src.monitors.entraid_monitor import EntraIdMonitor
+
+
+class DummyLogger:
+    def info(self, message: str) -> None:
+        return None
+
+
+def test_entra_collect_batches_first_pages_and_retries_throttled_requests():
+    calls = []
+    throttled = {"done": False}
+
+    def fake_request(method, url, scope=None, headers=None, params=None, json_body=None, max_retries=5):
+        assert (method, url) == ("POST", "https://graph.microsoft.com/v1.0/$batch")
+        calls.append([request["url"] for request in json_body["requests"]])
+        responses = []
+        for request in json_body["requests"]:
+            if request["url"].endswith("/namedLocations") and not throttled["done"]:
+                throttled["done"] = True
+                responses.append({"id": request["id"], "status": 429, "headers": {"Retry-After": "0"}})
+            elif request["url"].endswith("/policies"):
+                body = {
+                    "value": [{"id": "p1", "displayName": "Block legacy"}],
+                    "@odata.nextLink": "https://graph.microsoft.com/v1.0/identity/conditionalAccess/policies?$skiptoken=x",
+                }
+                responses.append({"id": request["id"], "status": 200, "body": body})
+            elif "$skiptoken" in request["url"]:
+                responses.append({"id": request["id"], "status": 200, "body": {"value": [{"id": "p2"}]}})
+            elif request["url"].endswith("/namedLocations"):
+                responses.append({"id": request["id"], "status": 200, "body": {"value": [{"id": "loc"}]}})
+            else:
+                responses.append({"id": request["id"], "status": 200, "body": {"id": "authenticationMethodsPolicy"}})
+        return {"responses": list(reversed(responses))}
+
+    monitor = EntraIdMonitor(config={"tenant_id": "tenant"}, credential=None, logger=DummyLogger())
+    with mock.patch.object(monitor, "_request", side_effect=fake_request), mock.patch("time.sleep"):
+        items = monitor.collect()
+
+    assert len(calls[0]) == 3
+    assert calls[1] == ["/identity/conditionalAccess/namedLocations"]
+    assert calls[2] == ["/identity/conditionalAccess/policies?$skiptoken=x"]
+    assert [item["id"] for item in items] == [
+        "conditionalAccessPolicy:p1",
+        "conditionalAccessPolicy:p2",
+        "namedLocation:loc",
+        "authenticationMethodsPolicy",
+    ]
+
+
+def test_graph_batch_retries_after_http_date_hints():
+    responses = [
+        {"responses": [{"id": "0", "status": 503, "headers": {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}}]},
+        {"responses": [{"id": "0", "status": 200, "body": {"id": "policy"}}]},
+    ]
+    monitor = EntraIdMonitor(config={"tenant_id": "tenant"}, credential=None, logger=DummyLogger())
+    with mock.patch.object(monitor, "_request", side_effect=responses), mock.patch("time.sleep") as sleep:
+        assert monitor._graph_batch(["/policies/authenticationMethodsPolicy"]) == [{"id": "policy"}]
+    assert sleep.call_args.args[0] <= 1
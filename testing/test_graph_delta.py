@@ -0,0 +1,65 @@
+from unittest import mock
+
+import requests
+
+from src.monitors.entraid_monitor import EntraIdMonitor
+from src.state_manager import StateManager
+
+GROUPS = "https://graph.microsoft.com/v1.0/groups/delta?$select=id,displayName,members"
+
+
+class DummyLogger:
+    def info(self, message: str) -> None:
+        return None
+
+
+def _gone():
+    response = requests.Response()
+    response.status_code = 410
+    response._content = b'{"error": {"code": "syncStateNotFound"}}'
+    return requests.HTTPError("410 Gone", response=response)
+
+
+def test_graph_delta_applies_changes_and_resyncs_on_expired_token(tmp_path):
+    pages = {
+        GROUPS: {
+            "value": [{"id": "g1", "displayName": "Admins", "members@delta": [{"id": "u1"}]}],
+            "@odata.nextLink": "page-2",
+        },
+        "page-2": {
+            "value": [{"id": "g1", "members@delta": [{"id": "u2"}]}, {"id": "g2", "displayName": "Ops"}],
+            "@odata.deltaLink": "token-1",
+        },
+        "token-1": {
+            "value": [
+                {"id": "g1", "members@delta": [{"id": "u1", "@removed": {"reason": "deleted"}}, {"id": "u3"}]},
+                {"id": "g2", "@removed": {"reason": "deleted"}},
+            ],
+            "@odata.deltaLink": "token-2",
+        },
+    }
+    calls = []
+
+    def fake_graph_get(url, params=None):
+        calls.append(url)
+        if url == "token-2":
+            raise _gone()
+        return pages[url]
+
+    state = StateManager(str(tmp_path))
+    config = {"tenant_id": "tenant", "entraid_collections": ["groupMemberships"]}
+    monitor = EntraIdMonitor(config=config, credential=None, logger=DummyLogger(), state=state)
+    with mock.patch.object(monitor, "_graph_get", side_effect=fake_graph_get):
+        first = monitor._graph_delta("groupMemberships", GROUPS)
+        second = monitor._graph_delta("groupMemberships", GROUPS)
+        resynced = monitor._graph_delta("groupMemberships", GROUPS)
+
+    assert [[member["id"] for member in group.get("members@delta", [])] for group in first] == [["u1", "u2"], []]
+    assert [(group["id"], group["displayName"]) for group in second] == [("g1", "Admins")]
+    assert [member["id"] for member in second[0]["members@delta"]] == ["u2", "u3"]
+    assert calls == [GROUPS, "page-2", "token-1", "token-2", GROUPS, "page-2"]
+    assert resynced == first
+    assert state.load_meta("graph_delta.entraid_monitor.groupMemberships")["deltaLink"] == "token-1"
+    item = EntraIdMonitor._delta_item("groupMemberships", second[0], "tenant")
+    assert item["id"] == "groupMembership:g1"
+    assert item["data"] == {"members": [{"id": "u2", "type": None}, {"id": "u3", "type": None}]}
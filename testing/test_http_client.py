@@ -0,0 +1,39 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.http_client import HttpClient
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"value": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return None
+
+
+def test_http_client_reuses_keep_alive_connections():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = HttpClient(pool_connections=1, pool_maxsize=2, timeout=5)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/subscriptions"
+        for _ in range(5):
+            assert client.request("GET", url).json() == {"value": []}
+        stats = client.stats()["127.0.0.1"]
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["reuse_rate"] == 0.8
+        assert stats["idle_connections"] == 1
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+from src.incremental import CHECKPOINT_KEY, IncrementalPlanner, collect_partial
+from src.monitors.defender_monitor import DefenderMonitor
+from src.monitors.rbac_monitor import RBACMonitor
+from src.sqlite_state import SqliteStateManager
+from src.state_manager import StateManager
+
+CONFIG = {"subscriptions": ["SUB-A", "sub-b"]}
+START = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeReader:
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def operations(self, subscription_id, since, until):
+        self.calls.append(subscription_id)
+        return self.events.get(subscription_id, [])
+
+
+def _monitors():
+    return {
+        "rbac_monitor": RBACMonitor(CONFIG, None, None, http_client=object()),
+        "defender_monitor": DefenderMonitor(CONFIG, None, None, http_client=object()),
+    }
+
+
+def test_planner_refetches_only_touched_subscriptions(tmp_path):
+    state = StateManager(str(tmp_path))
+    settings = {"full_sweep_interval_seconds": 3600, "lag_seconds": 60}
+    monitors = _monitors()
+    first = IncrementalPlanner(settings, state, FakeReader({}), now=START)
+    assert first.plan(monitors) == {"rbac_monitor": None, "defender_monitor": None}
+    for name, monitor in monitors.items():
+        first.commit(name, monitor)
+    assert state.load_meta(CHECKPOINT_KEY)["rbac_monitor"]["subscriptions"] == ["sub-a", "sub-b"]
+
+    write = (START + timedelta(minutes=3), "microsoft.authorization/roleassignments/write")
+    stale = (START - timedelta(minutes=5), "microsoft.security/pricings/write")
+    reader = FakeReader({"sub-a": [write, stale]})
+    second = IncrementalPlanner(settings, state, reader, now=START + timedelta(minutes=5))
+    assert second.plan(monitors) == {"rbac_monitor": {"sub-a"}, "defender_monitor": set()}
+    assert reader.calls == ["sub-a", "sub-b"]
+
+    sweep = IncrementalPlanner(settings, state, reader, now=START + timedelta(hours=1))
+    assert sweep.plan(monitors) == {"rbac_monitor": None, "defender_monitor": None}
+
+
+def test_collect_partial_keeps_untouched_subscriptions(tmp_path):
+    state = SqliteStateManager(str(tmp_path / "state.db"))
+    monitor = _monitors()["defender_monitor"]
+    stored = [
+        {"id": "a/1", "subscriptionId": "SUB-A", "data": {"tier": "Standard"}},
+        {"id": "b/1", "subscriptionId": "sub-b", "data": {"tier": "Standard"}},
+    ]
+    state.save_snapshot(monitor.name, stored)
+    state.save_meta(CHECKPOINT_KEY, {"x": 1})
+    assert state.load_meta(CHECKPOINT_KEY) == {"x": 1}
+
+    monitor.subscription_filter = {"sub-a"}
+    monitor.collect = lambda: [{"id": "a/1", "subscriptionId": "SUB-A", "data": {"tier": "Free"}}]
+    merged = collect_partial(monitor, state)
+    assert sorted((item["id"], item["data"]["tier"]) for item in merged) == [("a/1", "Free"), ("b/1", "Standard")]
+    state.close()
@@ -0,0 +1,37 @@
+import requests
+
+from src.metrics import Counter, Histogram, MetricsServer, Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests_total = registry.register(Counter("requests_total", "Requests.", ("host", "status")))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("host",), buckets=(0.1, 1)))
+    requests_total.inc(host="management.azure.com", status="200")
+    requests_total.inc(2, host="management.azure.com", status="429")
+    latency.observe(0.05, host="graph")
+    latency.observe(0.5, host="graph")
+    latency.observe(5, host="graph")
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{host="management.azure.com",status="429"} 2' in text
+    assert 'latency_seconds_bucket{host="graph",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{host="graph",le="1"} 2' in text
+    assert 'latency_seconds_bucket{host="graph",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{host="graph"} 5.55' in text
+    assert 'latency_seconds_count{host="graph"} 3' in text
+
+
+def test_metrics_server_serves_registry():
+    registry = Registry()
+    registry.register(Counter("cycles_total", "Cycles.")).inc()
+    server = MetricsServer("127.0.0.1", 0, registry).start()
+    try:
+        response = requests.get(f"http://127.0.0.1:{server.port}/metrics", timeout=5)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "cycles_total 1" in response.text
+        assert requests.get(f"http://127.0.0.1:{server.port}/", timeout=5).status_code == 404
+    finally:
+        server.stop()
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from src.monitors.rbac_monitor import RBACMonitor
+from src.monitors.registry import discovered_monitors, enabled_monitors
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_manifest_plugins_load_without_scanning_entry_points(tmp_path, monkeypatch):
+    (tmp_path / "custom_monitors.py").write_text(
+        "from src.monitors.base import MonitorBase\n\nclass KeyVaultMonitor(MonitorBase):\n    name = 'keyvault'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    discovered_monitors.cache_clear()
+    config = {
+        "enabled_monitors": ["rbac_monitor", "keyvault_monitor"],
+        "monitor_plugins": {"keyvault_monitor": "custom_monitors:KeyVaultMonitor"},
+    }
+    monitors = enabled_monitors(config)
+    assert monitors["rbac_monitor"] is RBACMonitor
+    assert monitors["keyvault_monitor"].__name__ == "KeyVaultMonitor"
+    assert discovered_monitors.cache_info().currsize == 0
+
+    # A name neither built in nor in the manifest is looked up in installed entry points, then skipped.
+    config["enabled_monitors"].append("unknown_monitor")
+    assert list(enabled_monitors(config)) == ["rbac_monitor", "keyvault_monitor"]
+    assert discovered_monitors.cache_info().currsize == 1
+
+
+def test_only_enabled_monitors_are_imported():
+    code = (
+        "import sys\n"
+        "from src.monitors.registry import enabled_monitors\n"
+        "enabled_monitors({'enabled_monitors': ['rbac_monitor']})\n"
+        "print(sorted(name for name in sys.modules if name.startswith(('src.monitors.', 'azure.identity'))))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    assert result.stdout.strip() == "['src.monitors.base', 'src.monitors.rbac_monitor', 'src.monitors.registry']"
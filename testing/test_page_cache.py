@@ -0,0 +1,76 @@
+import json
+from unittest import mock
+
+import requests
+
+from src.diff import canonicalize_items
+from src.monitors.activity_export_monitor import ActivityExportMonitor
+from src.page_cache import PageCache, fingerprint
+from src.state_manager import StateManager
+
+
+class DummyLogger:
+    def info(self, message: str) -> None:
+        return None
+
+
+def _response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+def test_unchanged_pages_reuse_items_across_restarts(tmp_path):
+    body = {
+        "value": [
+            {
+                "id": "/subscriptions/sub/providers/microsoft.insights/diagnosticSettings/ds",
+                "name": "ds",
+                "properties": {"workspaceId": "ws", "logs": [{"category": "B"}, {"category": "A"}]},
+            }
+        ]
+    }
+    state = StateManager(str(tmp_path))
+
+    def collect(cache, page_body):
+        monitor = ActivityExportMonitor({"subscriptions": ["sub"]}, None, DummyLogger(), http_client=object())
+        monitor.page_cache = cache
+        cache.begin()
+        with mock.patch.object(monitor, "_send", return_value=_response(page_body)), mock.patch.object(
+            monitor, "_setting_items", wraps=monitor._setting_items
+        ) as build:
+            items = monitor.collect()
+        cache.commit()
+        return items, build.call_count
+
+    first, built = collect(PageCache(state, "activity_export_monitor"), body)
+    assert built == 1
+    assert [log["category"] for log in first[0]["data"]["logs"]] == ["A", "B"]
+
+    restarted = PageCache(state, "activity_export_monitor")
+    again, built = collect(restarted, body)
+    assert (again, built, restarted.hits) == (first, 0, 1)
+    canonical = canonicalize_items(again, known=restarted.canonical)
+    assert canonical == canonicalize_items(first)
+
+    body["value"][0]["properties"]["workspaceId"] = "other"
+    changed, built = collect(restarted, body)
+    assert built == 1
+    assert changed[0]["data"]["workspaceId"] == "other"
+
+
+def test_entries_without_next_link_are_misses(tmp_path):
+    state = StateManager(str(tmp_path))
+    first_page = {"value": [{"id": "a", "name": "a", "properties": {}}], "nextLink": "https://next"}
+    body = json.dumps(first_page).encode("utf-8")
+    key = "page-1"
+    state.save_meta(
+        "page_cache.monitor",
+        {key: {"fingerprint": fingerprint(body), "items": [{"id": "a", "data": {}}], "digests": ["d"]}},
+    )
+    cache = PageCache(state, "monitor")
+    cache.begin()
+    items, next_link = cache.page(key, body, lambda: ([{"id": "a", "data": {}}], first_page["nextLink"]))
+    assert (next_link, cache.hits, cache.misses) == ("https://next", 0, 1)
+
@@ -0,0 +1,102 @@
+import time
+from email.utils import formatdate
+from unittest import mock
+
+import pytest
+import requests
+
+from src.monitors.defender_monitor import DefenderMonitor
+from src.rate_limiter import CircuitOpenError, RateLimiter, parse_retry_after
+
+URL = "https://management.azure.com/subscriptions/SUB-1/providers/Microsoft.Security/pricings"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _response(status, headers=None, body=b"{}"):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = body
+    response.url = URL
+    return response
+
+
+def test_buckets_follow_quota_headers_and_pause_on_throttling():
+    clock = FakeClock()
+    limiter = RateLimiter(subscription_rate=10, subscription_burst=100, clock=clock, sleep=clock.sleep)
+    limiter.acquire(URL)
+    limiter.observe(URL, _response(200, {"x-ms-ratelimit-remaining-subscription-reads": "0"}))
+    limiter.acquire(URL)
+    assert clock.now == pytest.approx(0.1)
+
+    limiter.observe(URL, _response(429, {"Retry-After": "7"}))
+    limiter.acquire("https://management.azure.com/subscriptions/sub-1/resourceGroups/rg")
+    assert clock.now == pytest.approx(7.1)
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    limiter = RateLimiter(breaker_threshold=2, breaker_reset=30, clock=clock, sleep=clock.sleep)
+    for _ in range(2):
+        limiter.acquire(URL)
+        limiter.observe(URL, _response(503))
+    with pytest.raises(CircuitOpenError):
+        limiter.acquire(URL.replace("SUB-1", "sub-2"))
+    clock.now += 30
+    limiter.acquire(URL)
+    with pytest.raises(CircuitOpenError):
+        limiter.acquire(URL)
+    limiter.observe(URL, _response(200))
+    limiter.acquire(URL)
+    assert limiter.stats()["open_circuits"] == []
+
+
+def test_circuit_breakers_are_kept_per_tenant():
+    clock = FakeClock()
+    limiter = RateLimiter(breaker_threshold=2, breaker_reset=30, clock=clock, sleep=clock.sleep)
+    for _ in range(2):
+        limiter.acquire(URL, "contoso")
+        limiter.observe(URL, _response(503), "contoso")
+    with pytest.raises(CircuitOpenError):
+        limiter.acquire(URL, "contoso")
+    limiter.acquire(URL, "fabrikam")
+    limiter.acquire(URL)
+
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("7") == 7.0
+    assert 25 <= parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+def test_request_honours_retry_after_and_raises_final_response():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    credential = mock.Mock()
+    credential.get_token.return_value.token = "token"
+    http = mock.Mock()
+    http.request.side_effect = [_response(429, {"Retry-After": "3"}), _response(200, body=b'{"value": [1]}')]
+    monitor = DefenderMonitor({}, credential, None, http_client=http, rate_limiter=limiter)
+    with mock.patch("time.sleep", side_effect=clock.sleep):
+        assert monitor._request("GET", URL) == {"value": [1]}
+    assert 3 <= clock.now <= 4
+
+    http.request.side_effect = [_response(500), _response(502)]
+    sleeps = []
+    with mock.patch("time.sleep", side_effect=sleeps.append), pytest.raises(requests.HTTPError) as error:
+        monitor._request("GET", URL, max_retries=2)
+    assert error.value.response.status_code == 502
+    assert len(sleeps) == 1
@@ -0,0 +1,113 @@
+import json
+
+import requests
+from requests.adapters import BaseAdapter
+
+from src.credentials import CachedCredential
+from src.monitors.defender_monitor import DefenderMonitor
+from src.monitors.rbac_monitor import RBACMonitor
+from src.rate_limiter import RateLimiter
+from src.replay import Cassette, RecordingHttpClient, ReplayCredential, ReplayHttpClient, ReplayServer
+
+ASSIGNMENTS = "https://management.azure.com/subscriptions/sub/providers/Microsoft.Authorization/roleAssignments"
+DEFINITIONS = "https://management.azure.com/subscriptions/sub/providers/Microsoft.Authorization/roleDefinitions"
+
+
+class CannedAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Set-Cookie"] = "session=abc"
+        response._content = json.dumps(
+            {
+                "value": [{"properties": {"clientSecret": "hunter2", "url": "https://sa/c?sv=1&sig=s3cr3t"}}],
+                "nextLink": f"{ASSIGNMENTS}?$skipToken=2",
+            }
+        ).encode("utf-8")
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        return None
+
+
+def test_recording_scrubs_secrets(tmp_path):
+    client = RecordingHttpClient(Cassette(str(tmp_path)))
+    client.session.mount("https://management.azure.com", CannedAdapter())
+    client.request("GET", ASSIGNMENTS, params={"api-version": "2022-04-01"})
+    recorded = (tmp_path / "interactions.jsonl").read_text()
+    assert "hunter2" not in recorded and "s3cr3t" not in recorded and "session" not in recorded
+    assert "$skipToken=2" in recorded
+
+
+def test_monitor_collects_through_replay_server_with_throttling(tmp_path):
+    cassette = Cassette(str(tmp_path))
+    assignment = {"properties": {"principalId": "p", "scope": "/subscriptions/sub"}}
+    cassette.add(
+        "GET",
+        f"{ASSIGNMENTS}?api-version=2022-04-01",
+        {"value": [{**assignment, "id": "a1"}], "nextLink": f"{ASSIGNMENTS}?api-version=2022-04-01&$skipToken=1"},
+    )
+    cassette.add("GET", f"{ASSIGNMENTS}?$skipToken=1&api-version=2022-04-01", {"value": [{**assignment, "id": "a2"}]})
+    cassette.add("GET", f"{DEFINITIONS}?api-version=2022-04-01", {"value": []})
+
+    server = ReplayServer(cassette, throttle_rate=0.5, retry_after=0, seed=3).start()
+    http = ReplayHttpClient(server.url, server=server)
+    try:
+        monitor = RBACMonitor(
+            {"subscriptions": ["sub"]},
+            CachedCredential(ReplayCredential()),
+            None,
+            http_client=http,
+            rate_limiter=RateLimiter(),
+        )
+        assert [item["id"] for item in monitor.collect()] == ["a1", "a2"]
+        stats = http.stats()["replay-server"]
+        assert stats["served"] == 3 and stats["throttled"] > 0 and stats["missing"] == 0
+    finally:
+        http.close()
+
+
+class ResourceGraphPagesAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        options = json.loads(request.body)["options"]
+        page = {"data": [{"id": "r2"}]}
+        if "$skipToken" not in options:
+            page = {"data": [{"id": "r1"}], "$skipToken": "page-2-token"}
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(page).encode("utf-8")
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        return None
+
+
+def test_paged_resource_graph_query_replays_every_page(tmp_path):
+    def query(http):
+        monitor = DefenderMonitor(
+            {"subscriptions": ["sub"]},
+            CachedCredential(ReplayCredential()),
+            None,
+            http_client=http,
+            rate_limiter=RateLimiter(),
+        )
+        return [row["id"] for row in monitor._resource_graph_query("securityresources", ["sub"])]
+
+    recorder = RecordingHttpClient(Cassette(str(tmp_path)))
+    recorder.session.mount("https://management.azure.com", ResourceGraphPagesAdapter())
+    assert query(recorder) == ["r1", "r2"]
+    assert "page-2-token" in (tmp_path / "interactions.jsonl").read_text()
+
+    server = ReplayServer(Cassette(str(tmp_path))).start()
+    http = ReplayHttpClient(server.url, server=server)
+    try:
+        assert query(http) == ["r1", "r2"]
+        assert http.stats()["replay-server"]["missing"] == 0
+    finally:
+        http.close()
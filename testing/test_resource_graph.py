@@ -0,0 +1,114 @@
+from unittest import mock
+
+from src.monitors.defender_monitor import DefenderMonitor
+from src.monitors.rbac_monitor import RBACMonitor
+
+
+class DummyLogger:
+    def info(self, message: str) -> None:
+        return None
+
+
+PRICING = {
+    "id": "/subscriptions/SUB-1/providers/Microsoft.Security/pricings/VirtualMachines",
+    "name": "VirtualMachines",
+    "properties": {"pricingTier": "Standard", "subPlan": "P2"},
+}
+AUTO = {
+    "id": "/subscriptions/SUB-1/providers/Microsoft.Security/autoProvisioningSettings/default",
+    "name": "default",
+    "properties": {"autoProvision": "On"},
+}
+
+
+def test_defender_resource_graph_backend_matches_arm_items():
+    config = {"tenant_id": "tenant", "subscriptions": ["SUB-1"]}
+
+    def fake_arm_get(url, params=None):
+        if url.endswith("/pricings"):
+            return {"value": [{**PRICING, "type": "Microsoft.Security/pricings"}]}
+        return {"value": [{**AUTO, "type": "Microsoft.Security/autoProvisioningSettings"}]}
+
+    arm_monitor = DefenderMonitor(config=config, credential=None, logger=DummyLogger())
+    with mock.patch.object(arm_monitor, "_arm_get", side_effect=fake_arm_get):
+        arm_items = arm_monitor.collect()
+
+    pages = {
+        "pricings": [
+            {"data": [{**PRICING, "type": "microsoft.security/pricings", "subscriptionId": "sub-1"}], "$skipToken": "t"},
+            {"data": []},
+        ],
+        "autoprovisioningsettings": [
+            {"data": [{**AUTO, "type": "microsoft.security/autoprovisioningsettings", "subscriptionId": "sub-1"}]},
+        ],
+    }
+    bodies = []
+
+    def fake_request(method, url, scope=None, headers=None, params=None, json_body=None, max_retries=5):
+        bodies.append(json_body)
+        key = "pricings" if "pricings" in json_body["query"] else "autoprovisioningsettings"
+        return pages[key].pop(0)
+
+    graph_monitor = DefenderMonitor(
+        config={**config, "collection_backends": {"defender_monitor": "resource_graph"}},
+        credential=None,
+        logger=DummyLogger(),
+    )
+    with mock.patch.object(graph_monitor, "_request", side_effect=fake_request):
+        graph_items = graph_monitor.collect()
+
+    assert graph_items == arm_items
+    assert bodies[1]["options"]["$skipToken"] == "t"
+
+
+def test_rbac_resource_graph_backend_keeps_inherited_assignments():
+    config = {"tenant_id": "tenant", "subscriptions": ["SUB-1"]}
+    own = {
+        "id": "/subscriptions/SUB-1/providers/Microsoft.Authorization/roleAssignments/a1",
+        "name": "a1",
+        "properties": {"principalId": "p1", "scope": "/subscriptions/SUB-1"},
+    }
+    mg_scope = "/providers/Microsoft.Management/managementGroups/mg-1"
+    management_group = {
+        "id": f"{mg_scope}/providers/Microsoft.Authorization/roleAssignments/a2",
+        "name": "a2",
+        "properties": {"principalId": "p2", "scope": mg_scope},
+    }
+    assignment_type = "Microsoft.Authorization/roleAssignments"
+
+    def fake_arm_request(method, url, scope=None, headers=None, params=None, json_body=None, max_retries=5):
+        if url.endswith("/roleAssignments"):
+            return {"value": [{**own, "type": assignment_type}, {**management_group, "type": assignment_type}]}
+        return {"value": []}
+
+    arm_monitor = RBACMonitor(config=config, credential=None, logger=DummyLogger())
+    with mock.patch.object(arm_monitor, "_request", side_effect=fake_arm_request):
+        arm_items = arm_monitor.collect()
+
+    requested = []
+
+    def fake_request(method, url, scope=None, headers=None, params=None, json_body=None, max_retries=5):
+        if method == "GET":
+            requested.append((url, params))
+            if "managementGroups/mg-1/" in url:
+                return {"value": [{**management_group, "type": assignment_type}]}
+            return {"value": []}
+        if "resourcecontainers" in json_body["query"]:
+            chain = [{"name": "mg-1"}, {"name": "tenant-root"}]
+            row = {"id": "/subscriptions/SUB-1", "subscriptionId": "sub-1"}
+            return {"data": [{**row, "properties": {"managementGroupAncestorsChain": chain}}]}
+        if "roleassignments" in json_body["query"]:
+            return {"data": [{**own, "type": assignment_type.lower(), "subscriptionId": "sub-1"}]}
+        return {"data": []}
+
+    graph_monitor = RBACMonitor(
+        config={**config, "collection_backends": {"rbac_monitor": {"roleAssignments": "resource_graph"}}},
+        credential=None,
+        logger=DummyLogger(),
+    )
+    with mock.patch.object(graph_monitor, "_request", side_effect=fake_request):
+        graph_items = graph_monitor.collect()
+
+    assert graph_items == arm_items
+    assert requested[0][1]["$filter"] == "atScope()"
+    assert all("/subscriptions/" not in url for url, _ in requested if url.endswith("/roleAssignments"))
@@ -0,0 +1,79 @@
+import threading
+
+from src.scheduler import Scheduler, shard_subscriptions
+
+
+def test_scheduler_anchors_runs_skips_overlaps_and_orders_by_priority():
+    now = [1000.0]
+    release = threading.Event()
+    finished = threading.Event()
+    order = []
+
+    def slow():
+        order.append("rbac")
+        release.wait(5)
+
+    scheduler = Scheduler(max_workers=1, clock=lambda: now[0], on_complete=lambda job: finished.set())
+    rbac = scheduler.add("rbac", slow, interval=900, priority=5)
+    sentinel = scheduler.add("sentinel", lambda: order.append("sentinel"), interval=60, priority=0)
+
+    # Both are due; the single worker goes to the higher-priority job first.
+    assert [job.name for job in scheduler.run_pending()] == ["sentinel"]
+    assert finished.wait(5)
+    finished.clear()
+    assert sentinel.next_run == 1060.0
+    assert [job.name for job in scheduler.run_pending()] == ["rbac"]
+
+    # rbac is still running when its next slot comes due: that slot is skipped.
+    now[0] = 1905.0
+    started = scheduler.run_pending()
+    assert [job.name for job in started] == []
+    assert rbac.skipped == 1 and rbac.next_run == 2800.0
+    # sentinel missed 14 slots while the worker was busy; it stays on its 60s grid.
+    release.set()
+    assert finished.wait(5)
+    finished.clear()
+    assert [job.name for job in scheduler.run_pending()] == ["sentinel"]
+    assert finished.wait(5)
+    assert sentinel.next_run == 1960.0 and sentinel.skipped == 14
+    status = {entry["name"]: entry for entry in scheduler.status()}
+    assert status["rbac"]["runs"] == 1 and status["rbac"]["last_duration_seconds"] is not None
+    assert order == ["sentinel", "rbac", "sentinel"]
+    scheduler.shutdown()
+
+
+
+def test_scheduler_logs_failing_completion_hook(caplog):
+    finished = threading.Event()
+
+    def on_complete(job):
+        finished.set()
+        raise OSError("status file unwritable")
+
+    scheduler = Scheduler(max_workers=1, clock=lambda: 1000.0, on_complete=on_complete)
+    scheduler.add("rbac", lambda: None, interval=60)
+    scheduler.run_pending()
+    assert finished.wait(5)
+    scheduler.shutdown()
+    assert "Completion hook of scheduled job rbac failed" in caplog.text
+
+def test_shard_assignment_is_stable():
+    subscriptions = [f"SUB-{index}" for index in range(20)]
+    groups = shard_subscriptions(subscriptions, 4)
+    assert set().union(*groups) == {subscription.lower() for subscription in subscriptions}
+    fewer = shard_subscriptions(subscriptions[:10], 4)
+    assert all(smaller <= larger for smaller, larger in zip(fewer, groups))
+
+
+def test_due_jobs_are_shared_fairly_between_groups():
+    release = threading.Event()
+    scheduler = Scheduler(max_workers=3, clock=lambda: 1000.0, max_per_group=2)
+    for index in range(4):
+        scheduler.add(f"big.monitor{index}", lambda: release.wait(5), interval=60, group="big")
+    scheduler.add("small.monitor", lambda: release.wait(5), interval=60, group="small")
+
+    started = scheduler.run_pending()
+    assert sorted(job.group for job in started) == ["big", "big", "small"]
+    assert {entry["group"] for entry in scheduler.status() if entry["running"]} == {"big", "small"}
+    release.set()
+    scheduler.shutdown()
@@ -0,0 +1,65 @@
+import importlib.util
+from pathlib import Path
+
+from src.sqlite_state import SqliteStateManager, migrate_json_state
+from src.state_manager import StateManager
+from src.streaming import SortedRecords
+
+
+def _item(item_id, subscription_id, value):
+    return {
+        "id": item_id,
+        "scope": f"/subscriptions/{subscription_id}",
+        "subscriptionId": subscription_id,
+        "data": {"value": value},
+    }
+
+
+def test_sqlite_save_touches_only_changed_rows(tmp_path):
+    state = SqliteStateManager(str(tmp_path / "state.db"))
+    assert state.load_snapshot("rbac_monitor") is None
+    items = [_item(f"id-{index:03d}", f"sub-{index % 2}", index) for index in range(100)]
+    state.save_snapshot("rbac_monitor", items)
+
+    updated = [*items[1:50], _item("id-050", "sub-0", "changed"), *items[51:], _item("id-999", "sub-1", 1)]
+    before = state._conn.total_changes
+    state.save_snapshot("rbac_monitor", updated)
+    # one delete, one update, one insert, plus the snapshots bookkeeping row
+    assert state._conn.total_changes - before == 4
+
+    assert len(state.load_snapshot("rbac_monitor", subscription_id="sub-1")) == 51
+    assert state.load_snapshot("rbac_monitor", scope="/subscriptions/sub-0")[0]["id"] == "id-002"
+    records = SortedRecords(updated)
+    assert [record.id for record in state.iter_snapshot("rbac_monitor")] == [record.id for record in records]
+    state.save_snapshot("empty_monitor", [])
+    assert state.load_snapshot("empty_monitor") == []
+    state.close()
+
+
+def test_migrate_json_state(tmp_path):
+    json_state = StateManager(str(tmp_path))
+    json_state.save_snapshot("defender_monitor", [_item("a", "sub", 1), _item("b", "sub", 2)])
+    assert migrate_json_state(str(tmp_path), str(tmp_path / "state.db")) == {"defender_monitor": 2}
+    state = SqliteStateManager(str(tmp_path / "state.db"))
+    assert state.load_index("defender_monitor") == json_state.load_index("defender_monitor")
+    state.close()
+
+
+def test_migrate_json_state_next_to_scheduler_status(tmp_path):
+    script = Path(__file__).resolve().parents[1] / "azure-security-guard.py"
+    spec = importlib.util.spec_from_file_location("azure_security_guard", script)
+    guard = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(guard)
+    scheduler = guard.build_scheduler({"state_dir": str(tmp_path)}, {}, logger=None, verbose=False)
+    scheduler.on_complete(scheduler.add("rbac_monitor", lambda: None, interval=60))
+
+    StateManager(str(tmp_path)).save_snapshot("defender_monitor", [_item("a", "sub", 1)])
+    assert migrate_json_state(str(tmp_path), str(tmp_path / "state.db")) == {"defender_monitor": 1}
+
+
+def test_migrate_json_state_skips_files_that_are_not_snapshots(tmp_path, caplog):
+    StateManager(str(tmp_path)).save_snapshot("defender_monitor", [_item("a", "sub", 1)])
+    (tmp_path / "notes.json").write_text('{"owner": "secops"}')
+    (tmp_path / "rbac_monitor.json.bak.json").write_text('[{"id": "x"}]')
+    assert migrate_json_state(str(tmp_path), str(tmp_path / "state.db")) == {"defender_monitor": 1}
+    assert "Skipping notes" in caplog.text and "Skipping rbac_monitor.json.bak" in caplog.text
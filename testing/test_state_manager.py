@@ -0,0 +1,43 @@
+import os
+from unittest import mock
+
+import pytest
+
+from src.diff import canonicalize_items, diff_snapshots, item_hashes
+from src.state_manager import StateManager
+
+
+def test_save_snapshot_writes_hash_index(tmp_path):
+    state = StateManager(str(tmp_path))
+    items = [{"id": "b", "data": {"x": [2, 1]}}, {"id": "a", "data": {"x": 1}}]
+    assert state.load_index("rbac_monitor") is None
+    state.save_snapshot("rbac_monitor", items)
+    assert state.load_index("rbac_monitor") == item_hashes(items)
+    assert state.load_snapshot("rbac_monitor") == [
+        {"id": "a", "data": {"x": 1}},
+        {"id": "b", "data": {"x": [1, 2]}},
+    ]
+
+
+
+def test_interrupted_save_never_pairs_snapshot_with_stale_index(tmp_path):
+    state = StateManager(str(tmp_path))
+    state.save_snapshot("rbac_monitor", [{"id": "a", "data": {"x": 1}}])
+    replace = os.replace
+
+    def crash_on_index(source, target):
+        if str(target).endswith(".index.json"):
+            raise OSError("disk full")
+        replace(source, target)
+
+    with mock.patch("os.replace", side_effect=crash_on_index), pytest.raises(OSError):
+        state.save_snapshot("rbac_monitor", [{"id": "a", "data": {"x": 2}}])
+    assert state.load_snapshot("rbac_monitor") == [{"id": "a", "data": {"x": 2}}]
+    assert state.load_index("rbac_monitor") is None
+
+def test_diff_skips_items_with_matching_hashes():
+    old = [{"id": "one", "data": {"enabled": True}}, {"id": "two", "data": {"enabled": True}}]
+    new = [{"id": "one", "data": {"enabled": True}}, {"id": "two", "data": {"enabled": False}}]
+    changes = diff_snapshots(old, new, old_hashes=item_hashes(old), new_canonical=canonicalize_items(new))
+    assert [change["id"] for change in changes] == ["two"]
+    assert changes[0]["baselineHash"] == item_hashes(old)["two"]
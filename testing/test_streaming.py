@@ -0,0 +1,38 @@
+import random
+
+from src.diff import diff_snapshots
+from src.state_manager import StateManager
+from src.streaming import SortedRecords, diff_streams
+
+
+def _items(rng, ids):
+    return [{"id": f"item-{index:04d}", "data": {"value": rng.randint(0, 3), "tags": ["b", "a"]}} for index in ids]
+
+
+def test_streaming_diff_matches_in_memory_diff(tmp_path):
+    rng = random.Random(3)
+    old = _items(rng, rng.sample(range(300), 200))
+    new = _items(rng, rng.sample(range(300), 200))
+    old_records = SortedRecords(old, chunk_size=16, tmp_dir=str(tmp_path))
+    new_records = SortedRecords(new, chunk_size=16, tmp_dir=str(tmp_path))
+    try:
+        streamed = list(diff_streams(old_records, new_records))
+    finally:
+        old_records.close()
+        new_records.close()
+
+    expected = sorted(diff_snapshots(old, new), key=lambda change: change["id"])
+    assert streamed == expected
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stream_snapshot_round_trip(tmp_path):
+    state = StateManager(str(tmp_path))
+    items = [{"id": "b", "data": {"x": 2}}, {"id": "a", "data": {"x": 1}}, {"id": "b", "data": {"x": 3}}]
+    state.save_snapshot("rbac_monitor", items[:1])
+    records = SortedRecords(items, chunk_size=2, tmp_dir=str(tmp_path))
+    state.save_snapshot_stream("rbac_monitor", records)
+    records.close()
+    assert [record.id for record in state.iter_snapshot("rbac_monitor")] == ["a", "b"]
+    assert state.load_snapshot("rbac_monitor") == [{"id": "a", "data": {"x": 1}}, {"id": "b", "data": {"x": 3}}]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["rbac_monitor.tsv"]
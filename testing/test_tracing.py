@@ -0,0 +1,51 @@
+import json
+import time
+
+from src.concurrency import ordered_map
+from src.tracing import TRACER, FileExporter, SamplingProfiler, span
+
+
+def spans_by_name(path):
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    return {item["name"]: item for item in spans}
+
+
+def test_spans_nest_across_worker_threads(tmp_path):
+    TRACER.configure([FileExporter(str(tmp_path / "spans.jsonl"))])
+    try:
+        with span("cycle"):
+
+            def scope(subscription):
+                with span(f"scope-{subscription}", subscription=subscription) as scope_span:
+                    scope_span.add("pages", 2)
+                    return subscription
+
+            assert ordered_map(scope, ["a", "b"], max_workers=2) == ["a", "b"]
+    finally:
+        TRACER.configure([])
+
+    spans = spans_by_name(tmp_path / "spans.jsonl")
+    cycle = spans["cycle"]
+    assert "parentSpanId" not in cycle
+    for name in ("scope-a", "scope-b"):
+        assert spans[name]["parentSpanId"] == cycle["spanId"]
+        assert spans[name]["traceId"] == cycle["traceId"]
+    assert {"key": "pages", "value": {"intValue": "2"}} in spans["scope-a"]["attributes"]
+
+
+def test_profiler_writes_folded_stacks_under_spans(tmp_path):
+    TRACER.configure([FileExporter(str(tmp_path / "spans.jsonl"))])
+    profiler = SamplingProfiler(str(tmp_path / "profile.folded"), interval=0.001).start()
+    try:
+        with span("cycle"), span("scope", subscription="sub-1"):
+            time.sleep(0.05)
+    finally:
+        profiler.stop()
+        TRACER.configure([])
+
+    stacks = (tmp_path / "profile.folded").read_text().splitlines()
+    assert stacks
+    stack, count = stacks[0].rsplit(" ", 1)
+    assert stack.startswith("[cycle];[scope subscription=sub-1];") and int(count) > 0